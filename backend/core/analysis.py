@@ -1,8 +1,13 @@
 import os
 import json
-from typing import List, Dict
+import random
+import asyncio
+from typing import Callable, List, Dict
 from dotenv import load_dotenv
-from xai_sdk import Client
+import grpc
+from xai_sdk import AsyncClient
+from xai_sdk.chat import system, user, assistant
+from core.llm_cache import llm_cache, cache_key
 import logging
 
 load_dotenv()
@@ -10,54 +15,145 @@ load_dotenv()
 XAI_API_KEY = os.getenv("GROK_API_KEY")  # Keep same env var name
 logger = logging.getLogger("uvicorn")
 
-def call_grok(messages: List[Dict], model="grok-4-1-fast-reasoning-latest", timeout=90) -> str:
+# Shared client settings
+GROK_CONCURRENCY = int(os.getenv("GROK_CONCURRENCY", "4"))
+GROK_MAX_RETRIES = int(os.getenv("GROK_MAX_RETRIES", "4"))
+GROK_BACKOFF_BASE = 1.0
+GROK_BACKOFF_MAX = 20.0
+
+# Rate limits and transient server errors are retried, everything else fails fast
+RETRYABLE_CODES = {
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.UNKNOWN,
+}
+
+_client = None
+_client_loop = None
+_semaphore = None
+
+def _get_client():
     """
-    Call Grok API using official xAI SDK
+    One AsyncClient (one gRPC channel) per event loop, reused for all calls.
+    Scripts that call asyncio.run() repeatedly get a fresh client per loop.
     """
+    global _client, _client_loop, _semaphore
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = AsyncClient(api_key=XAI_API_KEY)
+        _client_loop = loop
+        _semaphore = asyncio.Semaphore(GROK_CONCURRENCY)
+    return _client, _semaphore
+
+def _is_retryable(error: Exception) -> bool:
+    code = getattr(error, "code", None)
+    if callable(code):
+        return code() in RETRYABLE_CODES
+    return isinstance(error, (ConnectionError, asyncio.TimeoutError))
+
+def _is_valid(response: str, validate: Callable = None) -> bool:
+    if validate is None:
+        return True
     try:
-        logger.info(f"Calling Grok API with {len(messages)} messages, model={model}, timeout={timeout}s")
-        
-        # Initialize xAI client
-        client = Client(api_key=XAI_API_KEY, timeout=timeout)
-        
-        # Create chat with model
-        chat = client.chat.create(model=model, max_tokens=2000, temperature=0.7)
-        
-        # Add messages to chat
-        from xai_sdk.chat import system, user, assistant
+        validate(response)
+        return True
+    except Exception as e:
+        logger.warning(f"Grok response not cached, validation failed: {e}")
+        return False
+
+async def _sample(client, messages: List[Dict], model: str, temperature: float, max_tokens: int):
+    chat = client.chat.create(model=model, max_tokens=max_tokens, temperature=temperature)
+    
+    for msg in messages:
+        role = msg.get("role", "user")
+        content = msg.get("content", "")
         
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
+        if not content:
+            continue
             
-            if not content:
-                continue
-                
-            if role == "system":
-                chat.append(system(content))
-            elif role == "user":
-                chat.append(user(content))
-            elif role == "assistant":
-                chat.append(assistant(content))
-        
-        # Get response (this is synchronous)
-        response = chat.sample()
-        
-        # Extract content from response
-        if response and hasattr(response, 'message'):
-            if hasattr(response.message, 'content') and response.message.content:
-                result = response.message.content.strip()
+        if role == "system":
+            chat.append(system(content))
+        elif role == "user":
+            chat.append(user(content))
+        elif role == "assistant":
+            chat.append(assistant(content))
+    
+    return await chat.sample()
+
+def parse_json_response(response: str):
+    """
+    JSON payload of a Grok answer (with or without ``` code fences).
+    Raises ValueError for truncated / malformed answers.
+    """
+    if "```json" in response:
+        response = response.split("```json")[1].split("```")[0]
+    elif "```" in response:
+        response = response.split("```")[1].split("```")[0]
+    return json.loads(response.strip())
+
+async def call_grok(messages: List[Dict], model="grok-4-1-fast-reasoning-latest", timeout=90,
+                    temperature=0.7, max_tokens=2000, cache=False, validate: Callable = None) -> str:
+    """
+    Call Grok API using the shared async xAI client.
+    At most GROK_CONCURRENCY calls run at once; rate limits / 5xx are retried with
+    jittered exponential backoff. timeout is the deadline for the whole call incl. retries.
+    cache=True serves identical prompts from the LLM cache (only for analysis-type
+    calls - creative generations should stay fresh). With validate (e.g.
+    parse_json_response) a response is only cached if validate accepts it, so a
+    truncated answer is retried next time instead of being served for the whole TTL.
+    """
+    if cache:
+        key = cache_key(model, {"temperature": temperature, "max_tokens": max_tokens}, messages)
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            logger.info("Grok response served from cache")
+            return cached
+    
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    client, semaphore = _get_client()
+    
+    for attempt in range(GROK_MAX_RETRIES + 1):
+        try:
+            logger.info(f"Calling Grok API with {len(messages)} messages, model={model}, attempt={attempt + 1}")
+            
+            async with semaphore:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                response = await asyncio.wait_for(
+                    _sample(client, messages, model, temperature, max_tokens),
+                    timeout=remaining
+                )
+            
+            # Extract content from response
+            content = getattr(response, 'content', None) or getattr(getattr(response, 'message', None), 'content', None)
+            if content:
+                result = content.strip()
                 tokens_used = response.usage.total_tokens if hasattr(response, 'usage') and response.usage else 'unknown'
                 logger.info(f"Grok API success. Tokens used: {tokens_used}")
+                if cache and _is_valid(result, validate):
+                    await llm_cache.put(key, result, model)
                 return result
-        
-        logger.error(f"Grok API returned empty response: {response}")
-        return ""
-    except Exception as e:
-        logger.error(f"Grok API Error: {str(e)}", exc_info=True)
-        return ""
+            
+            logger.error(f"Grok API returned empty response: {response}")
+            return ""
+        except Exception as e:
+            remaining = deadline - loop.time()
+            if attempt >= GROK_MAX_RETRIES or not _is_retryable(e) or remaining <= 0:
+                logger.error(f"Grok API Error: {str(e)}", exc_info=True)
+                return ""
+            
+            # Full jitter: sleep a random time up to the exponential cap
+            delay = random.uniform(0, min(GROK_BACKOFF_MAX, GROK_BACKOFF_BASE * 2 ** attempt))
+            delay = min(delay, max(remaining - 1, 0))
+            logger.warning(f"Grok API retryable error ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    
+    return ""
 
-def analyze_topic_style(text: str) -> Dict:
+async def analyze_topic_style(text: str) -> Dict:
     """
     Analyzes text for topic and style (filler words, pace, tone).
     """
@@ -82,19 +178,13 @@ def analyze_topic_style(text: str) -> Dict:
         }}
     }}
     """
-    response = call_grok([{"role": "user", "content": prompt}])
+    response = await call_grok([{"role": "user", "content": prompt}], cache=True, validate=parse_json_response)
     try:
-        # Clean up code blocks if present
-        if "```json" in response:
-            response = response.split("```json")[1].split("```")[0]
-        elif "```" in response:
-            response = response.split("```")[1].split("```")[0]
-            
-        return json.loads(response)
+        return parse_json_response(response)
     except:
         return {"topic": "Uncategorized", "category": "General", "importance": "mittel", "one_sentence_summary": "Analysis failed.", "mark_nörgel": "...", "style": {"filler_words": "", "pace": "medium", "tone": "neutral"}}
 
-def merge_topics(topics: List[str]) -> Dict[str, str]:
+async def merge_topics(topics: List[str]) -> Dict[str, str]:
     """
     Merges similar topics into a maximum of 15 broad themes.
     Returns a mapping: {"Raw Topic": "Merged Theme"}
@@ -102,7 +192,8 @@ def merge_topics(topics: List[str]) -> Dict[str, str]:
     if not topics:
         return {}
         
-    unique_topics = list(set(topics))
+    # Sorted so identical topic sets produce identical (cacheable) prompts
+    unique_topics = sorted(set(topics))
     
     prompt = f"""
     Here is a list of topics: {json.dumps(unique_topics)}
@@ -132,18 +223,49 @@ def merge_topics(topics: List[str]) -> Dict[str, str]:
         ...
     }}
     """
-    response = call_grok([{"role": "user", "content": prompt}])
+    response = await call_grok([{"role": "user", "content": prompt}], cache=True, validate=parse_json_response)
     try:
-        if "```json" in response:
-            response = response.split("```json")[1].split("```")[0]
-        elif "```" in response:
-            response = response.split("```")[1].split("```")[0]
-        return json.loads(response)
+        return parse_json_response(response)
     except:
         # Fallback: map to themselves
         return {t: t for t in unique_topics}
 
-def generate_suggestions(style_profile: Dict, weak_topics: List[Dict]) -> Dict:
+async def merge_new_topics(new_topics: List[str], existing_themes: List[str]) -> Dict[str, str]:
+    """
+    Assigns new raw topics to the existing themes (or new broad themes if nothing fits).
+    Returns a mapping {"Raw Topic": "Theme"}; empty dict if Grok failed.
+    """
+    if not new_topics:
+        return {}
+
+    unique_topics = sorted(set(new_topics))
+    prompt = f"""
+    Existing themes: {json.dumps(sorted(set(existing_themes)), ensure_ascii=False)}
+    New topics: {json.dumps(unique_topics, ensure_ascii=False)}
+
+    Map EACH new topic to a broad theme.
+
+    Rules:
+    - Use an existing theme (exact spelling) whenever the topic fits it, even loosely
+    - Only create a new theme if no existing theme fits; use a broad, inclusive name
+      (e.g. "Körperpflege", "Wäsche & Kleidung", "Ernährung & Kochen")
+    - Similar new topics must end up in the same theme
+    - Maximum 15 distinct themes total (existing + new)
+
+    Return ONLY a JSON object mapping each new topic to its theme:
+    {{
+        "Zahnseide": "Mundhygiene",
+        ...
+    }}
+    """
+    response = await call_grok([{"role": "user", "content": prompt}], cache=True, validate=parse_json_response)
+    try:
+        mapping = parse_json_response(response)
+        return {t: str(mapping[t]).strip() for t in unique_topics if mapping.get(t)}
+    except:
+        return {}
+
+async def generate_suggestions(style_profile: Dict, weak_topics: List[Dict]) -> Dict:
     """
     Generates 4 new 60-second tips based on weak topics and style profile.
     Uses the specific prompt from v3.md.
@@ -187,7 +309,7 @@ def generate_suggestions(style_profile: Dict, weak_topics: List[Dict]) -> Dict:
     import logging
     logger = logging.getLogger("uvicorn")
     logger.info(f"Calling Grok with model: grok-4-1-fast-reasoning")
-    response = call_grok([{"role": "user", "content": prompt}])
+    response = await call_grok([{"role": "user", "content": prompt}])
     logger.info(f"Grok response received. Length: {len(response)}")
     print(f"DEBUG: Grok raw response: {response}")
     try:
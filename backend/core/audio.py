@@ -1,91 +1,158 @@
 import os
-import ffmpeg
-from pydub import AudioSegment, silence
-from typing import List, Tuple
+from typing import List, Tuple, Optional
+from core.pcm import decode_to_pcm, load_pcm, remove_pcm, SAMPLE_RATE
+from core.silence import detect_nonsilent_chunks
+from core.splitter import cut_clips
+from core.audio_enhancer import enhance, UPLOAD_PRESET
 
-def cleanup_audio(input_path: str, output_path: str) -> str:
+def cleanup_audio(input_path: str, output_path: str, start_sec: float = None, end_sec: float = None) -> str:
     """
-    Cleans up audio using ffmpeg filters (highpass, lowpass, normalization).
-    Simulates 'Adobe Podcast' style enhancement.
+    Cleans up audio with the upload preset of the enhancement engine
+    (see core.audio_enhancer, default: highpass, lowpass, two-pass loudnorm).
+    With start_sec/end_sec only that part of the input is cut and encoded.
     """
-    try:
-        (
-            ffmpeg
-            .input(input_path)
-            .filter('highpass', f='200')
-            .filter('lowpass', f='3000')
-            .filter('loudnorm', I=-16, TP=-1.5, LRA=11)
-            .output(output_path, acodec='mp3', audio_bitrate='128k')
-            .overwrite_output()
-            .run(quiet=True)
-        )
-        return output_path
-    except ffmpeg.Error as e:
-        print(f"Error cleaning audio: {e}")
-        return input_path
+    return enhance(input_path, output_path, UPLOAD_PRESET, start_sec, end_sec)
 
-def split_audio(file_path: str, min_len=45000, max_len=90000, silence_thresh=-40, silence_len=1200) -> List[Tuple[str, float, float]]:
+def detect_audio_format(head: bytes) -> Optional[str]:
     """
-    Splits audio into segments based on silence.
-    Returns list of (segment_path, start_sec, end_sec).
+    Probes the container format from the first bytes of a file.
+    Returns a short format name or None if it does not look like audio.
     """
-    audio = AudioSegment.from_file(file_path)
-    
-    # Detect non-silent chunks
-    # This is a simplified approach; for better control we might iterate manually
-    # But pydub's split_on_silence is good. However, we need to respect min/max len.
-    # So we'll use nonsilent ranges.
-    
-    # Alternative: Use silence.detect_nonsilent to get ranges, then merge/split them.
-    nonsilent_ranges = silence.detect_nonsilent(
-        audio,
+    if head.startswith(b"ID3"):
+        return "mp3"
+    if len(head) >= 2 and head[0] == 0xFF and (head[1] & 0xE0) == 0xE0:
+        # MPEG audio frame sync (mp3 without ID3 tag) or ADTS AAC
+        return "aac" if (head[1] & 0x06) == 0 else "mp3"
+    if head.startswith(b"RIFF") and head[8:12] == b"WAVE":
+        return "wav"
+    if head.startswith(b"OggS"):
+        return "ogg"
+    if head.startswith(b"fLaC"):
+        return "flac"
+    if head[4:8] == b"ftyp":
+        return "m4a"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"
+    if head.startswith(b"FORM") and head[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    return None
+
+def _partition(ranges: List[Tuple[int, int]], min_len: int, max_len: int) -> List[Tuple[int, int]]:
+    """
+    Splits consecutive ranges into chunks of at most max_len, cutting only at pauses.
+    Minimizes the total shortfall below min_len first, then the number of chunks
+    (dynamic programming over the cut positions).
+    """
+    n = len(ranges)
+    best = [(0, 0)] + [None] * n   # best[i]: (shortfall, chunks) for ranges[:i]
+    cut = [0] * (n + 1)
+    for i in range(1, n + 1):
+        for j in range(i - 1, -1, -1):
+            span = ranges[i - 1][1] - ranges[j][0]
+            if span > max_len:
+                break
+            cost = (best[j][0] + max(0, min_len - span), best[j][1] + 1)
+            if best[i] is None or cost < best[i]:
+                best[i], cut[i] = cost, j
+    chunks = []
+    i = n
+    while i > 0:
+        j = cut[i]
+        chunks.append((ranges[j][0], ranges[i - 1][1]))
+        i = j
+    return chunks[::-1]
+
+def group_ranges(nonsilent_ranges: List[List[int]], duration_ms: int, min_len=45000, max_len=90000) -> List[Tuple[int, int]]:
+    """
+    Groups non-silent ranges (ms) into chunks of min_len..max_len, cut at pauses.
+    Short chunks are padded with the surrounding silence or re-split together with a
+    neighbour; only a recording shorter than min_len gives a shorter chunk.
+    Returns list of (start_ms, end_ms).
+    """
+    if duration_ms <= 0:
+        return []
+    # No speech detected: one continuous range
+    if not nonsilent_ranges:
+        nonsilent_ranges = [[0, duration_ms]]
+
+    # Ranges without any pause longer than max_len are cut hard, into equal pieces
+    ranges = []
+    for start, end in nonsilent_ranges:
+        pieces = -(-(end - start) // max_len)
+        bounds = [start + (end - start) * p // pieces for p in range(pieces + 1)]
+        ranges += list(zip(bounds, bounds[1:]))
+
+    chunks = _partition(ranges, min_len, max_len)
+
+    for k in range(len(chunks)):
+        start, end = chunks[k]
+        if end - start >= min_len:
+            continue
+        # Pad with the silence before/after (up to the neighbouring chunks)
+        lower = chunks[k - 1][1] if k > 0 else 0
+        upper = chunks[k + 1][0] if k + 1 < len(chunks) else duration_ms
+        missing = min_len - (end - start)
+        after = min(upper - end, (missing + 1) // 2)
+        before = min(start - lower, missing - after)
+        after = min(upper - end, missing - before)
+        chunks[k] = (start - before, end + after)
+
+    # Still short: not enough silence around it. Joined with the closer neighbour if
+    # that fits in max_len, otherwise the two are split again in the middle (each
+    # half is then more than max_len / 2)
+    k = 0
+    while k < len(chunks):
+        start, end = chunks[k]
+        if end - start >= min_len or len(chunks) == 1:
+            k += 1
+            continue
+        neighbours = [n for n in (k - 1, k + 1) if 0 <= n < len(chunks)]
+        n = min(neighbours, key=lambda n: max(chunks[n][1], end) - min(chunks[n][0], start))
+        merged_start, merged_end = min(chunks[n][0], start), max(chunks[n][1], end)
+        first, second = sorted((k, n))
+        if merged_end - merged_start <= max_len:
+            chunks[first:second + 1] = [(merged_start, merged_end)]
+            k = first
+        elif merged_end - merged_start <= 2 * max_len:
+            middle = (merged_start + merged_end) // 2
+            chunks[first], chunks[second] = (merged_start, middle), (middle, merged_end)
+            k += 1
+        else:
+            k += 1
+    return chunks
+
+def find_segments(pcm_path: str, min_len=45000, max_len=90000, silence_thresh=-40, silence_len=1200) -> List[Tuple[float, float]]:
+    """
+    Finds 45-90 s clip boundaries in an already decoded PCM buffer (see core.pcm).
+    Returns list of (start_sec, end_sec).
+    """
+    samples = load_pcm(pcm_path)
+
+    # Vectorized silence detection, streamed over the memory-mapped buffer in 60 s chunks
+    chunk_len = 60 * SAMPLE_RATE
+    nonsilent_ranges = detect_nonsilent_chunks(
+        (samples[i:i + chunk_len] for i in range(0, len(samples), chunk_len)),
+        SAMPLE_RATE,
         min_silence_len=silence_len,
         silence_thresh=silence_thresh
     )
-    
-    segments = []
-    current_start = 0
-    
-    # If no silence found, just chunk it
-    if not nonsilent_ranges:
-        duration_ms = len(audio)
-        for i in range(0, duration_ms, max_len):
-            end = min(i + max_len, duration_ms)
-            seg_path = f"{file_path}_seg_{len(segments)}.mp3"
-            audio[i:end].export(seg_path, format="mp3")
-            segments.append((seg_path, i/1000.0, end/1000.0))
-        return segments
+    duration_ms = round(1000 * len(samples) / SAMPLE_RATE)
+    chunks = group_ranges(nonsilent_ranges, duration_ms, min_len, max_len)
+    return [(start / 1000.0, end / 1000.0) for start, end in chunks]
 
-    # Logic to group ranges into chunks between min_len and max_len
-    # This is a heuristic implementation
-    
-    current_chunk_start = nonsilent_ranges[0][0]
-    current_chunk_end = nonsilent_ranges[0][1]
-    
-    final_segments = []
+def split_audio(file_path: str, min_len=45000, max_len=90000, silence_thresh=-40, silence_len=1200) -> List[Tuple[str, float, float]]:
+    """
+    Splits audio into segments based on silence.
+    Returns list of (segment_path, start_sec, end_sec).
+    """
+    pcm = decode_to_pcm(file_path, f"{file_path}.f32")
+    try:
+        ranges = find_segments(pcm["path"], min_len, max_len, silence_thresh, silence_len)
+    finally:
+        remove_pcm(pcm["path"])
     
-    for start, end in nonsilent_ranges[1:]:
-        # Check if adding this range exceeds max_len
-        if (end - current_chunk_start) > max_len:
-            # Current chunk is full, save it
-            # But check if it's too short? If so, we might have to force it or just accept it.
-            # Ideally we want > min_len.
-            
-            # Save current chunk
-            seg_path = f"{file_path}_seg_{len(final_segments)}.mp3"
-            audio[current_chunk_start:current_chunk_end].export(seg_path, format="mp3")
-            final_segments.append((seg_path, current_chunk_start/1000.0, current_chunk_end/1000.0))
-            
-            # Start new chunk
-            current_chunk_start = start
-            current_chunk_end = end
-        else:
-            # Extend current chunk
-            current_chunk_end = end
-            
-    # Save last chunk
-    seg_path = f"{file_path}_seg_{len(final_segments)}.mp3"
-    audio[current_chunk_start:current_chunk_end].export(seg_path, format="mp3")
-    final_segments.append((seg_path, current_chunk_start/1000.0, current_chunk_end/1000.0))
+    # All segments are cut in one ffmpeg pass (stream copy for MP3 sources)
+    seg_paths = [f"{file_path}_seg_{i}.mp3" for i in range(len(ranges))]
+    cut_clips(file_path, ranges, seg_paths, copy=file_path.lower().endswith(".mp3"))
     
-    return final_segments
+    return [(seg_path, start, end) for seg_path, (start, end) in zip(seg_paths, ranges)]
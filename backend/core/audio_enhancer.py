@@ -1,42 +1,236 @@
-import subprocess
 import os
+import json
+import time
+import shutil
+import hashlib
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
 
-def enhance_audio(input_path: str, output_path: str = None):
+# One enhancement engine for all audio processing (upload cleanup, manual
+# re-mastering, batch runs). Loudness normalization is two-pass: the first pass
+# measures the file (EBU R128), the second applies linear normalization with the
+# measured values. Measurements are cached per file + preset + range.
+LOUDNORM_CACHE_DIR = os.getenv("LOUDNORM_CACHE_DIR", "uploads/cache/loudnorm")
+# Pre-enhance copy of every clip touched by a batch run. Batch presets are always
+# rendered from this copy, so running presets one after another never stacks filters
+ORIGINALS_DIR = "uploads/cache/originals"
+# Preset used for clips at upload time
+UPLOAD_PRESET = os.getenv("UPLOAD_ENHANCE_PRESET", "cleanup")
+# Processes for batch runs (enhance_library.py), 0 = one per CPU core
+ENHANCE_WORKERS = int(os.getenv("ENHANCE_WORKERS", "0")) or os.cpu_count() or 2
+
+LOUDNESS_TARGET = {"I": -16, "TP": -1.5, "LRA": 11}
+
+PRESETS = {
+    # Upload ingest: speech band only (was core.audio.cleanup_audio)
+    "cleanup": {
+        "filters": "highpass=f=200,lowpass=f=3000",
+        "codec": ["-c:a", "libmp3lame", "-b:a", "128k"],
+    },
+    # 'Podcast' sound: rumble filter, soft-knee compression, presence boost
+    "podcast": {
+        "filters": (
+            "highpass=f=80,"
+            "compand=attacks=0:points=-80/-900|-45/-15|-27/-9|0/-7|20/-7:gain=5,"
+            "equalizer=f=3000:t=q:w=1:g=2"
+        ),
+        "codec": ["-c:a", "libmp3lame", "-q:a", "2"],
+    },
+    # Only loudness, no coloring
+    "loudness": {
+        "filters": "",
+        "codec": ["-c:a", "libmp3lame", "-q:a", "2"],
+    },
+}
+
+def _range_args(start_sec: float = None, end_sec: float = None) -> List[str]:
+    args = []
+    if start_sec is not None:
+        args += ['-ss', str(start_sec)]
+    if end_sec is not None:
+        args += ['-t', str(end_sec - (start_sec or 0))]
+    return args
+
+def _filter_chain(preset: Dict, loudnorm: str) -> str:
+    return ",".join(f for f in (preset["filters"], loudnorm) if f)
+
+def _stats_path(input_path: str, preset_name: str, start_sec, end_sec) -> str:
+    stat = os.stat(input_path)
+    key = json.dumps([os.path.abspath(input_path), stat.st_size, stat.st_mtime_ns,
+                      preset_name, PRESETS[preset_name]["filters"], LOUDNESS_TARGET, start_sec, end_sec])
+    return os.path.join(LOUDNORM_CACHE_DIR, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+def measure_loudness(input_path: str, preset_name: str = "podcast",
+                     start_sec: float = None, end_sec: float = None) -> Optional[Dict]:
     """
-    Applies 'podcast-style' enhancement to audio using ffmpeg:
-    1. Highpass filter (remove rumble)
-    2. Compression (even out dynamic range)
-    3. EQ (presence boost)
-    4. Normalization (standard loudness)
+    First loudnorm pass (after the preset's filters). Cached per file, preset and range.
+    Returns None if the file cannot be measured (e.g. digital silence).
     """
-    if not output_path:
-        base, ext = os.path.splitext(input_path)
-        output_path = f"{base}_enhanced{ext}"
-
-    # Filter chain explanation:
-    # highpass=f=80: Remove low frequency rumble
-    # compand: Soft knee compression to even out voice levels
-    # equalizer: Slight boost at 3kHz for clarity (presence)
-    # loudnorm: EBU R128 loudness normalization
-    
-    filter_chain = (
-        "highpass=f=80,"
-        "compand=attacks=0:points=-80/-900|-45/-15|-27/-9|0/-7|20/-7:gain=5,"
-        "equalizer=f=3000:t=q:w=1:g=2,"
-        "loudnorm=I=-16:TP=-1.5:LRA=11"
-    )
+    cache_path = _stats_path(input_path, preset_name, start_sec, end_sec)
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            return json.load(f)
 
+    loudnorm = "loudnorm=I={I}:TP={TP}:LRA={LRA}:print_format=json".format(**LOUDNESS_TARGET)
     cmd = [
-        'ffmpeg', '-i', input_path,
-        '-af', filter_chain,
-        '-c:a', 'libmp3lame', '-q:a', '2',  # High quality MP3
-        '-y',  # Overwrite
-        output_path
+        'ffmpeg', '-nostdin', '-hide_banner', '-threads', '1',
+        *_range_args(start_sec, end_sec), '-i', input_path,
+        '-af', _filter_chain(PRESETS[preset_name], loudnorm),
+        '-f', 'null', '-'
     ]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Loudness measurement failed: {result.stderr.decode(errors='ignore')[-500:]}")
 
+    # loudnorm prints its JSON block at the very end of stderr
+    stderr = result.stderr.decode(errors="ignore")
     try:
+        stats = json.loads(stderr[stderr.rindex("{"):stderr.rindex("}") + 1])
+    except ValueError:
+        return None
+    if any(stats.get(k) in (None, "-inf", "inf") for k in ("input_i", "input_tp", "input_lra", "input_thresh")):
+        return None
+
+    os.makedirs(LOUDNORM_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stats, f)
+    os.replace(tmp_path, cache_path)
+    return stats
+
+def enhance(input_path: str, output_path: str = None, preset: str = "podcast",
+            start_sec: float = None, end_sec: float = None) -> str:
+    """
+    Applies a preset plus two-pass loudness normalization and encodes to MP3.
+    With start_sec/end_sec only that part of the input is processed.
+    Returns the output path (the input path if enhancement failed).
+    """
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown preset '{preset}', available: {', '.join(PRESETS)}")
+    if not output_path:
+        base, ext = os.path.splitext(input_path)
+        output_path = f"{base}_enhanced{ext}"
+
+    try:
+        stats = measure_loudness(input_path, preset, start_sec, end_sec)
+        if stats:
+            loudnorm = (
+                "loudnorm=I={I}:TP={TP}:LRA={LRA}".format(**LOUDNESS_TARGET) +
+                f":measured_I={stats['input_i']}:measured_TP={stats['input_tp']}"
+                f":measured_LRA={stats['input_lra']}:measured_thresh={stats['input_thresh']}"
+                f":offset={stats['target_offset']}:linear=true"
+            )
+        else:
+            # Not measurable: single-pass (dynamic) normalization
+            loudnorm = "loudnorm=I={I}:TP={TP}:LRA={LRA}".format(**LOUDNESS_TARGET)
+
+        cmd = [
+            'ffmpeg', '-nostdin', '-v', 'error', '-threads', '1',
+            *_range_args(start_sec, end_sec), '-i', input_path,
+            '-af', _filter_chain(PRESETS[preset], loudnorm),
+            # loudnorm resamples to 192 kHz internally
+            '-ar', '44100',
+            *PRESETS[preset]["codec"],
+            '-y', output_path
+        ]
         subprocess.run(cmd, check=True, capture_output=True)
         return output_path
-    except subprocess.CalledProcessError as e:
-        print(f"Error enhancing audio: {e.stderr.decode()}")
-        return input_path  # Return original if enhancement fails
+    except (subprocess.CalledProcessError, RuntimeError) as e:
+        detail = e.stderr.decode(errors="ignore") if isinstance(e, subprocess.CalledProcessError) else str(e)
+        print(f"Error enhancing audio ({preset}): {detail}")
+        return input_path
+
+def enhance_audio(input_path: str, output_path: str = None):
+    """
+    Applies 'podcast-style' enhancement (compression, EQ, two-pass loudnorm).
+    """
+    return enhance(input_path, output_path, preset="podcast")
+
+def original_path(clip_path: str) -> str:
+    return os.path.join(ORIGINALS_DIR, os.path.basename(clip_path))
+
+def _keep_original(path: str) -> str:
+    """
+    Copies a clip to ORIGINALS_DIR the first time it is batch-enhanced. Returns the copy.
+    """
+    source = original_path(path)
+    if not os.path.exists(source):
+        os.makedirs(ORIGINALS_DIR, exist_ok=True)
+        tmp_path = f"{source}.{os.getpid()}.tmp"
+        shutil.copy2(path, tmp_path)
+        os.replace(tmp_path, source)
+    return source
+
+def _enhance_in_place(path: str, preset: str) -> Dict:
+    """
+    Batch worker: renders the preset from the kept original into a temp file
+    and replaces the clip with it.
+    """
+    started = time.perf_counter()
+    base, ext = os.path.splitext(path)
+    tmp_path = f"{base}.enhancing{ext}"
+    source = _keep_original(path)
+    result = enhance(source, tmp_path, preset)
+    if result != tmp_path:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return {"path": path, "ok": False}
+    os.replace(tmp_path, path)
+    stat = os.stat(path)
+    return {"path": path, "ok": True, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "seconds": round(time.perf_counter() - started, 2)}
+
+def enhance_batch(paths: List[str], preset: str = "podcast", workers: int = ENHANCE_WORKERS,
+                  state_path: str = None) -> Dict:
+    """
+    Re-enhances many files in place on a process pool, with progress output.
+    Every file is rendered from its pre-enhance original (ORIGINALS_DIR), not from
+    the current, possibly already enhanced, file.
+    Resume: finished files are recorded in state_path and skipped on the next run
+    unless they changed since (size/mtime).
+    Returns the counts plus "enhanced": all paths that now carry the preset.
+    """
+    state_path = state_path or os.path.join(os.path.dirname(LOUDNORM_CACHE_DIR), f"enhance_{preset}.json")
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+
+    def unchanged(path):
+        done = state.get(os.path.abspath(path))
+        if not done:
+            return False
+        stat = os.stat(path)
+        return done["size"] == stat.st_size and done["mtime_ns"] == stat.st_mtime_ns
+
+    todo = [p for p in paths if os.path.exists(p) and not unchanged(p)]
+    print(f"Enhancing {len(todo)} files with preset '{preset}' on {workers} processes "
+          f"({len(paths) - len(todo)} already done)")
+
+    summary = {"done": 0, "failed": 0, "skipped": len(paths) - len(todo),
+               "enhanced": [p for p in paths if os.path.exists(p) and p not in todo]}
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_enhance_in_place, p, preset) for p in todo]
+        for i, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            if result["ok"]:
+                summary["done"] += 1
+                summary["enhanced"].append(result["path"])
+                state[os.path.abspath(result["path"])] = {"size": result["size"], "mtime_ns": result["mtime_ns"]}
+                # Saved after every file, an interrupted run continues where it stopped
+                tmp_path = f"{state_path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, state_path)
+            else:
+                summary["failed"] += 1
+            elapsed = time.perf_counter() - started
+            eta = elapsed / i * (len(todo) - i)
+            print(f"[{i}/{len(todo)}] {'OK ' if result['ok'] else 'ERR'} {os.path.basename(result['path'])} "
+                  f"({elapsed:.0f}s elapsed, ~{eta:.0f}s left)")
+
+    summary["seconds"] = round(time.perf_counter() - started, 1)
+    return summary
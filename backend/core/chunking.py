@@ -0,0 +1,111 @@
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Chunked transcription of long audio: the audio is cut into overlapping windows that
+# are transcribed in parallel, then segments and word timestamps are shifted back to
+# absolute times and stitched. In each overlap the cut is at its midpoint: words before
+# it come from the earlier window, words after it from the later one (no duplicates,
+# and neither side has to use the unreliable words at its window edge).
+# Without word timestamps (the ingest profiles skip the alignment pass) whole segments
+# are assigned by start time: the earlier window keeps segments starting before the cut,
+# the later one only segments that are mostly after what the earlier window kept.
+
+def plan_windows(duration_sec: float, chunk_sec: float, overlap_sec: float) -> List[Tuple[float, float]]:
+    """
+    (start, end) windows covering [0, duration_sec], overlapping by overlap_sec.
+    All windows are chunk_sec long except the last one, which absorbs the tail and can
+    be up to chunk_sec + max(overlap_sec, chunk_sec / 4) long (no tiny tail window).
+    """
+    if duration_sec <= chunk_sec:
+        return [(0.0, duration_sec)]
+    overlap_sec = min(overlap_sec, chunk_sec / 2)
+    step = chunk_sec - overlap_sec
+    windows = []
+    start = 0.0
+    while True:
+        end = start + chunk_sec
+        if end >= duration_sec - max(overlap_sec, chunk_sec / 4):
+            # Last window runs to the end (no tiny tail window)
+            windows.append((start, duration_sec))
+            return windows
+        windows.append((start, end))
+        start += step
+
+def _shift(segment: Dict, offset: float) -> Dict:
+    segment = dict(segment)
+    segment["start"] += offset
+    segment["end"] += offset
+    if segment.get("words"):
+        segment["words"] = [
+            {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+            for word in segment["words"]
+        ]
+    return segment
+
+def _midpoint(item: Dict) -> float:
+    return (item["start"] + item["end"]) / 2
+
+def _trim(segment: Dict, keep_from: float, keep_until: float, previous_end: float) -> Dict:
+    """
+    Keeps the part of a segment whose words lie in [keep_from, keep_until).
+    A segment without words is kept whole if it starts before keep_until and is
+    mostly after previous_end (end of what the earlier window kept).
+    Returns None if nothing is left.
+    """
+    words = segment.get("words")
+    if not words:
+        return segment if segment["start"] < keep_until and _midpoint(segment) >= previous_end else None
+    kept = [word for word in words if keep_from <= _midpoint(word) < keep_until]
+    if not kept:
+        return None
+    if len(kept) == len(words):
+        return segment
+    segment = dict(segment)
+    segment["words"] = kept
+    segment["start"] = kept[0]["start"]
+    segment["end"] = kept[-1]["end"]
+    segment["text"] = "".join(word["word"] for word in kept)
+    return segment
+
+def _skipped_sec(result: Dict, window: Tuple[float, float], keep_from: float, keep_until: float) -> float:
+    """
+    Seconds of silence VAD removed inside [keep_from, keep_until) of one window, so
+    the overlaps are not counted twice. Results without skipped ranges (older cache
+    entries) are counted in proportion to the part of the window that is kept.
+    """
+    start, end = window
+    ranges = result.get("vad_skipped")
+    if ranges is None:
+        kept = min(keep_until, end) - max(keep_from, start)
+        return result.get("vad_skipped_sec", 0) * max(kept, 0.0) / (end - start) if end > start else 0.0
+    return sum(max(min(range_end + start, keep_until) - max(range_start + start, keep_from), 0.0)
+               for range_start, range_end in ranges)
+
+def stitch(results: List[Dict], windows: List[Tuple[float, float]]) -> Dict:
+    """
+    Merges per-window Whisper results (times relative to their window) into one
+    result with times relative to the first window's start.
+    """
+    segments = []
+    skipped = 0.0
+    for i, (result, (start, end)) in enumerate(zip(results, windows)):
+        # Cut points: midpoints of the overlaps with the neighbouring windows
+        keep_from = (start + windows[i - 1][1]) / 2 if i > 0 else float("-inf")
+        keep_until = (windows[i + 1][0] + end) / 2 if i + 1 < len(windows) else float("inf")
+        previous_end = segments[-1]["end"] if segments else float("-inf")
+        for segment in result.get("segments", []):
+            trimmed = _trim(_shift(segment, start), keep_from, keep_until, previous_end)
+            if trimmed:
+                segments.append(trimmed)
+        skipped += _skipped_sec(result, (start, end), keep_from, keep_until)
+
+    for i, segment in enumerate(segments):
+        segment["id"] = i
+
+    languages = Counter(result.get("language") for result in results if result.get("language"))
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "language": languages.most_common(1)[0][0] if languages else None,
+        "segments": segments,
+        "vad_skipped_sec": round(skipped, 2)
+    }
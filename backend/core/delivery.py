@@ -0,0 +1,161 @@
+import os
+import json
+import hashlib
+import subprocess
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Compact playback variants of every clip plus content hashes for ETags and
+# versioned (content-addressed) clip URLs. Variants are mono speech encodings,
+# a fraction of the 128 kbps MP3, for mobile playback.
+VARIANTS_DIR = "uploads/cache/variants"
+# Variants transcoded at ingest (empty = only the MP3 is served)
+CLIP_VARIANTS = [v.strip() for v in os.getenv("CLIP_VARIANTS", "opus,aac").split(",") if v.strip()]
+CLIP_OPUS_BITRATE = os.getenv("CLIP_OPUS_BITRATE", "32k")
+CLIP_AAC_BITRATE = os.getenv("CLIP_AAC_BITRATE", "64k")
+
+FORMATS = {
+    "mp3": {"media_type": "audio/mpeg", "accept": ("audio/mpeg", "audio/mp3")},
+    "opus": {
+        "ext": ".opus", "media_type": "audio/ogg; codecs=opus", "accept": ("audio/ogg", "audio/opus"),
+        "args": ['-c:a', 'libopus', '-b:a', CLIP_OPUS_BITRATE, '-application', 'voip', '-f', 'ogg'],
+    },
+    "aac": {
+        "ext": ".m4a", "media_type": "audio/mp4", "accept": ("audio/mp4", "audio/aac", "audio/m4a", "audio/x-m4a"),
+        # faststart: moov atom first, playback starts before the whole file is loaded
+        "args": ['-c:a', 'aac', '-b:a', CLIP_AAC_BITRATE, '-movflags', '+faststart', '-f', 'mp4'],
+    },
+}
+# Tie-break between equally acceptable formats: smallest first
+PREFERENCE = ["opus", "aac", "mp3"]
+
+_versions = OrderedDict()
+MAX_CACHED_VERSIONS = 4096
+
+def variant_path(clip_path: str, fmt: str) -> str:
+    if fmt == "mp3":
+        return clip_path
+    return os.path.join(VARIANTS_DIR, os.path.basename(clip_path) + FORMATS[fmt]["ext"])
+
+def is_fresh(clip_path: str, fmt: str) -> bool:
+    path = variant_path(clip_path, fmt)
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(clip_path)
+
+def transcode_variants(clip_path: str, formats: List[str] = None) -> List[str]:
+    """
+    Encodes all missing/outdated variants of a clip in one ffmpeg run.
+    Returns the paths of the (re)encoded variants.
+    """
+    formats = [f for f in (formats if formats is not None else CLIP_VARIANTS)
+               if f in FORMATS and f != "mp3" and not is_fresh(clip_path, f)]
+    if not formats:
+        return []
+
+    os.makedirs(VARIANTS_DIR, exist_ok=True)
+    outputs = [(variant_path(clip_path, f), f"{variant_path(clip_path, f)}.{os.getpid()}.tmp") for f in formats]
+    cmd = ['ffmpeg', '-nostdin', '-v', 'error', '-threads', '1', '-i', clip_path]
+    for fmt, (_, tmp_path) in zip(formats, outputs):
+        cmd += ['-map', '0:a', '-ac', '1', *FORMATS[fmt]["args"], '-y', tmp_path]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        for _, tmp_path in outputs:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise RuntimeError(f"Failed to transcode variants: {e.stderr.decode(errors='ignore')}")
+    for path, tmp_path in outputs:
+        os.replace(tmp_path, path)
+    return [path for path, _ in outputs]
+
+def _manifest_path(path: str) -> str:
+    return os.path.join(VARIANTS_DIR, os.path.basename(path) + ".json")
+
+def derived_paths(clip_path: str) -> List[str]:
+    """
+    Variant and version files that belong to a clip (for cleanup).
+    """
+    paths = [_manifest_path(clip_path)]
+    for fmt in FORMATS:
+        if fmt != "mp3":
+            paths += [variant_path(clip_path, fmt), _manifest_path(variant_path(clip_path, fmt))]
+    return paths
+
+def content_version(path: str, compute: bool = True) -> Optional[str]:
+    """
+    Content hash (hex prefix) of a served file, used as ETag and URL version.
+    Cached in memory and in a small sidecar file, both keyed by size + mtime.
+    With compute=False returns None instead of hashing an unknown file.
+    """
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns)
+    cached = _versions.get(path)
+    if cached and cached[0] == key:
+        _versions.move_to_end(path)
+        return cached[1]
+
+    version = None
+    manifest_path = _manifest_path(path)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if (manifest["size"], manifest["mtime_ns"]) == key:
+            version = manifest["version"]
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    if version is None:
+        if not compute:
+            return None
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        version = digest.hexdigest()[:24]
+        os.makedirs(VARIANTS_DIR, exist_ok=True)
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "version": version}, f)
+        os.replace(tmp_path, manifest_path)
+
+    _versions[path] = (key, version)
+    if len(_versions) > MAX_CACHED_VERSIONS:
+        _versions.popitem(last=False)
+    return version
+
+def prepare_clip(clip_path: str) -> Dict:
+    """
+    Ingest step: playback variants + content version of a finished clip.
+    """
+    transcode_variants(clip_path)
+    return {"version": content_version(clip_path)}
+
+def negotiate(accept: str, requested: str = None) -> str:
+    """
+    Picks the format to serve: an explicit ?format= wins, otherwise the Accept header.
+    Wildcards (*/*, audio/*) get the original MP3, compact variants only when the
+    client names their media type.
+    """
+    if requested in FORMATS:
+        return requested
+
+    scores = {}
+    for part in (accept or "").split(","):
+        fields = [f.strip() for f in part.split(";")]
+        media_type = fields[0].lower()
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        for fmt in FORMATS:
+            if fmt != "mp3" and fmt not in CLIP_VARIANTS:
+                continue
+            if media_type in FORMATS[fmt]["accept"] or (fmt == "mp3" and media_type in ("*/*", "audio/*")):
+                scores[fmt] = max(scores.get(fmt, 0.0), q)
+
+    candidates = [fmt for fmt, q in scores.items() if q > 0]
+    if not candidates:
+        return "mp3"
+    return max(candidates, key=lambda fmt: (scores[fmt], -PREFERENCE.index(fmt)))
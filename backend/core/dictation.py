@@ -0,0 +1,133 @@
+import os
+import asyncio
+import numpy as np
+from typing import Dict, Optional
+from core.pcm import SAMPLE_RATE
+from core.workers import run_cpu, transcribe_samples, SchedulerBusy
+
+# Live dictation: audio chunks arrive over a WebSocket while the user speaks,
+# ffmpeg decodes them in memory (stdin -> stdout pipes, no temp files) and the
+# growing buffer is re-transcribed every PARTIAL_INTERVAL_SEC for partial results.
+PARTIAL_INTERVAL_SEC = float(os.getenv("DICTATION_PARTIAL_INTERVAL_SEC", "0.7"))
+DICTATION_MAX_SEC = int(os.getenv("DICTATION_MAX_SEC", "300"))
+# Only the audio after the last committed segment is re-transcribed; once it is
+# longer than this, all but its last segment are committed
+WINDOW_SEC = 20
+MIN_NEW_AUDIO_SEC = 0.3
+
+class DictationStream:
+    """
+    In-memory decoder + rolling transcription for one dictation.
+    encoding: "webm" (anything ffmpeg understands, e.g. MediaRecorder chunks)
+    or "pcm16" (raw 16 kHz mono signed 16-bit little endian, no ffmpeg needed).
+    """
+    def __init__(self, encoding: str = "webm"):
+        self.encoding = encoding
+        self.proc = None
+        self.reader = None
+        self.chunks = []
+        self.num_samples = 0
+        self.remainder = b""
+        self.committed_text = ""
+        self.committed_samples = 0
+        self.transcribed_samples = 0
+
+    async def start(self):
+        if self.encoding == "pcm16":
+            return
+        self.proc = await asyncio.create_subprocess_exec(
+            'ffmpeg', '-v', 'error',
+            # Start decoding right away instead of probing megabytes of input first
+            '-fflags', 'nobuffer', '-probesize', '4096', '-analyzeduration', '0',
+            '-i', 'pipe:0',
+            '-f', 'f32le', '-ac', '1', '-ar', str(SAMPLE_RATE), 'pipe:1',
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        self.reader = asyncio.create_task(self._read_decoded())
+
+    def _append(self, samples: np.ndarray):
+        self.chunks.append(samples)
+        self.num_samples += len(samples)
+
+    async def _read_decoded(self):
+        while True:
+            data = await self.proc.stdout.read(64 * 1024)
+            if not data:
+                break
+            data = self.remainder + data
+            usable = len(data) - len(data) % 4
+            self.remainder = data[usable:]
+            self._append(np.frombuffer(data[:usable], dtype=np.float32))
+
+    async def feed(self, data: bytes):
+        if self.proc is None:
+            data = self.remainder + data
+            usable = len(data) - len(data) % 2
+            self.remainder = data[usable:]
+            self._append(np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0)
+            return
+        self.proc.stdin.write(data)
+        await self.proc.stdin.drain()
+
+    async def close(self):
+        """
+        End of input: lets ffmpeg flush the rest of the audio.
+        """
+        if self.proc is None:
+            return
+        if not self.proc.stdin.is_closing():
+            self.proc.stdin.close()
+        await self.reader
+        await self.proc.wait()
+
+    def abort(self):
+        if self.proc and self.proc.returncode is None:
+            self.proc.kill()
+        if self.reader:
+            self.reader.cancel()
+
+    @property
+    def duration_sec(self) -> float:
+        return self.num_samples / SAMPLE_RATE
+
+    def _tail(self) -> np.ndarray:
+        if len(self.chunks) > 1:
+            self.chunks = [np.concatenate(self.chunks)]
+        return self.chunks[0][self.committed_samples:] if self.chunks else np.zeros(0, dtype=np.float32)
+
+    def has_new_audio(self) -> bool:
+        return self.num_samples - self.transcribed_samples >= MIN_NEW_AUDIO_SEC * SAMPLE_RATE
+
+    async def partial(self) -> Optional[Dict]:
+        """
+        Transcribes the uncommitted tail (interactive lane, no transcript cache).
+        Returns None if the worker pool is saturated.
+        """
+        self.transcribed_samples = self.num_samples
+        tail = self._tail()
+        if not len(tail):
+            return None
+        try:
+            result = await run_cpu(transcribe_samples, tail, "dictation", False, lane="interactive")
+        except SchedulerBusy:
+            return None
+
+        segments = result.get("segments", [])
+        if len(tail) > WINDOW_SEC * SAMPLE_RATE and len(segments) > 1:
+            # Commit everything before the last segment; it will not change anymore
+            self.committed_text += "".join(s["text"] for s in segments[:-1])
+            self.committed_samples += int(segments[-1]["start"] * SAMPLE_RATE)
+            return {"text": (self.committed_text + segments[-1]["text"]).strip(), "language": result.get("language")}
+        return {"text": (self.committed_text + result["text"]).strip(), "language": result.get("language")}
+
+    async def final(self) -> Dict:
+        tail = self._tail()
+        text = self.committed_text
+        language = None
+        if len(tail):
+            result = await run_cpu(transcribe_samples, tail, "dictation", True, lane="interactive")
+            text += result["text"]
+            language = result.get("language")
+        return {"text": text.strip(), "language": language, "duration_sec": round(self.duration_sec, 2)}
@@ -1,11 +1,12 @@
-import requests
 import os
 import json
+from core.analysis import call_grok, parse_json_response
 
 GROK_API_KEY = os.getenv("GROK_API_KEY")
-GROK_API_URL = "https://api.x.ai/v1/chat/completions" # Verify correct endpoint
+GROK_MODEL = "grok-4-1-fast-reasoning"
+SYSTEM_PROMPT = "You are a helpful assistant that outputs JSON."
 
-def analyze_text(text: str):
+async def analyze_text(text: str):
     if not GROK_API_KEY:
         print("GROK_API_KEY not set, skipping analysis")
         return {
@@ -31,38 +32,21 @@ Antworte genau so (kein zusätzlicher Text!):
 }}
 """
 
-    headers = {
-        "Authorization": f"Bearer {GROK_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant that outputs JSON."},
-            {"role": "user", "content": prompt}
-        ],
-        "model": "grok-4-1-fast-reasoning",
-        "stream": False,
-        "temperature": 0.5
-    }
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
     
     try:
-        response = requests.post(GROK_API_URL, headers=headers, json=data)
-        response.raise_for_status()
-        result = response.json()
-        content = result['choices'][0]['message']['content']
+        content = await call_grok(messages, model=GROK_MODEL, temperature=0.5, cache=True,
+                                  validate=parse_json_response)
         # Parse JSON from content (handle potential markdown code blocks)
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0]
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0]
-            
-        return json.loads(content.strip())
+        return parse_json_response(content)
     except Exception as e:
         print(f"Error calling Grok API: {e}")
         return {}
 
-def generate_content_suggestion(existing_topics: list):
+async def generate_content_suggestion(existing_topics: list):
     if not GROK_API_KEY:
         return {"topic": "Kein API Key", "script": "Bitte API Key setzen."}
 
@@ -90,26 +74,13 @@ def generate_content_suggestion(existing_topics: list):
     ]
     """
     
-    headers = {
-        "Authorization": f"Bearer {GROK_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant that outputs JSON."},
-            {"role": "user", "content": prompt}
-        ],
-        "model": "grok-4-1-fast-reasoning",
-        "stream": False,
-        "temperature": 0.7
-    }
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
     
     try:
-        response = requests.post(GROK_API_URL, headers=headers, json=data)
-        response.raise_for_status()
-        result = response.json()
-        content = result['choices'][0]['message']['content']
+        content = await call_grok(messages, model=GROK_MODEL, temperature=0.7)
         
         if "```json" in content:
             content = content.split("```json")[1].split("```")[0]
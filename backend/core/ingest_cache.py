@@ -0,0 +1,71 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, Optional
+from core.database import get_database
+
+# Content-addressed cache for the ingest pipeline.
+# Key: (content_hash of the uploaded file, stage) -> stage output
+# Stages: "clean" (cleaned audio path), "transcript", "analysis" (suffixed with
+# ":<segment_nr>" for long recordings), "segments" and "done" (ingest finished)
+
+_indexes_ready = False
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 of a file on disk (for uploads that arrived without a hash).
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+async def _collection():
+    global _indexes_ready
+    db = await get_database()
+    if not _indexes_ready:
+        await db.ingest_cache.create_index([("content_hash", 1), ("stage", 1)], unique=True)
+        await db.clips.create_index([("content_hash", 1), ("segment_nr", 1)])
+        _indexes_ready = True
+    return db.ingest_cache
+
+async def get_stage(content_hash: str, stage: str) -> Optional[Dict]:
+    if not content_hash:
+        return None
+    collection = await _collection()
+    doc = await collection.find_one({"content_hash": content_hash, "stage": stage})
+    return doc["value"] if doc else None
+
+async def put_stage(content_hash: str, stage: str, value: Dict):
+    if not content_hash:
+        return
+    collection = await _collection()
+    await collection.update_one(
+        {"content_hash": content_hash, "stage": stage},
+        {"$set": {"value": value, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+async def find_clip(content_hash: str) -> Optional[Dict]:
+    """
+    Returns a clip of a completed ingest with the same content, if any.
+    Partially processed uploads (crash mid-way) are not considered duplicates.
+    """
+    if not await get_stage(content_hash, "done"):
+        return None
+    db = await get_database()
+    return await db.clips.find_one({"content_hash": content_hash})
+
+def compact_transcript(transcription: Dict) -> Dict:
+    """
+    Keeps only what later stages need (MongoDB documents are capped at 16 MB).
+    """
+    return {
+        "text": transcription["text"],
+        "language": transcription.get("language"),
+        "vad_skipped_sec": transcription.get("vad_skipped_sec", 0),
+        "segments": [
+            {"start": s["start"], "end": s["end"], "text": s["text"]}
+            for s in transcription.get("segments", [])
+        ]
+    }
@@ -0,0 +1,168 @@
+import os
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict
+from pymongo import ReturnDocument
+from core.database import get_database
+from core.progress import progress_tracker, PROGRESS_TTL_HOURS, FINAL_STATUSES
+from core.workers import TRANSCRIBE_WORKERS
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# How many uploads are processed at the same time
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", str(TRANSCRIBE_WORKERS)))
+# Jobs that crashed more often than this are marked as error
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+# Admission control: uploads are rejected while this many jobs are waiting (0 = unlimited)
+MAX_QUEUED_UPLOADS = int(os.getenv("MAX_QUEUED_UPLOADS", "100"))
+POLL_INTERVAL = 5
+# A running job belongs to the worker holding its lease; the lease is renewed while the
+# job runs. Jobs whose lease ran out (worker crashed or was killed) are claimed again.
+JOB_LEASE_SEC = 120
+LEASE_RENEW_SEC = 30
+
+class IngestQueue:
+    """
+    Durable upload queue stored in MongoDB (collection `ingest_jobs`).
+    Jobs survive restarts: a running job whose lease has expired is re-queued,
+    jobs of other live workers are left alone.
+    """
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.handler = None
+        self.workers = []
+        self.wakeup = asyncio.Event()
+
+    async def start(self, handler):
+        self.handler = handler
+        db = await get_database()
+        await db.ingest_jobs.create_index("job_id", unique=True)
+        await db.ingest_jobs.create_index([("status", 1), ("created_at", 1)])
+        await db.ingest_jobs.create_index("updated_at")
+        # Finished jobs (and their progress) expire after PROGRESS_TTL_HOURS
+        await db.ingest_jobs.create_index("finished_at", expireAfterSeconds=PROGRESS_TTL_HOURS * 3600)
+
+        # Recover jobs interrupted by a restart (lease expired; missing = from before leases)
+        result = await db.ingest_jobs.update_many(
+            {"status": "running", "$or": [{"lease_until": {"$lt": datetime.utcnow()}}, {"lease_until": None}]},
+            {"$set": {"status": "queued", "owner": None, "updated_at": datetime.utcnow()}}
+        )
+        if result.modified_count:
+            logger.info(f"Re-queued {result.modified_count} interrupted ingest jobs")
+
+        self.workers = [asyncio.create_task(self._worker(i)) for i in range(INGEST_CONCURRENCY)]
+        logger.info(f"Ingest queue started with {INGEST_CONCURRENCY} workers")
+
+    async def stop(self):
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def enqueue(self, job_id: str, file_path: str, progress: Dict = None, **params):
+        """
+        progress: initial progress fields, written with the job so a worker
+        claiming it right away never gets overwritten by a late "Queued".
+        """
+        db = await get_database()
+        now = datetime.utcnow()
+        await db.ingest_jobs.insert_one({
+            "job_id": job_id,
+            "file_path": file_path,
+            "params": params,
+            "status": "queued",
+            "attempts": 0,
+            "progress": progress or {},
+            "progress_seq": 1,
+            "created_at": now,
+            "updated_at": now
+        })
+        self.wakeup.set()
+        progress_tracker.notify()
+
+    async def is_full(self) -> bool:
+        if not MAX_QUEUED_UPLOADS:
+            return False
+        db = await get_database()
+        return await db.ingest_jobs.count_documents({"status": "queued"}, limit=MAX_QUEUED_UPLOADS) >= MAX_QUEUED_UPLOADS
+
+    async def _claim(self):
+        db = await get_database()
+        now = datetime.utcnow()
+        job = await db.ingest_jobs.find_one_and_update(
+            # Queued jobs, or running ones whose worker died without a restart of this one
+            {"$or": [{"status": "queued"}, {"status": "running", "lease_until": {"$lt": now}}]},
+            {"$set": {"status": "running", "owner": self.owner, "lease_until": now + timedelta(seconds=JOB_LEASE_SEC),
+                      "updated_at": now},
+             "$inc": {"attempts": 1}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            progress_tracker.notify()
+        return job
+
+    async def _finish(self, job_id: str, status: str, error: str = None):
+        db = await get_database()
+        now = datetime.utcnow()
+        fields = {"status": status, "error": error, "lease_until": None, "updated_at": now}
+        if status in FINAL_STATUSES:
+            fields["finished_at"] = now
+        # Only the lease holder may finish the job
+        await db.ingest_jobs.update_one({"job_id": job_id, "owner": self.owner}, {"$set": fields})
+        progress_tracker.notify()
+
+    async def _renew_lease(self, job_id: str):
+        """
+        Keeps the lease of a running job alive until cancelled.
+        """
+        db = await get_database()
+        while True:
+            await asyncio.sleep(LEASE_RENEW_SEC)
+            try:
+                result = await db.ingest_jobs.update_one(
+                    {"job_id": job_id, "owner": self.owner, "status": "running"},
+                    {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SEC)}}
+                )
+                if not result.matched_count:
+                    logger.warning(f"Lost the lease of ingest job {job_id}")
+            except Exception as e:
+                logger.error(f"Lease renewal for ingest job {job_id} failed: {e}")
+
+    async def _worker(self, worker_nr: int):
+        while True:
+            try:
+                job = await self._claim()
+                if not job:
+                    self.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self.wakeup.wait(), timeout=POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                if job["attempts"] > INGEST_MAX_ATTEMPTS:
+                    logger.error(f"Ingest job {job['job_id']} failed {INGEST_MAX_ATTEMPTS} times, giving up")
+                    await self._finish(job["job_id"], "error", "Too many attempts")
+                    continue
+
+                logger.info(f"[ingest-{worker_nr}] Processing job {job['job_id']}")
+                renewal = asyncio.create_task(self._renew_lease(job["job_id"]))
+                try:
+                    await self.handler(job["file_path"], job["job_id"], **job.get("params", {}))
+                    await self._finish(job["job_id"], "done")
+                except Exception as e:
+                    logger.error(f"Ingest job {job['job_id']} failed: {e}", exc_info=True)
+                    await self._finish(job["job_id"], "error", str(e))
+                finally:
+                    renewal.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # e.g. MongoDB temporarily unavailable
+                logger.error(f"[ingest-{worker_nr}] Queue error: {e}", exc_info=True)
+                await asyncio.sleep(POLL_INTERVAL)
+
+ingest_queue = IngestQueue()
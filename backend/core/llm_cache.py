@@ -0,0 +1,128 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from core.database import db
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Two-tier cache for Grok responses: in-memory LRU + MongoDB (collection `llm_cache`)
+LLM_CACHE_MEMORY_ITEMS = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "512"))
+LLM_CACHE_TTL_DAYS = int(os.getenv("LLM_CACHE_TTL_DAYS", "90"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+# Size check runs every N stores, not on every write
+EVICT_CHECK_EVERY = 50
+
+def cache_key(model: str, params: Dict, messages: List[Dict]) -> str:
+    """
+    Hash of model, sampling parameters and the normalized prompt
+    (whitespace differences from prompt indentation do not matter).
+    """
+    normalized = [
+        {"role": m.get("role", "user"), "content": " ".join(m.get("content", "").split())}
+        for m in messages if m.get("content")
+    ]
+    payload = json.dumps({"model": model, "params": params, "messages": normalized}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    def __init__(self):
+        self.memory = OrderedDict()
+        self.counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self.indexes_ready = False
+        self.stores_since_check = 0
+
+    async def _collection(self):
+        # MongoDB tier is optional (scripts without a Motor connection use memory only)
+        if db.db is None:
+            return None
+        collection = db.db.llm_cache
+        if not self.indexes_ready:
+            await collection.create_index("key", unique=True)
+            await collection.create_index("created_at", expireAfterSeconds=LLM_CACHE_TTL_DAYS * 86400)
+            await collection.create_index("last_used")
+            self.indexes_ready = True
+        return collection
+
+    def _remember(self, key: str, response: str):
+        self.memory[key] = response
+        self.memory.move_to_end(key)
+        while len(self.memory) > LLM_CACHE_MEMORY_ITEMS:
+            self.memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.counters["memory_hits"] += 1
+            return self.memory[key]
+
+        try:
+            collection = await self._collection()
+            if collection is not None:
+                doc = await collection.find_one_and_update(
+                    {"key": key},
+                    {"$set": {"last_used": datetime.utcnow()}, "$inc": {"hits": 1}}
+                )
+                if doc:
+                    self.counters["db_hits"] += 1
+                    self._remember(key, doc["response"])
+                    return doc["response"]
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+
+        self.counters["misses"] += 1
+        return None
+
+    async def put(self, key: str, response: str, model: str):
+        self._remember(key, response)
+        self.counters["stores"] += 1
+
+        try:
+            collection = await self._collection()
+            if collection is None:
+                return
+            now = datetime.utcnow()
+            await collection.update_one(
+                {"key": key},
+                {"$set": {"response": response, "model": model, "created_at": now, "last_used": now},
+                 "$setOnInsert": {"hits": 0}},
+                upsert=True
+            )
+            self.stores_since_check += 1
+            if self.stores_since_check >= EVICT_CHECK_EVERY:
+                self.stores_since_check = 0
+                await self._evict(collection)
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+
+    async def _evict(self, collection):
+        """
+        Keeps the MongoDB tier below LLM_CACHE_MAX_ENTRIES (least recently used go first).
+        """
+        excess = await collection.estimated_document_count() - LLM_CACHE_MAX_ENTRIES
+        if excess <= 0:
+            return
+        cursor = collection.find({}, {"_id": 1}).sort("last_used", 1).limit(excess)
+        ids = [doc["_id"] async for doc in cursor]
+        result = await collection.delete_many({"_id": {"$in": ids}})
+        self.counters["evictions"] += result.deleted_count
+        logger.info(f"LLM cache evicted {result.deleted_count} entries")
+
+    async def stats(self) -> Dict:
+        lookups = self.counters["memory_hits"] + self.counters["db_hits"] + self.counters["misses"]
+        hits = self.counters["memory_hits"] + self.counters["db_hits"]
+        stats = {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0,
+            "memory_entries": len(self.memory),
+            "db_entries": None
+        }
+        collection = await self._collection()
+        if collection is not None:
+            stats["db_entries"] = await collection.estimated_document_count()
+        return stats
+
+llm_cache = LLMCache()
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import numpy as np
+from typing import Dict
+
+# Decode-once PCM buffer shared by duration, silence detection and Whisper.
+# 16 kHz mono float32 is exactly what Whisper expects as input.
+SAMPLE_RATE = 16000
+PCM_DIR = "uploads/pcm"
+
+def decode_to_pcm(file_path: str, pcm_path: str = None) -> Dict:
+    """
+    Decodes an audio file once into a raw float32 file that can be memory-mapped.
+    Returns {"path", "sample_rate", "num_samples", "duration_sec"}.
+    """
+    if not pcm_path:
+        os.makedirs(PCM_DIR, exist_ok=True)
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        pcm_path = os.path.join(PCM_DIR, f"{base_name}.f32")
+
+    cmd = [
+        'ffmpeg', '-nostdin', '-v', 'error',
+        '-i', file_path,
+        '-f', 'f32le', '-ac', '1', '-ar', str(SAMPLE_RATE),
+        '-y', pcm_path
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        if os.path.exists(pcm_path):
+            os.remove(pcm_path)
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')}")
+
+    num_samples = os.path.getsize(pcm_path) // 4
+    return {
+        "path": pcm_path,
+        "sample_rate": SAMPLE_RATE,
+        "num_samples": num_samples,
+        "duration_sec": num_samples / SAMPLE_RATE
+    }
+
+def load_pcm(pcm_path: str, start_sec: float = 0.0, end_sec: float = None) -> np.ndarray:
+    """
+    Memory-maps the decoded buffer (or a slice of it) without reading the whole file.
+    """
+    samples = np.memmap(pcm_path, dtype=np.float32, mode="r")
+    start = int(start_sec * SAMPLE_RATE)
+    end = int(end_sec * SAMPLE_RATE) if end_sec is not None else len(samples)
+    return samples[start:end]
+
+def remove_pcm(pcm_path: str):
+    if pcm_path and os.path.exists(pcm_path):
+        os.remove(pcm_path)
@@ -0,0 +1,110 @@
+import os
+import struct
+import subprocess
+import numpy as np
+from typing import Dict, List, Tuple
+
+# Precomputed waveform peaks, so the frontend can draw a clip without downloading
+# and decoding the MP3. Each level holds interleaved (min, max) int8 pairs; level 0
+# has BASE_PEAKS_PER_SEC pairs per second, every further level halves the resolution.
+PEAKS_DIR = "uploads/cache/peaks"
+PEAKS_SAMPLE_RATE = 8000
+BASE_PEAKS_PER_SEC = 100
+# Coarsest level has at most this many pairs
+MIN_PEAKS = 32
+
+MAGIC = b"LBPK"
+VERSION = 1
+# magic, version, number of levels, peaks per second (level 0), duration
+HEADER = struct.Struct("<4sBBHf")
+
+def peaks_path(clip_path: str) -> str:
+    return os.path.join(PEAKS_DIR, os.path.basename(clip_path) + ".peaks")
+
+def _decode(clip_path: str) -> np.ndarray:
+    cmd = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-threads', '1',
+        '-i', clip_path,
+        '-f', 'f32le', '-ac', '1', '-ar', str(PEAKS_SAMPLE_RATE), 'pipe:1'
+    ]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to decode audio: {result.stderr.decode(errors='ignore')}")
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+def _pad(values: np.ndarray, multiple: int, fill: float) -> np.ndarray:
+    rest = -len(values) % multiple
+    return np.concatenate((values, np.full(rest, fill, dtype=values.dtype))) if rest else values
+
+def compute_levels(samples: np.ndarray, sample_rate: int = PEAKS_SAMPLE_RATE) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Multi-resolution (mins, maxs) float arrays, finest first.
+    """
+    bin_len = sample_rate // BASE_PEAKS_PER_SEC
+    if not len(samples):
+        samples = np.zeros(bin_len, dtype=np.float32)
+    # Padding with the edge value does not add a fake peak or zero line
+    mins = _pad(samples, bin_len, samples[-1]).reshape(-1, bin_len).min(axis=1)
+    maxs = _pad(samples, bin_len, samples[-1]).reshape(-1, bin_len).max(axis=1)
+    levels = [(mins, maxs)]
+    while len(mins) > MIN_PEAKS:
+        mins = _pad(mins, 2, mins[-1]).reshape(-1, 2).min(axis=1)
+        maxs = _pad(maxs, 2, maxs[-1]).reshape(-1, 2).max(axis=1)
+        levels.append((mins, maxs))
+    return levels
+
+def _quantize(mins: np.ndarray, maxs: np.ndarray) -> bytes:
+    pairs = np.empty(2 * len(mins), dtype=np.float32)
+    pairs[0::2], pairs[1::2] = mins, maxs
+    return np.clip(np.round(pairs * 127), -128, 127).astype(np.int8).tobytes()
+
+def generate_peaks(clip_path: str) -> str:
+    """
+    Decodes a clip and writes its peak file. Returns the peak file path.
+    """
+    samples = _decode(clip_path)
+    levels = compute_levels(samples)
+    duration = len(samples) / PEAKS_SAMPLE_RATE
+
+    out_path = peaks_path(clip_path)
+    os.makedirs(PEAKS_DIR, exist_ok=True)
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(levels), BASE_PEAKS_PER_SEC, duration))
+        f.write(struct.pack(f"<{len(levels)}I", *(len(mins) for mins, _ in levels)))
+        for mins, maxs in levels:
+            f.write(_quantize(mins, maxs))
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def is_stale(clip_path: str) -> bool:
+    """
+    True if the peak file is missing or older than the clip (e.g. re-enhanced).
+    """
+    path = peaks_path(clip_path)
+    return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(clip_path)
+
+def read_level(clip_path: str, min_peaks: int = 0) -> Dict:
+    """
+    Reads the coarsest level with at least min_peaks pairs (the finest one if none has enough).
+    Returns {"data" (int8 min/max bytes), "peaks", "peaks_per_sec", "duration_sec"}.
+    """
+    with open(peaks_path(clip_path), "rb") as f:
+        magic, version, num_levels, peaks_per_sec, duration = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Unknown peak file format")
+        lengths = struct.unpack(f"<{num_levels}I", f.read(4 * num_levels))
+
+        level = 0
+        for i, length in enumerate(lengths):
+            if length >= min_peaks:
+                level = i
+        f.seek(2 * sum(lengths[:level]), os.SEEK_CUR)
+        data = f.read(2 * lengths[level])
+
+    return {
+        "data": data,
+        "peaks": lengths[level],
+        "peaks_per_sec": peaks_per_sec / 2 ** level,
+        "duration_sec": round(duration, 3)
+    }
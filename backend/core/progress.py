@@ -0,0 +1,162 @@
+import os
+import json
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from core.database import get_database
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Upload progress lives on the ingest job documents (collection `ingest_jobs`),
+# so every uvicorn worker sees the same state. Finished jobs expire via a TTL
+# index on `finished_at` (see core.jobs), which keeps the status list bounded.
+PROGRESS_TTL_HOURS = int(os.getenv("PROGRESS_TTL_HOURS", "24"))
+STATUS_LIMIT = 50
+# The shared poller checks MongoDB this often for updates written by other workers
+POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 15
+# Clock slack between workers when looking for changed jobs
+CHANGE_SLACK = timedelta(seconds=2)
+
+FINAL_STATUSES = ("done", "error")
+
+def _public(job: Dict) -> Dict:
+    entry = {"upload_id": job["job_id"], "status": job.get("status")}
+    entry.update(job.get("progress", {}))
+    return entry
+
+def sse_event(data: Dict, event: str = "progress") -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+def _version(job: Dict):
+    return (job.get("progress_seq", 0), job.get("status"))
+
+class ProgressTracker:
+    def __init__(self):
+        # One poller per process fans changes out to the SSE subscribers' queues.
+        # Local updates wake it immediately, remote workers' updates are polled
+        self.subscribers = set()
+        self.wakeup = asyncio.Event()
+        self.poller = None
+
+    def notify(self):
+        self.wakeup.set()
+
+    async def _poll(self):
+        """
+        Runs while there are subscribers: one MongoDB query per interval, however many streams are open.
+        """
+        seen = {}
+        since = datetime.utcnow()
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            now = datetime.utcnow()
+            try:
+                changed = await self._changes(since, seen)
+            except Exception as e:
+                # e.g. MongoDB temporarily unavailable, the next round catches up
+                logger.error(f"Progress poll failed: {e}")
+                continue
+            since = now
+            for job in changed:
+                for queue in self.subscribers:
+                    queue.put_nowait(job)
+        self.poller = None
+
+    async def update(self, upload_id: str, stage: str = None, progress: int = None, **extra):
+        fields = {f"progress.{key}": value for key, value in extra.items()}
+        if stage is not None:
+            fields["progress.stage"] = stage
+        if progress is not None:
+            fields["progress.progress"] = progress
+        fields["updated_at"] = datetime.utcnow()
+        db = await get_database()
+        await db.ingest_jobs.update_one({"job_id": upload_id}, {"$set": fields, "$inc": {"progress_seq": 1}})
+        self.notify()
+
+    async def get(self, upload_id: str) -> Optional[Dict]:
+        db = await get_database()
+        job = await db.ingest_jobs.find_one({"job_id": upload_id})
+        return _public(job) if job else None
+
+    async def recent(self, limit: int = STATUS_LIMIT) -> List[Dict]:
+        """
+        Running and queued uploads first, then the most recently finished ones.
+        """
+        db = await get_database()
+        active = [_public(job) async for job in
+                  db.ingest_jobs.find({"finished_at": None}).sort("updated_at", -1).limit(limit)]
+        if len(active) >= limit:
+            return active
+        finished = db.ingest_jobs.find({"finished_at": {"$ne": None}}).sort("finished_at", -1).limit(limit - len(active))
+        return active + [_public(job) async for job in finished]
+
+    async def _changes(self, since: datetime, seen: Dict) -> List[Dict]:
+        db = await get_database()
+        query = {"updated_at": {"$gte": since - CHANGE_SLACK}}
+        changed = []
+        async for job in db.ingest_jobs.find(query).sort("updated_at", 1):
+            version = _version(job)
+            if seen.get(job["job_id"]) != version:
+                seen[job["job_id"]] = version
+                changed.append(job)
+        return changed
+
+    async def subscribe(self, request, upload_id: str = None):
+        """
+        Server-Sent Events: a progress event per change. For a single upload the
+        stream ends once the job is done or failed.
+        """
+        # Registered before reading the current state, so no change in between is missed
+        queue = asyncio.Queue()
+        self.subscribers.add(queue)
+        if self.poller is None or self.poller.done():
+            self.poller = asyncio.create_task(self._poll())
+        seen = {}
+        try:
+            # Current state first
+            if upload_id:
+                db = await get_database()
+                initial = [job for job in [await db.ingest_jobs.find_one({"job_id": upload_id})] if job]
+            else:
+                initial = await self._changes(datetime.utcnow() - timedelta(hours=1), {})
+            for job in initial:
+                seen[job["job_id"]] = _version(job)
+                yield sse_event(_public(job))
+                if upload_id and job.get("status") in FINAL_STATUSES:
+                    return
+
+            idle = 0.0
+            while not await request.is_disconnected():
+                try:
+                    job = await asyncio.wait_for(queue.get(), timeout=POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    idle += POLL_INTERVAL
+                    if idle >= HEARTBEAT_INTERVAL:
+                        idle = 0.0
+                        # Comment line keeps proxies from closing the connection
+                        yield ": keep-alive\n\n"
+                    continue
+
+                if upload_id and job["job_id"] != upload_id:
+                    continue
+                # Skip what the initial state already showed (or an older progress step)
+                previous = seen.get(job["job_id"])
+                version = _version(job)
+                if previous and (version == previous or version[0] < previous[0]):
+                    continue
+                seen[job["job_id"]] = version
+                idle = 0.0
+                yield sse_event(_public(job))
+                if upload_id and job.get("status") in FINAL_STATUSES:
+                    return
+        finally:
+            self.subscribers.discard(queue)
+
+progress_tracker = ProgressTracker()
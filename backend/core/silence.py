@@ -0,0 +1,180 @@
+import numpy as np
+from typing import Iterable, List
+
+# Vectorized replacement for pydub.silence.detect_nonsilent.
+# Works on NumPy sample arrays (e.g. the memory-mapped PCM buffer from core.pcm)
+# and can be fed chunk by chunk, so the whole file never has to be in memory.
+# Semantics match pydub: a window of min_silence_len ms starting every seek_step ms
+# is silent if its RMS <= silence_thresh dBFS; overlapping silent windows are merged.
+
+class SilenceDetector:
+    def __init__(self, sample_rate: int, min_silence_len=1000, silence_thresh=-16, seek_step=1, max_amplitude=1.0):
+        """
+        max_amplitude: full scale of the samples (1.0 for float audio, 32768 for int16).
+        """
+        self.sample_rate = sample_rate
+        self.min_silence_len = min_silence_len
+        self.seek_step = seek_step
+        thresh = (10 ** (silence_thresh / 20.0)) * max_amplitude
+        # pydub truncates the RMS of integer samples (audioop.rms) before comparing
+        self.integer_rms = max_amplitude > 1
+        if self.integer_rms:
+            self.thresh_sq = (np.floor(thresh) + 1) ** 2
+        else:
+            self.thresh_sq = thresh * thresh
+
+        self.num_samples = 0
+        self.leftover = np.zeros(0, dtype=np.float64)
+        # Per-ms energies of the last min_silence_len ms (window carry-over between chunks)
+        self.tail = np.zeros(0, dtype=np.float64)
+        self.tail_start_ms = 0
+        self.ms_done = 0
+
+        self.silent_ranges = []
+        self.range_start = None
+        self.prev_start = None
+
+    def _ms_boundary(self, ms):
+        # Same sample boundaries as pydub's AudioSegment[ms:ms]
+        return (np.asarray(ms, dtype=np.int64) * self.sample_rate) // 1000
+
+    def _is_silent(self, energy, count):
+        if self.integer_rms:
+            return energy < self.thresh_sq * count
+        return energy <= self.thresh_sq * count
+
+    def _frame_energies(self, samples: np.ndarray, first_ms: int, num_ms: int) -> np.ndarray:
+        bounds = self._ms_boundary(np.arange(first_ms, first_ms + num_ms + 1)) - self._ms_boundary(first_ms)
+        squares = np.concatenate(([0.0], np.cumsum(samples.astype(np.float64) ** 2)))
+        return squares[bounds[1:]] - squares[bounds[:-1]]
+
+    def _add_starts(self, starts: np.ndarray):
+        """
+        Merges silent window starts (sorted ms) into silent ranges, like pydub.
+        """
+        if len(starts) == 0:
+            return
+        if self.prev_start is None:
+            self.range_start = self.prev_start = int(starts[0])
+            starts = starts[1:]
+            if len(starts) == 0:
+                return
+
+        prevs = np.concatenate(([self.prev_start], starts[:-1]))
+        continuous = starts == prevs + self.seek_step
+        has_gap = starts > prevs + self.min_silence_len
+        breaks = np.flatnonzero(~continuous & has_gap)
+
+        for b in breaks:
+            self.silent_ranges.append([self.range_start, int(prevs[b]) + self.min_silence_len])
+            self.range_start = int(starts[b])
+        self.prev_start = int(starts[-1])
+
+    def _process(self, energies: np.ndarray, last_window_start: int):
+        """
+        Appends per-ms energies and evaluates every window that is now complete.
+        """
+        tail = np.concatenate((self.tail, energies))
+        window = self.min_silence_len
+        if len(tail) >= window:
+            sums = np.concatenate(([0.0], np.cumsum(tail)))
+            window_energy = sums[window:] - sums[:-window]
+            starts = np.arange(self.tail_start_ms, self.tail_start_ms + len(window_energy))
+            starts_ok = (starts <= last_window_start) & (starts >= self.ms_done)
+            window_energy, starts = window_energy[starts_ok], starts[starts_ok]
+
+            counts = self._ms_boundary(starts + window) - self._ms_boundary(starts)
+            silent = self._is_silent(window_energy, counts)
+            on_step = (starts % self.seek_step) == 0
+            self._add_starts(starts[silent & on_step])
+            if len(starts):
+                self.ms_done = int(starts[-1]) + 1
+
+        keep = min(len(tail), window)
+        self.tail_start_ms += len(tail) - keep
+        self.tail = tail[len(tail) - keep:]
+
+    def feed(self, samples: np.ndarray):
+        """
+        Feeds the next chunk of mono samples.
+        """
+        samples = np.concatenate((self.leftover, np.asarray(samples, dtype=np.float64)))
+        first_ms = self.tail_start_ms + len(self.tail)
+        # Only complete milliseconds are processed, the rest is carried over
+        total = self.num_samples + len(samples) - len(self.leftover)
+        full_ms = int((total * 1000) // self.sample_rate)
+        num_ms = full_ms - first_ms
+        used = int(self._ms_boundary(full_ms) - self._ms_boundary(first_ms))
+
+        if num_ms > 0:
+            energies = self._frame_energies(samples[:used], first_ms, num_ms)
+            self._process(energies, full_ms - self.min_silence_len)
+        self.leftover = samples[used:]
+        self.num_samples = total
+
+    def finish(self) -> List[List[int]]:
+        """
+        Returns the non-silent ranges [start_ms, end_ms] like pydub.silence.detect_nonsilent.
+        """
+        seg_len = round(1000 * self.num_samples / self.sample_rate)
+        window = self.min_silence_len
+        last_window_start = seg_len - window
+
+        # Trailing partial millisecond (pydub pads it with silence)
+        first_ms = self.tail_start_ms + len(self.tail)
+        if seg_len > first_ms:
+            energies = np.zeros(seg_len - first_ms)
+            if len(self.leftover):
+                energies[0] = np.sum(self.leftover ** 2)
+            self._process(energies, last_window_start)
+
+        # pydub always checks the last window, even if it is not on a seek step
+        if last_window_start >= 0 and last_window_start % self.seek_step and len(self.tail) >= window:
+            offset = last_window_start - self.tail_start_ms
+            if 0 <= offset and offset + window <= len(self.tail):
+                count = self._ms_boundary(last_window_start + window) - self._ms_boundary(last_window_start)
+                if self._is_silent(np.sum(self.tail[offset:offset + window]), count):
+                    self._add_starts(np.array([last_window_start]))
+
+        silent_ranges = list(self.silent_ranges)
+        if self.prev_start is not None and seg_len >= window:
+            silent_ranges.append([self.range_start, self.prev_start + window])
+
+        # Invert silent ranges (same rules as pydub.silence.detect_nonsilent)
+        if not silent_ranges:
+            return [[0, seg_len]]
+        if silent_ranges[0][0] == 0 and silent_ranges[0][1] == seg_len:
+            return []
+
+        prev_end = 0
+        nonsilent_ranges = []
+        for start, end in silent_ranges:
+            nonsilent_ranges.append([prev_end, start])
+            prev_end = end
+        if end != seg_len:
+            nonsilent_ranges.append([prev_end, seg_len])
+        if nonsilent_ranges[0] == [0, 0]:
+            nonsilent_ranges.pop(0)
+        return nonsilent_ranges
+
+def detect_nonsilent(samples: np.ndarray, sample_rate: int, min_silence_len=1000, silence_thresh=-16,
+                     seek_step=1, max_amplitude=1.0) -> List[List[int]]:
+    """
+    Drop-in for pydub.silence.detect_nonsilent on a NumPy array.
+    """
+    # Fed in 30 s chunks: keeps the float64 temporaries small and cache friendly
+    chunk_len = 30 * sample_rate
+    return detect_nonsilent_chunks(
+        (samples[i:i + chunk_len] for i in range(0, len(samples), chunk_len)),
+        sample_rate, min_silence_len, silence_thresh, seek_step, max_amplitude
+    )
+
+def detect_nonsilent_chunks(chunks: Iterable[np.ndarray], sample_rate: int, min_silence_len=1000,
+                            silence_thresh=-16, seek_step=1, max_amplitude=1.0) -> List[List[int]]:
+    """
+    Same as detect_nonsilent, but for a stream of sample chunks.
+    """
+    detector = SilenceDetector(sample_rate, min_silence_len, silence_thresh, seek_step, max_amplitude)
+    for chunk in chunks:
+        detector.feed(chunk)
+    return detector.finish()
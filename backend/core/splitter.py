@@ -1,5 +1,87 @@
 import ffmpeg
 import os
+import uuid
+from typing import List, Tuple
+
+class MissingPiecesError(Exception):
+    """Some clips start past the end of the audio, ffmpeg wrote no piece for them."""
+    def __init__(self, missing: List[str]):
+        super().__init__(f"{len(missing)} clip(s) start past the end of the audio: {', '.join(missing)}")
+        self.missing = missing
+
+def _cut_clips_separately(file_path: str, ranges: List[Tuple[float, float]], output_paths: List[str], copy: bool):
+    # Fallback for overlapping ranges: one ffmpeg process per clip
+    for (start, end), output_path in zip(ranges, output_paths):
+        codec = {"c": "copy"} if copy else {"acodec": "libmp3lame", "audio_bitrate": "128k"}
+        (
+            ffmpeg
+            .input(file_path, ss=start, t=end - start)
+            .output(output_path, loglevel="error", **codec)
+            .run(overwrite_output=True, capture_stderr=True)
+        )
+
+def cut_clips(file_path: str, ranges: List[Tuple[float, float]], output_paths: List[str], copy: bool = True) -> List[str]:
+    """
+    Cuts many clips out of one file with a single ffmpeg invocation (segment muxer).
+    The source is read once; cutting time scales with file length, not clips x length.
+    ranges: sorted, non-overlapping (start_sec, end_sec). Gaps between clips are discarded.
+    copy=True keeps the stream as-is (no re-encode), otherwise encodes MP3.
+    Raises MissingPiecesError (after moving all other clips into place) if clips
+    start past the end of the audio.
+    """
+    if not ranges:
+        return []
+
+    overlapping = any(ranges[i][1] > ranges[i + 1][0] for i in range(len(ranges) - 1))
+    if overlapping or any(start >= end for start, end in ranges):
+        _cut_clips_separately(file_path, ranges, output_paths, copy)
+        return output_paths
+
+    # Every clip start/end becomes a cut point; piece k spans boundaries[k]..boundaries[k+1]
+    boundaries = sorted({t for start, end in ranges for t in (start, end) if t > 0})
+    piece_starts = [0.0] + boundaries
+
+    output_dir = os.path.dirname(output_paths[0]) or "."
+    ext = os.path.splitext(output_paths[0])[1] or ".mp3"
+    part_prefix = os.path.join(output_dir, f".cut-{uuid.uuid4().hex[:8]}-")
+    part_pattern = part_prefix + "%05d" + ext
+    # The segment muxer numbers its pieces 0..len(boundaries), so their names are known up front
+    piece_paths = [f"{part_prefix}{piece:05d}{ext}" for piece in range(len(piece_starts))]
+
+    codec = {"c": "copy"} if copy else {"acodec": "libmp3lame", "audio_bitrate": "128k"}
+    try:
+        (
+            ffmpeg
+            .input(file_path)
+            .audio
+            .output(
+                part_pattern,
+                f="segment",
+                segment_times=",".join(f"{t:.3f}" for t in boundaries),
+                reset_timestamps=1,
+                loglevel="error",
+                **codec
+            )
+            .run(overwrite_output=True, capture_stderr=True)
+        )
+
+        missing = []
+        for (start, end), output_path in zip(ranges, output_paths):
+            piece = piece_starts.index(start) if start > 0 else 0
+            # Boundaries past the end of the audio produce no piece
+            if os.path.exists(piece_paths[piece]):
+                os.replace(piece_paths[piece], output_path)
+            else:
+                missing.append(os.path.basename(output_path))
+    finally:
+        # Remove the gap pieces between clips
+        for path in piece_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    if missing:
+        raise MissingPiecesError(missing)
+    return output_paths
 
 def split_audio(file_path: str, transcription_result: dict, start_index: int = 0):
     segments = transcription_result.get("segments", [])
@@ -36,40 +118,45 @@ def split_audio(file_path: str, transcription_result: dict, start_index: int = 0
     if current_group:
         merged_segments.append(current_group)
 
-    # Process merged segments
+    # Collect clip ranges (drop fragments that are too short)
+    clips = []
     for i, group in enumerate(merged_segments):
         if not group:
             continue
             
         start = group[0]["start"]
         end = group[-1]["end"]
-        text = " ".join([s["text"].strip() for s in group])
         duration = end - start
         
         # Final filter
         if duration < 10: 
             continue
-            
-        clip_name = f"{base_name}_{start_index + i}.mp3"
-        clip_path = os.path.join(output_dir, clip_name)
         
-        try:
-            (
-                ffmpeg
-                .input(file_path, ss=start, t=duration)
-                .output(clip_path, c="copy", loglevel="error")
-                .run(overwrite_output=True)
-            )
-            
-            processed_segments.append({
-                "file_name": clip_name,
-                "start": start,
-                "end": end,
-                "duration": duration,
-                "text": text
-            })
-            print(f"Created clip {clip_name} ({duration:.1f}s)")
-        except ffmpeg.Error as e:
-            print(f"Error splitting audio: {e.stderr.decode() if e.stderr else str(e)}")
+        clips.append({
+            "file_name": f"{base_name}_{start_index + i}.mp3",
+            "start": start,
+            "end": end,
+            "duration": duration,
+            "text": " ".join([s["text"].strip() for s in group])
+        })
+    
+    # Cut all clips in one ffmpeg pass
+    try:
+        cut_clips(
+            file_path,
+            [(clip["start"], clip["end"]) for clip in clips],
+            [os.path.join(output_dir, clip["file_name"]) for clip in clips]
+        )
+    except ffmpeg.Error as e:
+        print(f"Error splitting audio: {e.stderr.decode() if e.stderr else str(e)}")
+        return processed_segments
+    except MissingPiecesError as e:
+        # The other clips were cut, keep them
+        print(f"Error splitting audio: {e}")
+    
+    for clip in clips:
+        if os.path.exists(os.path.join(output_dir, clip["file_name"])):
+            processed_segments.append(clip)
+            print(f"Created clip {clip['file_name']} ({clip['duration']:.1f}s)")
             
     return processed_segments
@@ -0,0 +1,292 @@
+import os
+import time
+import shutil
+import asyncio
+import socket
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from typing import Dict, Iterator, List, Set, Tuple
+from core.database import get_database
+from core.peaks import peaks_path, PEAKS_DIR
+from core.delivery import derived_paths, VARIANTS_DIR
+from core.audio_enhancer import LOUDNORM_CACHE_DIR, ORIGINALS_DIR, original_path
+from core.pcm import PCM_DIR
+from core import transcript_cache, tts_cache
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Storage lifecycle: every file under uploads/ belongs to a clip (audio, peaks,
+# variants), to an upload (raw file, PCM buffer) or to a cache. Files nothing in
+# MongoDB refers to anymore are garbage-collected, raw uploads expire.
+UPLOAD_DIR = "uploads"
+CLIPS_DIR = "uploads/clips"
+# Raw uploads are deleted this many days after upload, their clips stay (0 = keep forever)
+RAW_UPLOAD_RETENTION_DAYS = float(os.getenv("RAW_UPLOAD_RETENTION_DAYS", "30"))
+# Automatic garbage collection (0 = only via POST /storage/gc)
+STORAGE_GC_INTERVAL_HOURS = float(os.getenv("STORAGE_GC_INTERVAL_HOURS", "24"))
+# Files younger than this are never orphans (an ingest writes the clip before its DB entry)
+ORPHAN_GRACE_HOURS = 6
+# Loudness measurements are only reused for re-enhancing, old ones are dropped
+LOUDNORM_MAX_AGE_DAYS = 30
+FIRST_RUN_DELAY_SEC = 600
+
+# Usage report categories, most specific directory first
+CATEGORIES = [
+    ("peaks", PEAKS_DIR),
+    ("variants", VARIANTS_DIR),
+    ("transcripts", transcript_cache.TRANSCRIPT_CACHE_DIR),
+    ("tts", tts_cache.TTS_CACHE_DIR),
+    ("loudnorm", LOUDNORM_CACHE_DIR),
+    ("originals", ORIGINALS_DIR),
+    ("pcm", PCM_DIR),
+    ("clips", CLIPS_DIR),
+    ("cache_other", "uploads/cache"),
+]
+
+def _scan(directory: str, recursive: bool = False) -> Iterator[Tuple[str, str, os.stat_result]]:
+    """
+    (path, name, stat) of all files in a directory, one scandir pass per directory.
+    """
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        yield from _scan(entry.path, recursive)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path, entry.name, entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+
+def _category(path: str) -> str:
+    for name, directory in CATEGORIES:
+        if path.startswith(os.path.normpath(directory) + os.sep):
+            return name
+    # Everything else directly in uploads/: raw uploads and dictation temp files
+    return "raw_uploads"
+
+def _remove(path: str) -> int:
+    """
+    Deletes a file, returns the freed bytes (0 if it was already gone).
+    """
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except FileNotFoundError:
+        return 0
+
+def _count(summary: Dict, category: str, size: int):
+    entry = summary.setdefault(category, {"files": 0, "bytes": 0})
+    entry["files"] += 1
+    entry["bytes"] += size
+
+def clip_artifacts(clip: Dict) -> List[str]:
+    """
+    All files of a clip: the audio (clip_path for uploads, file_path for KI-Mark
+    clips), its waveform peaks, playback variants, version files and pre-enhance original.
+    The raw upload is not included, several clips can share it.
+    """
+    audio = {os.path.normpath(clip[field]) for field in ("clip_path", "file_path") if clip.get(field)}
+    if clip.get("file_name"):
+        audio.add(os.path.normpath(os.path.join(CLIPS_DIR, clip["file_name"])))
+    paths = []
+    for path in sorted(audio):
+        paths += [path, peaks_path(path), *derived_paths(path), original_path(path)]
+    return paths
+
+class StorageManager:
+    """
+    Reconciles the uploads volume with MongoDB: per-clip cleanup, orphan GC,
+    raw upload retention and a disk usage report.
+    """
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def remove_clip_files(self, clip: Dict) -> List[str]:
+        """
+        Deletes all files of a (just deleted) clip, and its raw upload once no
+        other clip refers to it. Returns the removed paths.
+        """
+        removed = []
+        for path in clip_artifacts(clip):
+            if os.path.exists(path):
+                _remove(path)
+                removed.append(path)
+        source = clip.get("source_path")
+        if source and os.path.exists(source):
+            db = await get_database()
+            if not await db.clips.find_one({"source_path": source}, {"_id": 1}):
+                _remove(source)
+                removed.append(source)
+        return removed
+
+    async def _references(self) -> Tuple[Set[str], Set[str], Set[str]]:
+        """
+        (clip file names, raw upload paths of clips, paths/ids of uploads still being ingested)
+        """
+        db = await get_database()
+        clip_names, sources = set(), set()
+        async for clip in db.clips.find({}, {"file_name": 1, "clip_path": 1, "file_path": 1, "source_path": 1}):
+            for field in ("clip_path", "file_path"):
+                if clip.get(field):
+                    clip_names.add(os.path.basename(clip[field]))
+            if clip.get("file_name"):
+                clip_names.add(clip["file_name"])
+            if clip.get("source_path"):
+                sources.add(os.path.normpath(clip["source_path"]))
+
+        active = set()
+        async for job in db.ingest_jobs.find({"status": {"$in": ["queued", "running"]}}, {"job_id": 1, "file_path": 1}):
+            active.add(job["job_id"])
+            if job.get("file_path"):
+                active.add(os.path.normpath(job["file_path"]))
+        return clip_names, sources, active
+
+    def _plan(self, clip_names: Set[str], sources: Set[str], active: Set[str]) -> List[Tuple[str, str, int]]:
+        """
+        Files to delete as (path, reason, size). Runs in a thread (disk scan).
+        """
+        now = time.time()
+        grace = ORPHAN_GRACE_HOURS * 3600
+        plan = []
+
+        # Clip audio without a clip document. Clips of uploads that are still being
+        # ingested ("{upload_id}_..."), no matter how old, get their document later
+        existing_clips = set()
+        for path, name, stat in _scan(CLIPS_DIR):
+            if name in clip_names or name.split("_", 1)[0] in active or now - stat.st_mtime < grace:
+                existing_clips.add(name)
+            else:
+                plan.append((path, "orphan_clips", stat.st_size))
+
+        # Peaks, variants, version files and originals of clips that are gone
+        for directory in (PEAKS_DIR, VARIANTS_DIR, ORIGINALS_DIR):
+            for path, name, stat in _scan(directory):
+                base = name
+                while base not in existing_clips and os.path.splitext(base)[1]:
+                    base = os.path.splitext(base)[0]
+                if base not in existing_clips and now - stat.st_mtime >= grace:
+                    plan.append((path, "orphan_derived", stat.st_size))
+
+        # Raw uploads: expired after the retention period, orphaned (failed or
+        # abandoned uploads, dictation temp files) after the grace period
+        for path, name, stat in _scan(UPLOAD_DIR):
+            path = os.path.normpath(path)
+            if path in active:
+                continue
+            age = now - stat.st_mtime
+            if path in sources:
+                if RAW_UPLOAD_RETENTION_DAYS > 0 and age > RAW_UPLOAD_RETENTION_DAYS * 86400:
+                    plan.append((path, "expired_raw", stat.st_size))
+            elif age >= grace:
+                plan.append((path, "orphan_raw", stat.st_size))
+
+        # PCM buffers of uploads that are no longer being processed
+        for path, name, stat in _scan(PCM_DIR):
+            if os.path.splitext(name)[0] not in active and now - stat.st_mtime >= grace:
+                plan.append((path, "orphan_pcm", stat.st_size))
+
+        for path, name, stat in _scan(LOUDNORM_CACHE_DIR):
+            if now - stat.st_mtime > LOUDNORM_MAX_AGE_DAYS * 86400:
+                plan.append((path, "old_loudnorm", stat.st_size))
+        return plan
+
+    async def collect_garbage(self, dry_run: bool = False) -> Dict:
+        """
+        Deletes orphaned and expired files. With dry_run only reports what would be deleted.
+        Returns {"dry_run", "removed": {reason: {"files", "bytes"}}, "freed_mb"}.
+        """
+        references = await self._references()
+        loop = asyncio.get_running_loop()
+        plan = await loop.run_in_executor(None, self._plan, *references)
+
+        removed = {}
+        expired_sources = []
+        for path, reason, size in plan:
+            if not dry_run:
+                size = _remove(path)
+            _count(removed, reason, size)
+            if reason == "expired_raw":
+                expired_sources.append(path)
+
+        if not dry_run:
+            if expired_sources:
+                db = await get_database()
+                await db.clips.update_many(
+                    {"source_path": {"$in": expired_sources}},
+                    {"$set": {"source_removed_at": datetime.utcnow()}}
+                )
+            if transcript_cache.enabled():
+                # Size-bounded LRU, freed bytes are not reported
+                evicted = await loop.run_in_executor(None, transcript_cache.evict)
+                if evicted:
+                    removed["evicted_transcripts"] = {"files": evicted, "bytes": 0}
+            if tts_cache.enabled():
+                evicted = await loop.run_in_executor(None, tts_cache.evict)
+                if evicted:
+                    removed["evicted_tts"] = {"files": evicted, "bytes": 0}
+
+        freed = sum(entry["bytes"] for entry in removed.values())
+        logger.info(f"Storage GC{' (dry run)' if dry_run else ''}: "
+                    f"{sum(entry['files'] for entry in removed.values())} files, {freed / 1024 / 1024:.1f} MB")
+        return {"dry_run": dry_run, "removed": removed, "freed_mb": round(freed / 1024 / 1024, 1)}
+
+    def _usage(self) -> Dict:
+        categories = {}
+        for path, _, stat in _scan(UPLOAD_DIR, recursive=True):
+            _count(categories, _category(os.path.normpath(path)), stat.st_size)
+        for entry in categories.values():
+            entry["mb"] = round(entry["bytes"] / 1024 / 1024, 1)
+        total = sum(entry["bytes"] for entry in categories.values())
+        disk = shutil.disk_usage(UPLOAD_DIR)
+        return {
+            "categories": dict(sorted(categories.items(), key=lambda item: item[1]["bytes"], reverse=True)),
+            "total_mb": round(total / 1024 / 1024, 1),
+            "disk_free_mb": round(disk.free / 1024 / 1024, 1),
+            "disk_used_percent": round(100 * disk.used / disk.total, 1)
+        }
+
+    async def usage(self) -> Dict:
+        """
+        Disk usage of the uploads volume by category.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._usage)
+
+    async def _acquire_lease(self) -> bool:
+        """
+        Lease document in `locks`: only one uvicorn worker runs the periodic GC per interval.
+        """
+        db = await get_database()
+        now = datetime.utcnow()
+        try:
+            await db.locks.find_one_and_update(
+                {"_id": "storage_gc", "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(hours=STORAGE_GC_INTERVAL_HOURS)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Held by another worker
+            return False
+
+    async def run_periodic(self):
+        """
+        Background task: garbage collection every STORAGE_GC_INTERVAL_HOURS.
+        """
+        await asyncio.sleep(FIRST_RUN_DELAY_SEC)
+        while True:
+            try:
+                if await self._acquire_lease():
+                    await self.collect_garbage()
+            except Exception as e:
+                logger.error(f"Storage GC failed: {e}", exc_info=True)
+            await asyncio.sleep(STORAGE_GC_INTERVAL_HOURS * 3600)
+
+storage_manager = StorageManager()
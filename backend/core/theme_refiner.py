@@ -0,0 +1,113 @@
+import os
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from core.database import get_database
+from core.topics import resolve_themes, assign_theme
+from core.topic_classifier import topic_classifier
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Clips whose theme still has to be merged via Grok carry `theme_refined: false`
+# (set by the upload). Any worker picks them up, so refinement survives restarts.
+THEME_REFINE_POLL_SEC = 30
+# Clips per Grok merge
+THEME_REFINE_BATCH = 200
+# Claimed clips belong to one worker until the lease runs out (also the retry delay after a failure)
+THEME_REFINE_LEASE_SEC = 600
+# Clips whose refinement failed this often keep their provisional theme
+THEME_REFINE_MAX_ATTEMPTS = 5
+
+class ThemeRefiner:
+    """
+    Merges the raw topics of low-confidence clips into the theme list via Grok and
+    trains the classifier on the result. Clips keep their provisional theme until then.
+    """
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.wakeup = asyncio.Event()
+
+    async def mark_pending(self, clip_ids: list):
+        """
+        Queues clips for refinement.
+        """
+        if not clip_ids:
+            return
+        db = await get_database()
+        await db.clips.update_many(
+            {"_id": {"$in": clip_ids}},
+            {"$set": {"theme_refined": False, "theme_refine_attempts": 0, "theme_refine_lease_until": None}}
+        )
+        self.wakeup.set()
+
+    async def _claim(self) -> list:
+        db = await get_database()
+        now = datetime.utcnow()
+        claimable = {
+            "theme_refined": False,
+            "theme_refine_attempts": {"$lt": THEME_REFINE_MAX_ATTEMPTS},
+            "$or": [{"theme_refine_lease_until": None}, {"theme_refine_lease_until": {"$lt": now}}]
+        }
+        ids = [doc["_id"] async for doc in db.clips.find(claimable, {"_id": 1}).limit(THEME_REFINE_BATCH)]
+        if not ids:
+            return []
+        # Another worker may have claimed some of them in between
+        await db.clips.update_many(
+            {**claimable, "_id": {"$in": ids}},
+            {"$set": {"theme_refine_owner": self.owner,
+                      "theme_refine_lease_until": now + timedelta(seconds=THEME_REFINE_LEASE_SEC)},
+             "$inc": {"theme_refine_attempts": 1}}
+        )
+        return await db.clips.find(
+            {"_id": {"$in": ids}, "theme_refine_owner": self.owner, "theme_refined": False},
+            {"raw_topic": 1, "text": 1}
+        ).to_list(None)
+
+    async def refine(self, clips: list):
+        """
+        Assigns the merged themes and marks those clips as done. Clips Grok could not
+        assign keep their provisional theme and are retried once their lease runs out.
+        """
+        db = await get_database()
+        topic_mapping = await resolve_themes([clip["raw_topic"] for clip in clips if clip.get("raw_topic")])
+        refined, learned_texts, learned_themes = [], [], []
+        for clip in clips:
+            theme = topic_mapping.get(clip.get("raw_topic"))
+            if theme:
+                await assign_theme(clip["_id"], theme, theme_source="grok")
+                refined.append(clip["_id"])
+                learned_texts.append(clip.get("text"))
+                learned_themes.append(theme)
+        if refined:
+            await db.clips.update_many(
+                {"_id": {"$in": refined}},
+                {"$set": {"theme_refined": True, "theme_refine_lease_until": None}}
+            )
+        # Incremental retraining on the Grok-assigned themes (other workers pick them
+        # up with their next periodic retraining)
+        topic_classifier.partial_fit(learned_texts, learned_themes)
+
+    async def run_periodic(self):
+        """
+        Background task: refines pending clips, woken by new uploads or every THEME_REFINE_POLL_SEC.
+        """
+        db = await get_database()
+        await db.clips.create_index("theme_refined", sparse=True)
+        while True:
+            try:
+                clips = await self._claim()
+                if clips:
+                    logger.info(f"Merging topics for {len(clips)} clips...")
+                    await self.refine(clips)
+                    continue
+            except Exception as e:
+                # Claimed clips are retried once their lease runs out
+                logger.error(f"Theme refinement failed: {e}")
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=THEME_REFINE_POLL_SEC)
+            except asyncio.TimeoutError:
+                pass
+
+theme_refiner = ThemeRefiner()
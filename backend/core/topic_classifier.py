@@ -0,0 +1,143 @@
+import os
+import re
+import zlib
+import asyncio
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from core.database import get_database
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Local theme classifier: TF-IDF weighted multinomial naive Bayes on hashed
+# unigrams + bigrams, trained on the labelled clips (text -> final_topic).
+# Gives every clip a theme right after transcription; Grok only refines the
+# low-confidence cases. Training is count-based, so partial_fit is O(new clips).
+TOPIC_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("TOPIC_CLASSIFIER_MIN_CONFIDENCE", "0.6"))
+TOPIC_CLASSIFIER_MIN_SAMPLES = int(os.getenv("TOPIC_CLASSIFIER_MIN_SAMPLES", "20"))
+# The model lives in memory per uvicorn worker; every worker retrains from MongoDB this
+# often so themes learned (or edited) elsewhere reach it (0 = only at startup)
+TOPIC_CLASSIFIER_RETRAIN_MINUTES = float(os.getenv("TOPIC_CLASSIFIER_RETRAIN_MINUTES", "15"))
+
+N_FEATURES = 2 ** 16
+ALPHA = 0.01
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def _tokens(text: str) -> List[str]:
+    words = [w for w in TOKEN_RE.findall(text.lower()) if len(w) > 2 and not w.isdigit()]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+def _term_frequencies(text: str) -> np.ndarray:
+    """
+    Sublinear term frequencies (1 + log tf) in the hashed feature space.
+    """
+    indices = [zlib.crc32(t.encode("utf-8")) % N_FEATURES for t in _tokens(text)]
+    tf = np.bincount(np.asarray(indices, dtype=np.int64), minlength=N_FEATURES).astype(np.float64)
+    nonzero = tf > 0
+    tf[nonzero] = 1.0 + np.log(tf[nonzero])
+    return tf
+
+class TopicClassifier:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.labels: List[str] = []
+        self.class_counts: List[np.ndarray] = []
+        self.class_docs: List[int] = []
+        self.doc_freq = np.zeros(N_FEATURES, dtype=np.float64)
+        self.num_docs = 0
+        self._feature_log_prob = None
+
+    def partial_fit(self, texts: List[str], labels: List[str]):
+        """
+        Adds labelled examples. Cheap: only count updates, the model is rebuilt lazily.
+        """
+        for text, label in zip(texts, labels):
+            if not text or not label:
+                continue
+            tf = _term_frequencies(text)
+            if label not in self.labels:
+                self.labels.append(label)
+                self.class_counts.append(np.zeros(N_FEATURES, dtype=np.float64))
+                self.class_docs.append(0)
+            i = self.labels.index(label)
+            self.class_counts[i] += tf
+            self.class_docs[i] += 1
+            self.doc_freq += tf > 0
+            self.num_docs += 1
+            self._feature_log_prob = None
+
+    @property
+    def ready(self) -> bool:
+        return self.num_docs >= TOPIC_CLASSIFIER_MIN_SAMPLES and len(self.labels) >= 2
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        Returns (theme, confidence); (None, 0.0) until enough labelled clips exist.
+        """
+        if not self.ready or not text:
+            return None, 0.0
+        if self._feature_log_prob is None:
+            counts = np.vstack(self.class_counts) + ALPHA
+            self._feature_log_prob = np.log(counts) - np.log(counts.sum(axis=1, keepdims=True))
+
+        idf = np.log((1 + self.num_docs) / (1 + self.doc_freq)) + 1.0
+        x = _term_frequencies(text) * idf
+        norm = np.linalg.norm(x)
+        if norm == 0:
+            return None, 0.0
+        x /= norm
+
+        log_prior = np.log(np.asarray(self.class_docs, dtype=np.float64) / self.num_docs)
+        scores = log_prior + self._feature_log_prob @ x
+        probs = np.exp(scores - scores.max())
+        probs /= probs.sum()
+        best = int(np.argmax(probs))
+        return self.labels[best], float(probs[best])
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= TOPIC_CLASSIFIER_MIN_CONFIDENCE
+
+    async def train_from_db(self) -> int:
+        """
+        Full (re)training from all clips that have a theme. The new model is built
+        aside and swapped in, predictions keep working while it trains.
+        """
+        db = await get_database()
+        texts, labels = [], []
+        cursor = db.clips.find(
+            {"final_topic": {"$ne": None}, "text": {"$ne": None}, "theme_source": {"$nin": ["classifier", "raw"]}},
+            {"text": 1, "final_topic": 1}
+        )
+        async for clip in cursor:
+            texts.append(clip["text"])
+            labels.append(clip["final_topic"])
+        trained = TopicClassifier()
+        await asyncio.get_running_loop().run_in_executor(None, trained.partial_fit, texts, labels)
+        self.__dict__.update(trained.__dict__)
+        logger.info(f"Topic classifier trained on {self.num_docs} clips, {len(self.labels)} themes")
+        return self.num_docs
+
+    async def run_periodic(self):
+        """
+        Background task: trains at startup, then every TOPIC_CLASSIFIER_RETRAIN_MINUTES.
+        """
+        while True:
+            try:
+                await self.train_from_db()
+            except Exception as e:
+                logger.error(f"Topic classifier training failed: {e}")
+            if TOPIC_CLASSIFIER_RETRAIN_MINUTES <= 0:
+                return
+            await asyncio.sleep(TOPIC_CLASSIFIER_RETRAIN_MINUTES * 60)
+
+    def stats(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "trained_clips": self.num_docs,
+            "themes": {label: docs for label, docs in zip(self.labels, self.class_docs)},
+            "min_confidence": TOPIC_CLASSIFIER_MIN_CONFIDENCE
+        }
+
+topic_classifier = TopicClassifier()
@@ -0,0 +1,131 @@
+from datetime import datetime
+from typing import Dict, List
+from core.database import get_database
+from core.analysis import merge_new_topics
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Persistent raw topic -> theme mapping (collection `topic_mapping`).
+# Uploads only send topics that were never seen before to Grok, together with the
+# current theme list, so the merge prompt stays small no matter how big the library gets.
+
+# New topics per Grok call (remerge of a whole library runs in batches)
+MERGE_BATCH_SIZE = 40
+
+_indexes_ready = False
+
+async def _collection():
+    global _indexes_ready
+    db = await get_database()
+    if not _indexes_ready:
+        await db.topic_mapping.create_index("raw_topic", unique=True)
+        await db.topic_mapping.create_index("theme")
+        _indexes_ready = True
+        # First start: seed from clips that were merged before the mapping existed
+        if await db.topic_mapping.estimated_document_count() == 0:
+            await seed_from_clips()
+    return db.topic_mapping
+
+async def seed_from_clips() -> int:
+    """
+    Builds the mapping from existing clips (raw_topic -> final_topic).
+    """
+    db = await get_database()
+    pipeline = [
+        {"$match": {"raw_topic": {"$ne": None}, "final_topic": {"$ne": None}}},
+        {"$group": {"_id": "$raw_topic", "theme": {"$last": "$final_topic"}}}
+    ]
+    seeded = 0
+    async for doc in db.clips.aggregate(pipeline):
+        result = await db.topic_mapping.update_one(
+            {"raw_topic": doc["_id"]},
+            {"$setOnInsert": {"theme": doc["theme"], "source": "clips", "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+        seeded += 1 if result.upserted_id else 0
+    if seeded:
+        logger.info(f"Topic mapping seeded with {seeded} topics from existing clips")
+    return seeded
+
+async def current_themes() -> List[str]:
+    """
+    Themes in use: merged_themes with clips plus everything in the mapping.
+    """
+    db = await get_database()
+    collection = await _collection()
+    themes = set(await collection.distinct("theme"))
+    async for doc in db.merged_themes.find({"count": {"$gt": 0}}, {"name": 1}):
+        themes.add(doc["name"])
+    return sorted(themes)
+
+async def set_mapping(mapping: Dict[str, str], source: str = "manual"):
+    """
+    Overwrites mapping entries (manual merges, full remerge).
+    """
+    collection = await _collection()
+    now = datetime.utcnow()
+    for raw_topic, theme in mapping.items():
+        await collection.update_one(
+            {"raw_topic": raw_topic},
+            {"$set": {"theme": theme, "source": source, "updated_at": now},
+             "$setOnInsert": {"created_at": now}},
+            upsert=True
+        )
+
+async def resolve_themes(raw_topics: List[str]) -> Dict[str, str]:
+    """
+    Returns {raw_topic: theme} for the given topics.
+    Known topics come from the mapping; only unseen ones go to Grok.
+    Topics Grok could not assign are left out.
+    """
+    topics = sorted(set(t for t in raw_topics if t))
+    if not topics:
+        return {}
+
+    collection = await _collection()
+    mapping = {}
+    async for doc in collection.find({"raw_topic": {"$in": topics}}):
+        mapping[doc["raw_topic"]] = doc["theme"]
+
+    new_topics = [t for t in topics if t not in mapping]
+    if new_topics:
+        themes = await current_themes()
+        for i in range(0, len(new_topics), MERGE_BATCH_SIZE):
+            batch = new_topics[i:i + MERGE_BATCH_SIZE]
+            merged = await merge_new_topics(batch, themes)
+            if not merged:
+                # Grok failed: keep the raw topic for now, it is retried on the next upload
+                logger.warning(f"Topic merge failed for {len(batch)} new topics")
+                continue
+            now = datetime.utcnow()
+            for raw_topic, theme in merged.items():
+                # $setOnInsert: a concurrent upload may have mapped the same topic already
+                await collection.update_one(
+                    {"raw_topic": raw_topic},
+                    {"$setOnInsert": {"theme": theme, "source": "grok", "created_at": now}},
+                    upsert=True
+                )
+            async for doc in collection.find({"raw_topic": {"$in": list(merged)}}):
+                mapping[doc["raw_topic"]] = doc["theme"]
+            themes = sorted(set(themes) | set(mapping.values()))
+
+    return {t: mapping[t] for t in topics if t in mapping}
+
+async def assign_theme(clip_id, theme: str, **fields):
+    """
+    Sets a clip's theme and moves its count in merged_themes from the old theme
+    to the new one (idempotent: re-assigning the same theme changes nothing).
+    """
+    db = await get_database()
+    previous = await db.clips.find_one_and_update(
+        {"_id": clip_id},
+        {"$set": {"final_topic": theme, "topic": theme, **fields}}
+    )
+    old_theme = previous.get("final_topic") if previous else None
+    if old_theme == theme:
+        return
+    if old_theme:
+        await db.merged_themes.update_one({"name": old_theme}, {"$inc": {"count": -1}})
+        await db.merged_themes.delete_many({"count": {"$lte": 0}})
+    await db.merged_themes.update_one({"name": theme}, {"$inc": {"count": 1}}, upsert=True)
@@ -1,25 +1,276 @@
-import whisper
 import os
+import gc
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict
+from core import vad, transcript_cache
 
-# Load model once (global)
-# Warning: This consumes significant memory.
-try:
-    model = whisper.load_model("large-v3")
-except Exception as e:
-    print(f"Error loading Whisper model: {e}. Fallback to 'base' for dev.")
-    model = whisper.load_model("base")
+# Whisper model size (tiny, base, small, medium, large-v3, ...)
+# Warning: large-v3 needs ~10 GB RAM per worker process.
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "large-v3")
+# Used if a model cannot be loaded (e.g. not enough RAM)
+WHISPER_FALLBACK_MODEL = os.getenv("WHISPER_FALLBACK_MODEL", "base")
+# RAM for loaded models per worker process, least recently used models are unloaded (0 = no limit)
+WHISPER_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", "0"))
+# A model that failed to load is not tried again for this long, its profile uses the fallback
+FALLBACK_COOLDOWN_SEC = 600
 
-def transcribe_clip(file_path: str):
+# Our content is German: pinning the language skips Whisper's detection pass ("" = detect)
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "de") or None
+# Vocabulary hint (names and recurring terms are spelled like this)
+WHISPER_INITIAL_PROMPT = os.getenv("WHISPER_INITIAL_PROMPT", "Hey Mark! Ein Tipp für den Alltag.") or None
+DICTATION_MODEL = os.getenv("WHISPER_DICTATION_MODEL", "base")
+
+# Transcription profiles: callers pick a profile, not a model size or decode options.
+# word_timestamps costs an extra alignment pass; ingest only needs segment times.
+PROFILES = {
+    # Short voice prompts: small model, greedy decoding, no timestamps
+    "dictation": {
+        "model": DICTATION_MODEL,
+        "options": {"language": WHISPER_LANGUAGE, "initial_prompt": WHISPER_INITIAL_PROMPT,
+                    "temperature": (0.0, 0.4, 0.8), "beam_size": None, "best_of": None,
+                    "word_timestamps": False, "condition_on_previous_text": False},
+    },
+    # Uploads: big model, beam search, full temperature fallback
+    "archive": {
+        "model": WHISPER_MODEL,
+        "options": {"language": WHISPER_LANGUAGE, "initial_prompt": WHISPER_INITIAL_PROMPT,
+                    "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0), "beam_size": 5, "best_of": 5,
+                    "word_timestamps": False, "condition_on_previous_text": True},
+    },
+    # Bulk re-transcription when speed matters more than accuracy
+    "fast": {
+        "model": DICTATION_MODEL,
+        "options": {"language": WHISPER_LANGUAGE, "initial_prompt": WHISPER_INITIAL_PROMPT,
+                    "temperature": (0.0,), "beam_size": None, "best_of": None,
+                    "word_timestamps": False, "condition_on_previous_text": False},
+    },
+}
+
+# Rough RAM need before loading (fp32 weights + overhead), used to make room in advance
+MODEL_SIZES_MB = {
+    "tiny": 150, "tiny.en": 150,
+    "base": 300, "base.en": 300,
+    "small": 1000, "small.en": 1000,
+    "medium": 3000, "medium.en": 3000,
+    "turbo": 3300, "large-v3-turbo": 3300,
+    "large": 6300, "large-v1": 6300, "large-v2": 6300, "large-v3": 6300,
+}
+
+def resolve_model(profile: str = None) -> str:
+    """
+    Profile name ("dictation", "archive", "fast") or model name -> model name.
+    """
+    if not profile:
+        return PROFILES["archive"]["model"]
+    return PROFILES[profile]["model"] if profile in PROFILES else profile
+
+def decode_options(profile: str = None) -> Dict:
+    """
+    Whisper options of a profile (plain model names get the archive options).
+    """
+    return dict(PROFILES.get(profile or "archive", PROFILES["archive"])["options"])
+
+def _model_size_mb(model) -> int:
+    return int(sum(p.numel() * p.element_size() for p in model.parameters()) / (1024 * 1024))
+
+class ModelRegistry:
+    """
+    Loads Whisper models on first use (never at import time) and keeps several of them,
+    least recently used first out when WHISPER_MEMORY_BUDGET_MB would be exceeded.
+    """
+    def __init__(self, budget_mb: int = WHISPER_MEMORY_BUDGET_MB):
+        self.budget_mb = budget_mb
+        self.models = OrderedDict()   # loaded name -> model
+        self.sizes = {}               # loaded name -> MB
+        self.aliases = {}             # requested name -> loaded name (differs after a fallback)
+        self.failed = {}              # model name that failed to load -> time of the failure
+        self.lock = threading.Lock()
+
+    def _used_mb(self) -> int:
+        return sum(self.sizes.values())
+
+    def _make_room(self, needed_mb: int, keep: str = None):
+        if not self.budget_mb:
+            return
+        for name in list(self.models):
+            if self._used_mb() + needed_mb <= self.budget_mb:
+                break
+            if name == keep:
+                continue
+            print(f"Unloading Whisper model '{name}' (memory budget {self.budget_mb} MB)")
+            del self.models[name]
+            del self.sizes[name]
+        gc.collect()
+
+    def _load(self, name: str):
+        import whisper
+        self._make_room(MODEL_SIZES_MB.get(name, 0))
+        print(f"Loading Whisper model '{name}'...")
+        model = whisper.load_model(name)
+        self.models[name] = model
+        self.sizes[name] = _model_size_mb(model)
+        # Real size may differ from the estimate
+        self._make_room(0, keep=name)
+        return model
+
+    def _fallback(self):
+        if WHISPER_FALLBACK_MODEL in self.models:
+            self.models.move_to_end(WHISPER_FALLBACK_MODEL)
+            return self.models[WHISPER_FALLBACK_MODEL]
+        return self._load(WHISPER_FALLBACK_MODEL)
+
+    def get(self, profile: str = None):
+        name = resolve_model(profile)
+        with self.lock:
+            failed_at = self.failed.get(name)
+            cooling_down = failed_at is not None and time.monotonic() - failed_at < FALLBACK_COOLDOWN_SEC
+            if failed_at is not None and not cooling_down:
+                # Cooldown over: the original model gets another try
+                del self.failed[name]
+                self.aliases.pop(name, None)
+            loaded_name = self.aliases.get(name, name)
+            if loaded_name in self.models:
+                self.models.move_to_end(loaded_name)
+                return self.models[loaded_name]
+            if cooling_down:
+                # The fallback was unloaded meanwhile: no new attempt at the failed model
+                return self._fallback()
+            try:
+                model = self._load(name)
+                self.aliases[name] = name
+                self.failed.pop(name, None)
+            except Exception as e:
+                if name == WHISPER_FALLBACK_MODEL:
+                    raise
+                print(f"Error loading Whisper model '{name}': {e}. Fallback to '{WHISPER_FALLBACK_MODEL}' "
+                      f"for {FALLBACK_COOLDOWN_SEC // 60} min.")
+                self.aliases[name] = WHISPER_FALLBACK_MODEL
+                self.failed[name] = time.monotonic()
+                model = self._fallback()
+            return model
+
+    def model_name(self, profile: str = None) -> str:
+        """
+        Name of the model that serves this profile (after a fallback: the fallback model).
+        """
+        name = resolve_model(profile)
+        return self.aliases.get(name, name)
+
+    def info(self):
+        return {
+            "loaded": {name: self.sizes[name] for name in self.models},
+            "aliases": dict(self.aliases),
+            "failed_sec_ago": {name: round(time.monotonic() - failed_at) for name, failed_at in self.failed.items()},
+            "budget_mb": self.budget_mb
+        }
+
+registry = ModelRegistry()
+
+def warm_up(profiles=("archive",)):
+    """
+    Loads the models for the given profiles ahead of the first request.
+    """
+    for profile in profiles:
+        registry.get(profile)
+    return {"pid": os.getpid(), **registry.info()}
+
+def transcribe_clip(audio, profile: str = "archive", use_cache: bool = True):
     """
     Transcribes a single audio clip using Whisper.
-    Returns the text and language.
+    audio is a file path or a 16 kHz mono float32 NumPy array (see core.pcm).
+    profile is a transcription profile ("dictation", "archive", "fast", see PROFILES) or a model name.
+    Silence is cut out before Whisper (core.vad), timestamps refer to the original audio.
+    Results are cached on disk by audio content, model and options (core.transcript_cache).
+    Returns the text, language, segments and the skipped seconds.
     """
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"File not found: {file_path}")
-        
-    result = model.transcribe(file_path, word_timestamps=True)
-    return {
+    if isinstance(audio, str):
+        if not os.path.exists(audio):
+            raise FileNotFoundError(f"File not found: {audio}")
+        # Same decoding Whisper does internally (ffmpeg, 16 kHz mono)
+        import whisper
+        audio = whisper.load_audio(audio)
+
+    options = decode_options(profile)
+    cache_options = {**options, "vad": vad.settings()}
+    audio_sha256 = None
+    if use_cache and transcript_cache.enabled():
+        audio_sha256 = transcript_cache.audio_hash(audio)
+        cached = transcript_cache.get(transcript_cache.cache_key(audio_sha256, registry.model_name(profile), cache_options))
+        if cached:
+            return cached
+
+    timeline = None
+    skipped_sec = 0.0
+    # Removed ranges, so chunked transcription can count overlapping windows once (core.chunking)
+    skipped = []
+    if vad.available():
+        regions = vad.speech_regions(audio)
+        if not regions:
+            return {"text": "", "language": None, "segments": [], "vad_skipped_sec": round(len(audio) / vad.SAMPLE_RATE, 2),
+                    "vad_skipped": [[0.0, round(len(audio) / vad.SAMPLE_RATE, 3)]]}
+        speech_sec = sum(end - start for start, end in regions) / vad.SAMPLE_RATE
+        if len(audio) / vad.SAMPLE_RATE - speech_sec >= vad.MIN_SKIP_SEC:
+            original_len = len(audio)
+            audio, timeline = vad.compact(audio, regions)
+            skipped_sec = (original_len - len(audio)) / vad.SAMPLE_RATE
+            skipped = vad.skipped_ranges(regions, original_len)
+
+    model = registry.get(profile)
+    result = model.transcribe(audio, **options)
+    transcription = {
         "text": result["text"],
         "language": result["language"],
         "segments": result["segments"]
     }
+    if timeline:
+        transcription = vad.remap(transcription, timeline)
+    transcription["vad_skipped_sec"] = round(skipped_sec, 2)
+    transcription["vad_skipped"] = skipped
+    if audio_sha256:
+        # Model name after loading (a fallback model gets its own entries)
+        try:
+            transcript_cache.put(transcript_cache.cache_key(audio_sha256, registry.model_name(profile), cache_options), transcription)
+        except OSError as e:
+            print(f"Transcript cache store failed: {e}")
+    return transcription
+
+def transcribe_audio(file_path: str, chunk_duration: float = 300, overlap: float = 5,
+                     profile: str = "archive", workers: int = None):
+    """
+    Transcribes a (long) audio file in overlapping chunks on `workers` processes
+    (default TRANSCRIBE_WORKERS) and stitches the result. For scripts; the API
+    uses core.workers.transcribe_pcm_chunked on its shared worker pool.
+    """
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    from core.pcm import decode_to_pcm, load_pcm, remove_pcm
+    from core.chunking import plan_windows, stitch
+    from core.workers import transcribe_pcm, TRANSCRIBE_WORKERS
+
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    workers = workers or TRANSCRIBE_WORKERS
+    fd, pcm_path = tempfile.mkstemp(suffix=".f32")
+    os.close(fd)
+    try:
+        pcm = decode_to_pcm(file_path, pcm_path)
+        windows = plan_windows(pcm["duration_sec"], chunk_duration, overlap)
+        if len(windows) == 1 or workers == 1:
+            import numpy as np
+            results = [transcribe_clip(np.array(load_pcm(pcm_path, start, end)), profile) for start, end in windows]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(windows))) as pool:
+                results = list(pool.map(
+                    transcribe_pcm,
+                    [pcm_path] * len(windows),
+                    [start for start, _ in windows],
+                    [end for _, end in windows],
+                    [profile] * len(windows)
+                ))
+    finally:
+        remove_pcm(pcm_path)
+
+    return results[0] if len(windows) == 1 else stitch(results, windows)
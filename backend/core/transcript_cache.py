@@ -0,0 +1,106 @@
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+import numpy as np
+from typing import Dict, Optional
+
+# On-disk cache for Whisper results, shared by all worker processes.
+# Key: hash of the decoded audio samples + model + transcription options,
+# value: gzipped JSON with text, language and compact segments.
+TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", "uploads/cache/transcripts")
+# Size limit, least recently used entries are deleted first (0 = cache disabled)
+TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "500"))
+# Size check runs every N stores, not on every write
+EVICT_CHECK_EVERY = 20
+
+_stores_since_check = 0
+
+def enabled() -> bool:
+    return TRANSCRIPT_CACHE_MAX_MB > 0
+
+def audio_hash(audio: np.ndarray) -> str:
+    return hashlib.sha256(np.ascontiguousarray(audio, dtype=np.float32).tobytes()).hexdigest()
+
+def cache_key(audio_sha256: str, model_name: str, options: Dict) -> str:
+    payload = json.dumps({"audio": audio_sha256, "model": model_name, "options": options}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _path(key: str) -> str:
+    return os.path.join(TRANSCRIPT_CACHE_DIR, key[:2], f"{key}.json.gz")
+
+def _compact(transcription: Dict) -> Dict:
+    """
+    Drops Whisper internals (tokens, logprobs, ...) and rounds timestamps.
+    """
+    segments = []
+    for segment in transcription.get("segments", []):
+        compact = {"start": round(segment["start"], 3), "end": round(segment["end"], 3), "text": segment["text"]}
+        if segment.get("words"):
+            compact["words"] = [
+                {"word": w["word"], "start": round(w["start"], 3), "end": round(w["end"], 3),
+                 "probability": round(w.get("probability", 0), 3)}
+                for w in segment["words"]
+            ]
+        segments.append(compact)
+    return {**transcription, "segments": segments}
+
+def get(key: str) -> Optional[Dict]:
+    path = _path(key)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            transcription = json.load(f)
+        # Access time for LRU eviction (atime is often disabled on the filesystem)
+        os.utime(path)
+        return transcription
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+
+def put(key: str, transcription: Dict):
+    global _stores_since_check
+    path = _path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write + rename, so other worker processes never read a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+            json.dump(_compact(transcription), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    _stores_since_check += 1
+    if _stores_since_check >= EVICT_CHECK_EVERY:
+        _stores_since_check = 0
+        evict()
+
+def evict() -> int:
+    """
+    Deletes least recently used entries until the cache is below TRANSCRIPT_CACHE_MAX_MB.
+    """
+    entries = []
+    for root, _, files in os.walk(TRANSCRIPT_CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    limit = TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
@@ -1,19 +1,36 @@
 import os
 import requests
 from dotenv import load_dotenv
+from core import tts_cache
 
 load_dotenv()
 
 ELEVEN_API_KEY = os.getenv("ELEVEN_API_KEY")
 ELEVEN_VOICE_ID = os.getenv("ELEVEN_VOICE_ID")
+MODEL_ID = "eleven_multilingual_v2"
+VOICE_SETTINGS = {
+    "stability": 0.75,
+    "similarity_boost": 0.9
+}
 
 def generate_audio_stream(text: str):
     """
     Generates audio from text using ElevenLabs API and yields chunks.
+    Repeated texts are served from the TTS cache (see core.tts_cache).
     """
     if not ELEVEN_API_KEY or not ELEVEN_VOICE_ID:
         raise ValueError("ElevenLabs API Key or Voice ID not set")
 
+    key = tts_cache.cache_key(text, ELEVEN_VOICE_ID, MODEL_ID, VOICE_SETTINGS)
+    cached_path = tts_cache.get(key)
+    if cached_path:
+        yield from tts_cache.read(cached_path)
+        return
+
+    # First request: stream to the client and into the cache at the same time
+    yield from tts_cache.tee(key, _elevenlabs_stream(text))
+
+def _elevenlabs_stream(text: str):
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVEN_VOICE_ID}/stream"
     
     headers = {
@@ -24,11 +41,8 @@ def generate_audio_stream(text: str):
     
     data = {
         "text": text,
-        "model_id": "eleven_multilingual_v2",
-        "voice_settings": {
-            "stability": 0.75,
-            "similarity_boost": 0.9
-        }
+        "model_id": MODEL_ID,
+        "voice_settings": VOICE_SETTINGS
     }
     
     response = requests.post(url, json=data, headers=headers, stream=True)
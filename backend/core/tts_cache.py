@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from typing import Dict, Iterable, Iterator, Optional
+
+# On-disk cache for synthesized speech (MP3), so replaying or saving a
+# suggestion does not call ElevenLabs again.
+# Key: hash of text + voice + model + voice settings.
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "uploads/cache/tts")
+# Size limit, least recently used entries are deleted first (0 = cache disabled)
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "200"))
+# Size check runs every N stores, not on every write
+EVICT_CHECK_EVERY = 20
+CHUNK_SIZE = 64 * 1024
+
+_stores_since_check = 0
+
+def enabled() -> bool:
+    return TTS_CACHE_MAX_MB > 0
+
+def cache_key(text: str, voice_id: str, model_id: str, voice_settings: Dict) -> str:
+    payload = json.dumps({"text": text, "voice": voice_id, "model": model_id, "settings": voice_settings},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _path(key: str) -> str:
+    return os.path.join(TTS_CACHE_DIR, key[:2], f"{key}.mp3")
+
+def get(key: str) -> Optional[str]:
+    """
+    Path of the cached audio, or None.
+    """
+    if not enabled():
+        return None
+    path = _path(key)
+    try:
+        # Access time for LRU eviction (atime is often disabled on the filesystem)
+        os.utime(path)
+        return path
+    except FileNotFoundError:
+        return None
+
+def read(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            yield chunk
+
+def tee(key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Passes the chunks through unchanged while writing them to the cache.
+    Only a complete stream is stored (not one aborted by the client or upstream).
+    """
+    global _stores_since_check
+    if not enabled():
+        yield from chunks
+        return
+
+    path = _path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    complete = False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        complete = True
+    finally:
+        if complete:
+            # Write + rename, concurrent readers never see a half-written file
+            os.replace(tmp_path, path)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _stores_since_check += 1
+    if _stores_since_check >= EVICT_CHECK_EVERY:
+        _stores_since_check = 0
+        evict()
+
+def evict() -> int:
+    """
+    Deletes least recently used entries until the cache is below TTS_CACHE_MAX_MB.
+    """
+    entries = []
+    for root, _, files in os.walk(TTS_CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            # Stream still being written (left-overs of a crash count after an hour)
+            if name.endswith(".tmp") and time.time() - stat.st_mtime < 3600:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    limit = TTS_CACHE_MAX_MB * 1024 * 1024
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
@@ -0,0 +1,127 @@
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+# Voice activity detection before Whisper: only speech regions (plus padding) are
+# transcribed, the dead air in between is cut out. Timestamps of the result are
+# mapped back to the original timeline afterwards.
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") == "1"
+# 0 (least aggressive) .. 3 (filters the most non-speech)
+VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", "2"))
+# Speech kept before/after every region, so word onsets are not clipped
+VAD_PADDING_MS = int(os.getenv("VAD_PADDING_MS", "300"))
+# Pauses shorter than this are kept (not worth a cut)
+VAD_MIN_GAP_MS = int(os.getenv("VAD_MIN_GAP_MS", "1000"))
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+# Silence inserted between joined regions so Whisper still hears a pause
+JOIN_GAP_SEC = 0.3
+# Below this much removable silence the audio is transcribed unchanged
+MIN_SKIP_SEC = 2.0
+
+def available() -> bool:
+    return VAD_ENABLED and webrtcvad is not None
+
+def settings() -> Optional[Dict]:
+    """
+    Everything that changes the VAD output (part of the transcription cache key).
+    """
+    if not available():
+        return None
+    return {"aggressiveness": VAD_AGGRESSIVENESS, "padding_ms": VAD_PADDING_MS, "min_gap_ms": VAD_MIN_GAP_MS}
+
+def speech_regions(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                   aggressiveness: int = VAD_AGGRESSIVENESS) -> List[Tuple[int, int]]:
+    """
+    Speech regions as (start_sample, end_sample), padded and with short pauses merged.
+    """
+    vad = webrtcvad.Vad(aggressiveness)
+    frame_len = sample_rate * FRAME_MS // 1000
+    num_frames = len(samples) // frame_len
+    pcm16 = (np.clip(samples[:num_frames * frame_len], -1.0, 1.0) * 32767).astype(np.int16)
+    frames = pcm16.reshape(num_frames, frame_len)
+    # Digital silence cannot be speech, no need to ask the VAD
+    has_signal = np.any(frames != 0, axis=1)
+    speech = np.zeros(num_frames, dtype=bool)
+    for i in np.flatnonzero(has_signal):
+        speech[i] = vad.is_speech(frames[i].tobytes(), sample_rate)
+
+    # Frame runs -> sample ranges
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame_len
+    ends = np.flatnonzero(edges == -1) * frame_len
+
+    padding = VAD_PADDING_MS * sample_rate // 1000
+    min_gap = VAD_MIN_GAP_MS * sample_rate // 1000
+    regions = []
+    for start, end in zip(starts, ends):
+        start, end = max(0, int(start) - padding), min(len(samples), int(end) + padding)
+        if regions and start - regions[-1][1] < min_gap:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+def compact(samples: np.ndarray, regions: List[Tuple[int, int]], sample_rate: int = SAMPLE_RATE):
+    """
+    Joins the speech regions into one array.
+    Returns (audio, timeline) with timeline entries (compact_start_sec, original_start_sec, length_sec).
+    """
+    gap = np.zeros(int(JOIN_GAP_SEC * sample_rate), dtype=np.float32)
+    parts, timeline = [], []
+    position = 0
+    for i, (start, end) in enumerate(regions):
+        if i:
+            parts.append(gap)
+            position += len(gap)
+        parts.append(np.asarray(samples[start:end], dtype=np.float32))
+        timeline.append((position / sample_rate, start / sample_rate, (end - start) / sample_rate))
+        position += end - start
+    return np.concatenate(parts), timeline
+
+def skipped_ranges(regions: List[Tuple[int, int]], total_samples: int,
+                   sample_rate: int = SAMPLE_RATE) -> List[List[float]]:
+    """
+    [start_sec, end_sec] ranges compact() removes. The JOIN_GAP_SEC kept between two
+    regions is not counted, so the lengths add up to the skipped seconds.
+    """
+    bounds = [0] + [sample for region in regions for sample in region] + [total_samples]
+    ranges = []
+    for i in range(0, len(bounds), 2):
+        start, end = bounds[i] / sample_rate, bounds[i + 1] / sample_rate
+        if 0 < i < len(bounds) - 2:
+            # Inner gap: the joining silence stays in the middle
+            start, end = start + JOIN_GAP_SEC / 2, end - JOIN_GAP_SEC / 2
+        if end > start:
+            ranges.append([round(start, 3), round(end, 3)])
+    return ranges
+
+def _to_original(t: float, timeline: List[Tuple[float, float, float]]) -> float:
+    # Region that contains t (times in the join gap snap to the end of the previous region)
+    for compact_start, original_start, length in reversed(timeline):
+        if t >= compact_start:
+            return original_start + min(t - compact_start, length)
+    return timeline[0][1]
+
+def remap(result: Dict, timeline: List[Tuple[float, float, float]]) -> Dict:
+    """
+    Maps segment and word timestamps of a Whisper result back to the original audio.
+    """
+    segments = []
+    for segment in result.get("segments", []):
+        segment = dict(segment)
+        segment["start"] = _to_original(segment["start"], timeline)
+        segment["end"] = _to_original(segment["end"], timeline)
+        if segment.get("words"):
+            segment["words"] = [
+                {**word, "start": _to_original(word["start"], timeline), "end": _to_original(word["end"], timeline)}
+                for word in segment["words"]
+            ]
+        segments.append(segment)
+    return {**result, "segments": segments}
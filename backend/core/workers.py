@@ -0,0 +1,247 @@
+import os
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# CPU lane: Whisper + ffmpeg run in separate processes so the event loop stays free
+# (2 by default, both shared by uploads and dictation, see INTERACTIVE_RESERVED_SLOTS)
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "2"))
+# 0 = let torch decide
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "0"))
+# Load Whisper in the background right after startup (0 = load on first use)
+WHISPER_WARMUP = os.getenv("WHISPER_WARMUP", "1") == "1"
+# Slots of the pool that only interactive work (dictation) may use (0 = all shared).
+# Only applied from RESERVE_MIN_WORKERS workers on, so bulk ingest keeps at least two processes
+INTERACTIVE_RESERVED_SLOTS = int(os.getenv("INTERACTIVE_RESERVED_SLOTS", "1"))
+# Admission control: max waiting tasks per lane (0 = unlimited). Interactive work
+# is rejected with SchedulerBusy, bulk work waits for room (backpressure on ingest)
+MAX_PENDING = {
+    "interactive": int(os.getenv("MAX_PENDING_INTERACTIVE", "8")),
+    "bulk": int(os.getenv("MAX_PENDING_BULK", "0")),
+}
+# Long audio is transcribed in overlapping windows of this length, in parallel
+TRANSCRIBE_CHUNK_SEC = float(os.getenv("TRANSCRIBE_CHUNK_SEC", "120"))
+TRANSCRIBE_OVERLAP_SEC = float(os.getenv("TRANSCRIBE_OVERLAP_SEC", "5"))
+# Transcription profiles preloaded by the warm-up (see core.transcriber.PROFILES)
+WHISPER_WARMUP_PROFILES = [t.strip() for t in os.getenv("WHISPER_WARMUP_PROFILES", "archive,dictation").split(",") if t.strip()]
+
+# Smaller pools share all slots (dictation still overtakes queued clips)
+RESERVE_MIN_WORKERS = 3
+
+_cpu_pool = None
+
+# Warm-up state for /ready: cold -> loading -> ready | error
+whisper_state = {"status": "cold", "workers": [], "error": None}
+
+def _init_cpu_worker(torch_threads: int):
+    """
+    Runs once in every CPU worker process.
+    """
+    if torch_threads > 0:
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = ProcessPoolExecutor(
+            max_workers=TRANSCRIBE_WORKERS,
+            initializer=_init_cpu_worker,
+            initargs=(TORCH_NUM_THREADS,)
+        )
+        logger.info(f"Started CPU worker pool: {TRANSCRIBE_WORKERS} processes, torch threads={TORCH_NUM_THREADS or 'auto'}")
+        if scheduler.reserved_interactive == 0:
+            logger.info(f"No slot reserved for dictation (needs TRANSCRIBE_WORKERS >= {RESERVE_MIN_WORKERS} and "
+                        "INTERACTIVE_RESERVED_SLOTS >= 1): dictation waits behind running clips")
+    return _cpu_pool
+
+class SchedulerBusy(Exception):
+    """
+    Raised when a lane's wait queue is full (admission control).
+    """
+
+# Lower number = dispatched first
+LANES = {"interactive": 0, "bulk": 1}
+
+class CPUScheduler:
+    """
+    Priority scheduler in front of the process pool. Tasks are only handed to the pool
+    when a worker is free, so interactive work (dictation) overtakes queued bulk work
+    (ingest) at every task boundary - bulk ingest is submitted clip by clip.
+    A running Whisper call is never interrupted.
+    """
+    def __init__(self, slots: int, reserved_interactive: int = 0):
+        self.slots = slots
+        # Reserving in a small pool would leave bulk work a single process;
+        # otherwise at least one slot stays usable for bulk work
+        if slots < RESERVE_MIN_WORKERS:
+            reserved_interactive = 0
+        self.reserved_interactive = min(reserved_interactive, slots - 1)
+        self.queue = []
+        self.counter = itertools.count()
+        self.running = {lane: 0 for lane in LANES}
+        self.pending = {lane: 0 for lane in LANES}
+        self.stats_counters = {lane: {"completed": 0, "rejected": 0} for lane in LANES}
+        self.waits = {lane: deque(maxlen=200) for lane in LANES}
+        # Bulk submitters blocked by MAX_PENDING_BULK, woken when a task leaves the queue
+        self.room_waiters = {lane: deque() for lane in LANES}
+
+    def _can_start(self, lane: str) -> bool:
+        if sum(self.running.values()) >= self.slots:
+            return False
+        if lane == "bulk" and self.running["bulk"] >= self.slots - self.reserved_interactive:
+            return False
+        return True
+
+    def _dispatch(self):
+        while self.queue:
+            priority, seq, lane, fn, args, future, queued_at = self.queue[0]
+            if future.done():
+                # Caller went away (cancelled) while waiting
+                heapq.heappop(self.queue)
+                self.pending[lane] -= 1
+                self._wake(lane)
+                continue
+            if not self._can_start(lane):
+                break
+            heapq.heappop(self.queue)
+            self.pending[lane] -= 1
+            self._wake(lane)
+            self.running[lane] += 1
+            loop = future.get_loop()
+            self.waits[lane].append(loop.time() - queued_at)
+            task = loop.run_in_executor(get_cpu_pool(), fn, *args)
+            task.add_done_callback(lambda t, lane=lane, future=future: self._done(lane, t, future))
+
+    def _done(self, lane: str, task, future):
+        self.running[lane] -= 1
+        self.stats_counters[lane]["completed"] += 1
+        if not future.done():
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        self._dispatch()
+
+    def _wake(self, lane: str):
+        while self.room_waiters[lane]:
+            waiter = self.room_waiters[lane].popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    async def run(self, lane: str, fn, *args):
+        limit = MAX_PENDING.get(lane, 0)
+        if limit and lane == "interactive" and self.pending[lane] >= limit:
+            self.stats_counters[lane]["rejected"] += 1
+            raise SchedulerBusy(f"{lane} queue full ({limit} waiting)")
+        while limit and self.pending[lane] >= limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self.room_waiters[lane].append(waiter)
+            await waiter
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self.queue, (LANES[lane], next(self.counter), lane, fn, args, future, loop.time()))
+        self.pending[lane] += 1
+        self._dispatch()
+        return await future
+
+    def stats(self) -> Dict:
+        lanes = {}
+        for lane in LANES:
+            waits = sorted(self.waits[lane])
+            lanes[lane] = {
+                "running": self.running[lane],
+                "waiting": self.pending[lane],
+                **self.stats_counters[lane],
+                "wait_p50_sec": round(waits[len(waits) // 2], 3) if waits else None,
+                "wait_p95_sec": round(waits[int(len(waits) * 0.95)], 3) if waits else None,
+            }
+        return {"slots": self.slots, "reserved_interactive": self.reserved_interactive, "lanes": lanes}
+
+scheduler = CPUScheduler(TRANSCRIBE_WORKERS, INTERACTIVE_RESERVED_SLOTS)
+
+async def run_cpu(fn, *args, lane: str = "bulk"):
+    """
+    Runs a blocking CPU-heavy function (Whisper, ffmpeg) in the process pool.
+    fn and args must be picklable (module-level functions, plain data).
+    lane: "interactive" (user is waiting) or "bulk" (background ingest).
+    """
+    return await scheduler.run(lane, fn, *args)
+
+def shutdown_pools():
+    global _cpu_pool
+    if _cpu_pool:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
+
+def warm_up_model(profiles):
+    """
+    Worker-side: loads the Whisper models in this process.
+    """
+    from core.transcriber import warm_up
+    return warm_up(profiles)
+
+async def warm_up_workers():
+    """
+    One warm-up task per CPU worker process (they run in parallel, so each process takes one).
+    """
+    whisper_state["status"] = "loading"
+    try:
+        results = await asyncio.gather(*[run_cpu(warm_up_model, WHISPER_WARMUP_PROFILES, lane="interactive") for _ in range(TRANSCRIBE_WORKERS)])
+        whisper_state.update(status="ready", workers=results, error=None)
+        logger.info(f"Whisper warm-up finished: {results}")
+    except Exception as e:
+        whisper_state.update(status="error", error=str(e))
+        logger.error(f"Whisper warm-up failed: {e}")
+
+def transcribe(file_path: str, profile: str = "archive"):
+    """
+    Worker-side entry point for Whisper.
+    Imported lazily so only the worker processes load the model.
+    """
+    from core.transcriber import transcribe_clip
+    return transcribe_clip(file_path, profile)
+
+def transcribe_samples(samples, profile: str = "dictation", use_cache: bool = True):
+    """
+    Transcribes in-memory samples (16 kHz mono float32), e.g. live dictation.
+    """
+    from core.transcriber import transcribe_clip
+    return transcribe_clip(samples, profile, use_cache)
+
+def transcribe_pcm(pcm_path: str, start_sec: float = 0.0, end_sec: float = None, profile: str = "archive"):
+    """
+    Transcribes a slice of a decoded PCM buffer without decoding the file again.
+    """
+    import numpy as np
+    from core.pcm import load_pcm
+    from core.transcriber import transcribe_clip
+    return transcribe_clip(np.array(load_pcm(pcm_path, start_sec, end_sec)), profile)
+
+async def transcribe_pcm_chunked(pcm_path: str, start_sec: float, end_sec: float,
+                                 profile: str = "archive", lane: str = "bulk"):
+    """
+    Like transcribe_pcm, but long slices are split into overlapping windows that run
+    in parallel on the worker pool (and give the scheduler a chance between windows).
+    """
+    from core.chunking import plan_windows, stitch
+    windows = plan_windows(end_sec - start_sec, TRANSCRIBE_CHUNK_SEC, TRANSCRIBE_OVERLAP_SEC)
+    results = await asyncio.gather(*[
+        run_cpu(transcribe_pcm, pcm_path, start_sec + window_start, start_sec + window_end, profile, lane=lane)
+        for window_start, window_end in windows
+    ])
+    if len(windows) == 1:
+        return results[0]
+    return stitch(results, windows)
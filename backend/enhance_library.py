@@ -0,0 +1,67 @@
+"""
+Re-enhance the whole clip library with one preset of the enhancement engine.
+Clips are processed in place on a process pool (one ffmpeg per process), always
+rendered from the pre-enhance original kept in uploads/cache/originals, so running
+several presets one after another does not stack their filters.
+The applied preset is stored in the clip document (enhance_preset); clips that
+already have it are skipped. Finished clips are also recorded in
+uploads/cache/enhance_<preset>.json, so an interrupted run continues where it
+stopped; --restart ignores that state.
+
+Usage: python enhance_library.py [--preset podcast] [--workers N] [--restart]
+"""
+import os
+import asyncio
+import argparse
+from datetime import datetime
+from core.database import db
+from core.audio_enhancer import PRESETS, ENHANCE_WORKERS, enhance_batch
+
+CLIPS_DIR = "uploads/clips"
+
+async def main():
+    parser = argparse.ArgumentParser(description="Re-enhance all clips in uploads/clips")
+    parser.add_argument("--preset", default="podcast", choices=sorted(PRESETS))
+    parser.add_argument("--workers", type=int, default=ENHANCE_WORKERS)
+    parser.add_argument("--restart", action="store_true", help="Ignore the resume state")
+    args = parser.parse_args()
+
+    if not os.path.isdir(CLIPS_DIR):
+        print("No clips directory found.")
+        return
+
+    await db.connect()
+    try:
+        # Clips that already carry this preset are not rendered again
+        current = {}
+        async for clip in db.db.clips.find({"file_name": {"$exists": True}}, {"file_name": 1, "enhance_preset": 1}):
+            current[clip["file_name"]] = clip.get("enhance_preset")
+
+        names = sorted(
+            name for name in os.listdir(CLIPS_DIR)
+            if name.endswith(".mp3") and ".enhancing." not in name and ".cutting." not in name
+        )
+        paths = [os.path.join(CLIPS_DIR, name) for name in names if current.get(name) != args.preset]
+        if len(paths) < len(names):
+            print(f"{len(names) - len(paths)} clips already enhanced with '{args.preset}'")
+
+        state_path = os.path.join("uploads", "cache", f"enhance_{args.preset}.json")
+        if args.restart and os.path.exists(state_path):
+            os.remove(state_path)
+
+        loop = asyncio.get_running_loop()
+        summary = await loop.run_in_executor(None, enhance_batch, paths, args.preset, args.workers, state_path)
+
+        enhanced = [os.path.basename(p) for p in summary["enhanced"]]
+        if enhanced:
+            await db.db.clips.update_many(
+                {"file_name": {"$in": enhanced}},
+                {"$set": {"enhance_preset": args.preset, "enhanced_at": datetime.utcnow()}}
+            )
+        print(f"Done: {summary['done']} enhanced, {summary['failed']} failed, "
+              f"{summary['skipped']} skipped in {summary['seconds']}s")
+    finally:
+        await db.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,12 +1,32 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from core.database import db
+from core.jobs import ingest_queue
+from core.workers import shutdown_pools, warm_up_workers, whisper_state, WHISPER_WARMUP
+from core.storage import storage_manager, STORAGE_GC_INTERVAL_HOURS
+from core.topic_classifier import topic_classifier
+from core.theme_refiner import theme_refiner
+import asyncio
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await db.connect()
+    # Slow startup work runs in the background, the API answers right away (see /ready)
+    background = [asyncio.create_task(topic_classifier.run_periodic()),
+                  asyncio.create_task(theme_refiner.run_periodic())]
+    if WHISPER_WARMUP:
+        background.append(asyncio.create_task(warm_up_workers()))
+    if STORAGE_GC_INTERVAL_HOURS > 0:
+        background.append(asyncio.create_task(storage_manager.run_periodic()))
+    from routers.upload import process_upload
+    await ingest_queue.start(process_upload)
     yield
+    for task in background:
+        task.cancel()
+    await ingest_queue.stop()
+    shutdown_pools()
     await db.close()
 
 app = FastAPI(title="Hey Mark! API", version="3.0", lifespan=lifespan)
@@ -27,15 +47,22 @@ async def root():
 async def health():
     return {"status": "ok"}
 
-from routers import upload, dashboard, tts_clips, custom_prompt, delete_clip, auth
+@app.get("/ready")
+async def ready():
+    """Readiness: Whisper is loaded in the worker processes (or loads lazily if warm-up is off)"""
+    whisper_status = whisper_state["status"] if WHISPER_WARMUP else "lazy"
+    body = {"status": "ready" if whisper_status in ("ready", "lazy") else "not_ready", "whisper": {**whisper_state, "status": whisper_status}}
+    return JSONResponse(body, status_code=200 if body["status"] == "ready" else 503)
+
+from routers import upload, dashboard, tts_clips, custom_prompt, delete_clip, auth, clips
 app.include_router(upload.router)
 app.include_router(dashboard.router)
 app.include_router(tts_clips.router)
 app.include_router(custom_prompt.router)
 app.include_router(delete_clip.router)
 app.include_router(auth.router)
+app.include_router(clips.router)
 
-from fastapi.staticfiles import StaticFiles
 import os
+# Clip audio is served by routers/clips.py (ETag, Range, Opus/AAC variants)
 os.makedirs("uploads/clips", exist_ok=True)
-app.mount("/clips", StaticFiles(directory="uploads/clips"), name="clips")
@@ -4,6 +4,7 @@ Since Grok API is timing out, we'll use a manual mapping for now.
 """
 import asyncio
 from core.database import db as database_instance
+from core.topics import set_mapping
 from collections import Counter
 
 async def manual_merge():
@@ -68,6 +69,9 @@ async def manual_merge():
         updated_count += 1
     
     print(f"Updated {updated_count} clips")
+
+    # Persist the mapping so future uploads reuse these themes
+    await set_mapping(manual_mapping, source="manual")
     
     # Rebuild merged_themes collection
     print("\nRebuilding merged_themes collection...")
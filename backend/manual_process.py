@@ -84,7 +84,7 @@ async def run_recovery():
             
             # D. Analyze with Grok
             print("  -> Analyzing with Grok...")
-            analysis = analyze_text(text)
+            analysis = await analyze_text(text)
             
             # E. Save to DB
             upload_id = clip_name.split("_")[0]
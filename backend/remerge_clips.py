@@ -3,16 +3,20 @@ Re-merge all existing clips with improved category merging.
 This script will:
 1. Fetch all clips from database
 2. Collect their raw topics
-3. Apply new merge_topics logic (max 15 themes)
+3. Resolve themes via the topic mapping (only unmapped topics go to Grok)
+   or, with --full, re-merge every topic from scratch (max 15 themes)
 4. Update all clips with new merged topics
 5. Rebuild merged_themes collection
+
+Usage: python remerge_clips.py [--full]
 """
+import sys
 import asyncio
-from core.database import get_database
 from core.analysis import merge_topics
+from core.topics import resolve_themes, set_mapping
 from collections import Counter
 
-async def remerge_all_clips():
+async def remerge_all_clips(full: bool = False):
     from core.database import db
     await db.connect()
     database = db.db  # Access the db attribute directly
@@ -35,9 +39,16 @@ async def remerge_all_clips():
     
     print(f"Unique topics before merge: {len(set(all_topics))}")
     
-    # Apply new merge logic
-    print("Calling merge_topics with improved logic...")
-    topic_mapping = merge_topics(all_topics)
+    if full:
+        # Full re-merge: one prompt with every topic, overwrites the stored mapping
+        print("Calling merge_topics with all topics...")
+        topic_mapping = await merge_topics(all_topics)
+        # merge_topics falls back to an identity mapping if Grok fails, don't persist that
+        if any(raw != theme for raw, theme in topic_mapping.items()):
+            await set_mapping(topic_mapping, source="remerge")
+    else:
+        print("Resolving themes (only unmapped topics go to Grok)...")
+        topic_mapping = await resolve_themes(all_topics)
     
     print(f"Unique themes after merge: {len(set(topic_mapping.values()))}")
     print(f"Merged themes: {sorted(set(topic_mapping.values()))}")
@@ -81,4 +92,4 @@ async def remerge_all_clips():
     print("\n✅ Re-merge complete!")
 
 if __name__ == "__main__":
-    asyncio.run(remerge_all_clips())
+    asyncio.run(remerge_all_clips(full="--full" in sys.argv))
@@ -1,15 +1,13 @@
-import os
-import sys
-import time
-from pymongo import MongoClient
+import asyncio
+from core.database import db
 from core.grok_client import analyze_text
 
-# Setup MongoDB connection
-MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://mongo:27017")
-client = MongoClient(MONGODB_URL)
-db = client.hey_mark
+async def reprocess_missing_summaries():
+    # Motor connection of the app: clips and the persistent LLM cache
+    # (re-runs are served from llm_cache instead of paying for Grok again)
+    await db.connect()
+    database = db.db
 
-def reprocess_missing_summaries():
     # Find clips without summary or with empty summary
     query = {
         "$or": [
@@ -19,17 +17,18 @@ def reprocess_missing_summaries():
         ]
     }
     
-    missing_count = db.clips.count_documents(query)
+    missing_count = await database.clips.count_documents(query)
     print(f"Found {missing_count} clips with missing summaries.")
     
     if missing_count == 0:
         print("No clips to process.")
+        await db.close()
         return
 
-    cursor = db.clips.find(query)
+    cursor = database.clips.find(query)
     
     processed_count = 0
-    for clip in cursor:
+    async for clip in cursor:
         print(f"Processing clip: {clip.get('file_name', 'Unknown')}")
         
         text = clip.get('text', '')
@@ -38,10 +37,10 @@ def reprocess_missing_summaries():
             continue
             
         try:
-            analysis = analyze_text(text)
+            analysis = await analyze_text(text)
             
             if analysis:
-                db.clips.update_one(
+                await database.clips.update_one(
                     {"_id": clip["_id"]},
                     {"$set": {
                         "topic": analysis.get("topic", "Unknown"),
@@ -56,12 +55,13 @@ def reprocess_missing_summaries():
                 print("  - Analysis returned empty result.")
                 
             # Rate limiting to be safe
-            time.sleep(1)
+            await asyncio.sleep(1)
             
         except Exception as e:
             print(f"  - Error processing clip: {e}")
 
     print(f"Finished. Processed {processed_count} clips.")
+    await db.close()
 
 if __name__ == "__main__":
-    reprocess_missing_summaries()
+    asyncio.run(reprocess_missing_summaries())
@@ -0,0 +1,162 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from core.peaks import generate_peaks, is_stale, read_level
+from core.delivery import FORMATS, negotiate, is_fresh, transcode_variants, variant_path, content_version
+from core.workers import run_cpu, SchedulerBusy
+from typing import Optional, Tuple
+import hashlib
+import json
+import os
+import logging
+
+router = APIRouter()
+logger = logging.getLogger("uvicorn")
+
+CLIPS_DIR = "uploads/clips"
+
+def _clip_path(filename: str) -> str:
+    if not filename or os.path.basename(filename) != filename or filename.startswith("."):
+        raise HTTPException(status_code=400, detail="Ungültiger Dateiname")
+    path = os.path.join(CLIPS_DIR, filename)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Clip nicht gefunden")
+    return path
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Single byte range as (start, end) inclusive, None to send the whole file
+    (no/unsupported header, multiple ranges). Raises 416 if unsatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Ungültiger Bereich", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """
+    If-None-Match check: a list of (weak or strong) entity tags or "*".
+    Weak comparison as required for If-None-Match, W/"x" matches "x".
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in tags
+
+def _iter_file(path: str, start: int, length: int, block_size: int = 64 * 1024):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(block_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+@router.api_route("/clips/{filename}", methods=["GET", "HEAD"])
+async def get_clip_audio(filename: str, request: Request, format: str = None, v: str = None):
+    """
+    Clip audio with ETag, Range support and format negotiation.
+    format: mp3 (original), opus or aac; without it the Accept header decides.
+    v: content version (from /segments/all audio_url); a matching v makes the response immutable.
+    """
+    clip_path = _clip_path(filename)
+    if format is not None and format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Format, erlaubt: {', '.join(FORMATS)}")
+
+    fmt = negotiate(request.headers.get("accept"), format)
+    if fmt != "mp3" and not is_fresh(clip_path, fmt):
+        # Clips from before variant transcoding get their variants on first request
+        try:
+            await run_cpu(transcode_variants, clip_path, [fmt], lane="interactive")
+        except (SchedulerBusy, RuntimeError) as e:
+            logger.warning(f"Serving MP3 for {filename}, variant {fmt} unavailable: {e}")
+            fmt = "mp3"
+
+    path = variant_path(clip_path, fmt)
+    # Hashing an unknown file reads it completely, not on the event loop
+    clip_version = await run_in_threadpool(content_version, clip_path)
+    size = os.path.getsize(path)
+    etag = f'"{await run_in_threadpool(content_version, path) if fmt != "mp3" else clip_version}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # Versioned URLs never change their content, unversioned ones are revalidated (cheap 304)
+        "Cache-Control": "public, max-age=31536000, immutable" if v == clip_version else "public, no-cache",
+        "Vary": "Accept",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range == etag:
+        byte_range = _parse_range(request.headers.get("range"), size)
+
+    media_type = FORMATS[fmt]["media_type"]
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        status_code, length = 206, end - start + 1
+    else:
+        status_code, start, length = 200, 0, size
+    headers["Content-Length"] = str(length)
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(_iter_file(path, start, length), status_code=status_code,
+                             headers=headers, media_type=media_type)
+
+@router.get("/clips/{filename}/peaks")
+async def get_clip_peaks(filename: str, request: Request, bins: int = 0, format: str = "binary"):
+    """
+    Waveform peaks of a clip: interleaved (min, max) int8 pairs, -127..127 = full scale.
+    bins: smallest resolution the client needs (the coarsest level with at least that many pairs is returned).
+    format=json returns the same data as a list.
+    """
+    clip_path = _clip_path(filename)
+    if is_stale(clip_path):
+        # Clips from before peak precomputation (or re-enhanced ones) get their peaks on first request
+        try:
+            await run_cpu(generate_peaks, clip_path, lane="interactive")
+        except SchedulerBusy:
+            raise HTTPException(status_code=503, detail="Server ausgelastet, bitte später erneut versuchen")
+        except RuntimeError as e:
+            logger.error(f"Peak generation failed for {filename}: {e}")
+            raise HTTPException(status_code=422, detail="Audio konnte nicht dekodiert werden")
+
+    level = read_level(clip_path, bins)
+    etag = '"' + hashlib.sha1(level["data"]).hexdigest()[:20] + ('-json' if format == "json" else '') + '"'
+    headers = {
+        "ETag": etag,
+        # Peaks only change when the clip is re-enhanced, the ETag catches that on revalidation
+        "Cache-Control": "public, max-age=604800, stale-while-revalidate=86400",
+        "X-Peaks-Count": str(level["peaks"]),
+        "X-Peaks-Per-Second": str(level["peaks_per_sec"]),
+        "X-Peaks-Duration": str(level["duration_sec"]),
+        "Access-Control-Expose-Headers": "ETag, X-Peaks-Count, X-Peaks-Per-Second, X-Peaks-Duration",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if format == "json":
+        body = {
+            "peaks": level["peaks"],
+            "peaks_per_sec": level["peaks_per_sec"],
+            "duration_sec": level["duration_sec"],
+            "data": list(memoryview(level["data"]).cast("b"))
+        }
+        return Response(json.dumps(body), media_type="application/json", headers=headers)
+    return Response(level["data"], media_type="application/octet-stream", headers=headers)
@@ -41,7 +41,7 @@ async def generate_custom_tip(request: CustomPromptRequest):
         logger = logging.getLogger("uvicorn")
         logger.info(f"Generating custom tip for prompt: {request.prompt}")
         
-        response = call_grok([{"role": "user", "content": grok_prompt}])
+        response = await call_grok([{"role": "user", "content": grok_prompt}])
         
         if not response:
             raise HTTPException(status_code=500, detail="Keine Antwort von Grok")
@@ -69,7 +69,7 @@ async def generate_custom_tip(request: CustomPromptRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 from fastapi import UploadFile, File
-from core.transcriber import transcribe_clip
+from core.workers import run_cpu, transcribe, SchedulerBusy
 import shutil
 import os
 import uuid
@@ -77,22 +77,95 @@ import uuid
 @router.post("/transcribe-prompt")
 async def transcribe_prompt(file: UploadFile = File(...)):
     """Transcribe audio for custom prompt dictation"""
+    temp_filename = f"prompt_{uuid.uuid4()}.webm"
+    temp_path = os.path.join("uploads", temp_filename)
     try:
         # Save temp file
-        temp_filename = f"prompt_{uuid.uuid4()}.webm"
-        temp_path = os.path.join("uploads", temp_filename)
-        
         with open(temp_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
             
-        # Transcribe
-        transcript = transcribe_clip(temp_path)
-        
-        # Cleanup
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-            
+        # Transcribe (short dictation: small, fast model)
+        transcript = await run_cpu(transcribe, temp_path, "dictation", lane="interactive")
         return {"text": transcript}
         
+    except SchedulerBusy:
+        raise HTTPException(status_code=503, detail="Transkription ausgelastet, bitte gleich nochmal versuchen",
+                            headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Cleanup, also when transcription failed
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+from fastapi import WebSocket, WebSocketDisconnect
+from core.dictation import DictationStream, PARTIAL_INTERVAL_SEC, DICTATION_MAX_SEC
+import asyncio
+
+@router.websocket("/ws/dictation")
+async def dictation_ws(websocket: WebSocket, encoding: str = "webm"):
+    """
+    Live dictation: the client sends audio chunks (binary frames) while recording and
+    "end" (text frame) when done. The server answers with
+    {"type": "partial", "text"} while audio arrives and {"type": "final", ...} at the end.
+    encoding: webm (MediaRecorder chunks, decoded by ffmpeg) or pcm16 (16 kHz mono s16le).
+    """
+    await websocket.accept()
+    if encoding not in ("webm", "pcm16"):
+        await websocket.send_json({"type": "error", "detail": "encoding muss webm oder pcm16 sein"})
+        await websocket.close(code=1003)
+        return
+
+    stream = DictationStream(encoding)
+    await stream.start()
+    finished = asyncio.Event()
+
+    async def send_partials():
+        while not finished.is_set():
+            try:
+                await asyncio.wait_for(finished.wait(), timeout=PARTIAL_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                pass
+            if finished.is_set() or not stream.has_new_audio():
+                continue
+            result = await stream.partial()
+            if result and not finished.is_set():
+                await websocket.send_json({"type": "partial", **result, "audio_sec": round(stream.duration_sec, 2)})
+
+    partials = asyncio.create_task(send_partials())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                await stream.feed(message["bytes"])
+            elif message.get("text") == "end":
+                break
+            if stream.duration_sec > DICTATION_MAX_SEC:
+                await websocket.send_json({"type": "error", "detail": f"Diktat länger als {DICTATION_MAX_SEC} Sekunden"})
+                break
+
+        finished.set()
+        await partials
+        await stream.close()
+        await websocket.send_json({"type": "final", **await stream.final()})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        if isinstance(e, SchedulerBusy):
+            error, code = "Transkription ausgelastet, bitte gleich nochmal versuchen", 1013
+        else:
+            import logging
+            logging.getLogger("uvicorn").error(f"Dictation stream failed: {e}", exc_info=True)
+            error, code = str(e), 1011
+        try:
+            await websocket.send_json({"type": "error", "detail": error})
+            await websocket.close(code=code)
+        except Exception:
+            pass  # Client already gone
+    finally:
+        finished.set()
+        partials.cancel()
+        stream.abort()
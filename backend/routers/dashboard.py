@@ -69,6 +69,36 @@ import logging
 
 logger = logging.getLogger("uvicorn")
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss statistics of the Grok response cache (this worker process)"""
+    from core.llm_cache import llm_cache
+    return await llm_cache.stats()
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats():
+    """Queue lengths and wait times of the CPU lanes (interactive/bulk)"""
+    from core.workers import scheduler
+    return scheduler.stats()
+
+@router.get("/storage/stats")
+async def get_storage_stats():
+    """Disk usage of the uploads volume by category (clips, raw uploads, caches, ...)"""
+    from core.storage import storage_manager
+    return await storage_manager.usage()
+
+@router.post("/storage/gc")
+async def run_storage_gc(dry_run: bool = True):
+    """Deletes orphaned and expired files (dry_run=false to actually delete)"""
+    from core.storage import storage_manager
+    return await storage_manager.collect_garbage(dry_run=dry_run)
+
+@router.get("/classifier/stats")
+async def get_classifier_stats():
+    """State of the local topic classifier"""
+    from core.topic_classifier import topic_classifier
+    return topic_classifier.stats()
+
 @router.get("/suggestions/new-minute")
 async def get_suggestions():
     try:
@@ -93,7 +123,7 @@ async def get_suggestions():
         from core.style_aggregator import aggregate_style_profile
         style_profile = await aggregate_style_profile()
                 
-        suggestions_json = generate_suggestions(style_profile, weak_topics)
+        suggestions_json = await generate_suggestions(style_profile, weak_topics)
         logger.info(f"DEBUG: Raw suggestions_json type: {type(suggestions_json)}")
         logger.info(f"DEBUG: Raw suggestions_json content: {suggestions_json}")
         
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from core.database import get_database
 from core.analysis import merge_topics
-import os
+from core.storage import storage_manager
 import logging
 
 router = APIRouter()
@@ -24,14 +24,13 @@ async def delete_clip(filename: str):
         # Delete from database
         result = await db.clips.delete_one({"file_name": filename})
         
-        # Delete audio file from disk
-        file_path = clip.get("clip_path", "")
-        if file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                logger.info(f"Deleted audio file: {file_path}")
-            except Exception as e:
-                logger.error(f"Failed to delete audio file {file_path}: {e}")
+        # Delete audio (clip_path or file_path for KI-Mark clips), peaks, variants
+        # and the raw upload once no other clip uses it
+        try:
+            removed = await storage_manager.remove_clip_files(clip)
+            logger.info(f"Deleted files of {filename}: {removed}")
+        except Exception as e:
+            logger.error(f"Failed to delete files of {filename}: {e}")
         
         # Update theme counts
         if clip_topic:
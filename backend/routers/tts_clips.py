@@ -2,8 +2,10 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from core.database import get_database
 from core.tts import generate_audio_stream
-from core.transcriber import transcribe_clip
 from core.analysis import analyze_topic_style
+from core.peaks import generate_peaks
+from core.delivery import prepare_clip
+from core.workers import run_cpu
 import uuid
 import os
 from datetime import datetime
@@ -36,10 +38,17 @@ async def save_tts_clip(request: TTSClipRequest):
         # Get file size
         file_size = os.path.getsize(file_path)
         
+        # Waveform and playback variants, like uploaded clips
+        try:
+            await run_cpu(generate_peaks, file_path)
+            await run_cpu(prepare_clip, file_path)
+        except RuntimeError as e:
+            print(f"Peaks/variants failed for {filename}: {e}")
+        
         # Generate summary for AI clip
         from core.analysis import call_grok
         summary_prompt = f"Fasse folgenden Text in EINEM Satz zusammen (max 15 Wörter): \"{request.text[:500]}\""
-        summary_response = call_grok([{"role": "user", "content": summary_prompt}])
+        summary_response = await call_grok([{"role": "user", "content": summary_prompt}], cache=True)
         one_sentence_summary = summary_response.strip() if summary_response else "KI-generierter Tipp"
         
         # Save to database
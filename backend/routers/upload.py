@@ -1,11 +1,27 @@
-from fastapi import APIRouter, UploadFile, File, BackgroundTasks, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from core.database import get_database
-from core.audio import split_audio, cleanup_audio
-from core.transcriber import transcribe_clip
-from core.analysis import analyze_topic_style, merge_topics
-import shutil
+from core.audio import find_segments, cleanup_audio, detect_audio_format
+from core.audio_enhancer import UPLOAD_PRESET
+from core.splitter import cut_clips
+from core.peaks import generate_peaks
+from core.delivery import prepare_clip, content_version
+from core.pcm import decode_to_pcm, remove_pcm, PCM_DIR
+from core.analysis import analyze_topic_style
+from core.topics import assign_theme
+from core.topic_classifier import topic_classifier
+from core.theme_refiner import theme_refiner
+from core.jobs import ingest_queue
+from core.progress import progress_tracker
+from core import ingest_cache
+from core.workers import run_cpu, transcribe_pcm_chunked
+from typing import Dict
+import asyncio
+import aiofiles
+import hashlib
 import os
 import uuid
+from urllib.parse import quote
 from datetime import datetime
 
 router = APIRouter()
@@ -15,141 +31,408 @@ CLIPS_DIR = "uploads/clips"
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(CLIPS_DIR, exist_ok=True)
+os.makedirs(PCM_DIR, exist_ok=True)
 
-# In-memory status tracker (simple for MVP)
-upload_progress = {}
+# Recordings longer than this are split into 45-90 s clips in "auto" mode
+LONG_RECORDING_SEC = float(os.getenv("LONG_RECORDING_SEC", "600"))
 
-async def process_upload(file_path: str, upload_id: str):
+async def _set_progress(upload_id: str, stage: str = None, progress: int = None, **extra):
+    # Stored on the ingest job (shared by all workers, streamed via /uploads/events)
+    await progress_tracker.update(upload_id, stage, progress, **extra)
+
+def _stage_key(stage: str, segment_nr: int, long_form: bool) -> str:
+    return f"{stage}:{segment_nr}" if long_form else stage
+
+async def process_segment(upload_id: str, content_hash: str, file_path: str, pcm_path: str,
+                          segment_nr: int, start: float, end: float, long_form: bool,
+                          profile: str = "archive", cut_path: str = None) -> Dict:
+    """
+    Cleanup -> Whisper -> local theme -> Grok for one clip. Stage outputs are cached per content hash.
+    Whisper reads the shared PCM buffer, only the final clip is encoded to MP3.
+    cut_path: the segment already cut out of the upload (long recordings), cleaned
+    up as a whole instead of seeking into the source again.
+    The clip is stored right after transcription, the Grok analysis is added afterwards.
+    Returns the stored clip document.
+    """
     db = await get_database()
-    filename = os.path.basename(file_path).split('_', 1)[1] # remove uuid prefix
     
-    upload_progress[upload_id] = {
+    # 1. Cleanup
+    cached_clean = await ingest_cache.get_stage(content_hash, _stage_key("clean", segment_nr, long_form))
+    if cached_clean and os.path.exists(cached_clean["path"]):
+        cleaned_path = cached_clean["path"]
+    else:
+        if long_form:
+            base_name = os.path.splitext(os.path.basename(file_path))[0]
+            cleaned_filename = f"{base_name}_{segment_nr:03d}_clean.mp3"
+            if cut_path and os.path.exists(cut_path):
+                await run_cpu(cleanup_audio, cut_path, os.path.join(CLIPS_DIR, cleaned_filename))
+            else:
+                await run_cpu(cleanup_audio, file_path, os.path.join(CLIPS_DIR, cleaned_filename), start, end)
+        else:
+            cleaned_filename = os.path.splitext(os.path.basename(file_path))[0] + "_clean.mp3"
+            await run_cpu(cleanup_audio, file_path, os.path.join(CLIPS_DIR, cleaned_filename))
+        cleaned_path = os.path.join(CLIPS_DIR, cleaned_filename)
+        # Waveform (/clips/{filename}/peaks) and Opus/AAC playback variants, not worth failing the upload over
+        try:
+            await run_cpu(generate_peaks, cleaned_path)
+            await run_cpu(prepare_clip, cleaned_path)
+        except RuntimeError as e:
+            print(f"Peaks/variants failed for {cleaned_filename}: {e}")
+        await ingest_cache.put_stage(content_hash, _stage_key("clean", segment_nr, long_form),
+                                     {"path": cleaned_path, "duration_sec": end - start})
+    
+    # 2. Transcribe
+    transcription = await ingest_cache.get_stage(content_hash, _stage_key("transcript", segment_nr, long_form))
+    if not transcription:
+        print(f"Transcribing segment {segment_nr}: {start:.1f}-{end:.1f}s")
+        transcription = ingest_cache.compact_transcript(await transcribe_pcm_chunked(pcm_path, start, end, profile))
+        if transcription["vad_skipped_sec"]:
+            print(f"Segment {segment_nr}: VAD skipped {transcription['vad_skipped_sec']:.1f}s of silence")
+        await ingest_cache.put_stage(content_hash, _stage_key("transcript", segment_nr, long_form), transcription)
+    text = transcription["text"]
+    
+    # 3. Store the clip with the local classifier's theme (shows up on the dashboard
+    #    before Grok has answered)
+    clip_doc = {
         "upload_id": upload_id,
-        "filename": filename,
-        "stage": "Starting...",
-        "progress": 0
+        "segment_nr": segment_nr,
+        "start_sec": start,
+        "end_sec": end,
+        "duration_sec": end - start,
+        "text": text,
+        "vad_skipped_sec": transcription.get("vad_skipped_sec", 0),
+        "clip_path": cleaned_path,
+        "file_name": os.path.basename(cleaned_path),
+        "content_hash": content_hash,
+        "source_path": file_path,
+        # enhance_library.py skips clips that already carry its preset
+        "enhance_preset": UPLOAD_PRESET,
+        "created_at": datetime.utcnow()
+    }
+    
+    # Upsert so a job re-run after a crash does not create duplicate clips
+    result = await db.clips.update_one(
+        {"content_hash": content_hash, "segment_nr": segment_nr},
+        {"$set": clip_doc},
+        upsert=True
+    )
+    if result.upserted_id is not None:
+        clip_doc["_id"] = result.upserted_id
+    else:
+        existing = await db.clips.find_one({"content_hash": content_hash, "segment_nr": segment_nr}, {"_id": 1})
+        clip_doc["_id"] = existing["_id"]
+    
+    theme, confidence = topic_classifier.predict(text)
+    clip_doc["predicted_theme"] = theme
+    clip_doc["theme_confidence"] = confidence
+    if theme:
+        await assign_theme(clip_doc["_id"], theme, theme_source="classifier", theme_confidence=confidence)
+    
+    # 4. Analyze
+    analysis = await ingest_cache.get_stage(content_hash, _stage_key("analysis", segment_nr, long_form))
+    if not analysis:
+        print(f"Analyzing segment {segment_nr}")
+        analysis = await analyze_topic_style(text)
+        # Do not cache the fallback of a failed Grok call
+        if analysis.get("one_sentence_summary") != "Analysis failed.":
+            await ingest_cache.put_stage(content_hash, _stage_key("analysis", segment_nr, long_form), analysis)
+    
+    analysis_fields = {
+        "raw_topic": analysis.get("topic", "Unbekannt"),
+        "category": analysis.get("category", "Allgemein"),
+        "importance": analysis.get("importance", "mittel"),
+        "one_sentence_summary": analysis.get("one_sentence_summary", ""),
+        "mark_nörgel": analysis.get("mark_nörgel", ""),
+        "style": analysis.get("style", {})
     }
+    await db.clips.update_one({"_id": clip_doc["_id"]}, {"$set": analysis_fields})
+    clip_doc.update(analysis_fields)
+    
+    return clip_doc
+
+async def _cut_segments(upload_id: str, content_hash: str, file_path: str, segments) -> Dict[int, str]:
+    """
+    Cuts the segments whose cleanup is not cached yet with one splitter.cut_clips call.
+    Returns {segment_nr: cut path}; empty if cutting failed (clips then seek the source).
+    """
+    todo = []
+    for i in range(len(segments)):
+        cached = await ingest_cache.get_stage(content_hash, _stage_key("clean", i, True))
+        if not (cached and os.path.exists(cached["path"])):
+            todo.append(i)
+    if not todo:
+        return {}
     
+    base_name, ext = os.path.splitext(os.path.basename(file_path))
+    # "{upload_id}_..." names are protected from storage GC while the job runs
+    paths = {i: os.path.join(CLIPS_DIR, f"{base_name}_{i:03d}.cutting{ext or '.mp3'}") for i in todo}
     try:
-        # 1. No Split - User uploads individual clips
-        print(f"Processing single clip: {file_path}")
-        upload_progress[upload_id]["stage"] = "Reading Audio..."
-        upload_progress[upload_id]["progress"] = 10
+        await run_cpu(cut_clips, file_path, [segments[i] for i in todo], [paths[i] for i in todo])
+    except Exception as e:
+        print(f"Cutting clips of {upload_id} in one pass failed, falling back to per-clip cuts: {e}")
+        for path in paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+        return {}
+    return paths
+
+async def process_upload(file_path: str, upload_id: str, content_hash: str = None, mode: str = "auto",
+                         profile: str = "archive"):
+    db = await get_database()
+    filename = os.path.basename(file_path).split('_', 1)[1] # remove uuid prefix
+    
+    await _set_progress(upload_id, "Starting...", 0, filename=filename)
+    
+    try:
+        # 0. Dedup - identical content was already ingested
+        if not content_hash:
+            content_hash = await run_cpu(ingest_cache.file_sha256, file_path)
         
-        from pydub import AudioSegment
-        audio = AudioSegment.from_file(file_path)
-        duration_sec = len(audio) / 1000.0
-        segments = [(file_path, 0.0, duration_sec)]
+        existing = await ingest_cache.find_clip(content_hash)
+        if existing:
+            print(f"Duplicate upload {upload_id}, reusing clip {existing.get('file_name')}")
+            if os.path.exists(file_path) and file_path != existing.get("source_path"):
+                os.remove(file_path)
+            await _set_progress(upload_id, "Done (Duplikat)", 100, duplicate_of=existing.get("file_name"))
+            return
         
-        clips_data = []
-        all_topics = []
-        style_samples = []
+        # 1. Decode once into a shared PCM buffer (duration, silence detection, Whisper)
+        await _set_progress(upload_id, "Reading Audio...", 10)
+        pcm = await run_cpu(decode_to_pcm, file_path, os.path.join(PCM_DIR, f"{upload_id}.f32"))
+        duration_sec = pcm["duration_sec"]
         
-        for i, (seg_path, start, end) in enumerate(segments):
-            # 2. Cleanup
-            upload_progress[upload_id]["stage"] = "Enhancing Audio (FFmpeg)..."
-            upload_progress[upload_id]["progress"] = 30
-            
-            cleaned_filename = os.path.basename(seg_path).replace(".mp3", "_clean.mp3")
-            cleaned_path = os.path.join(CLIPS_DIR, cleaned_filename)
-            cleanup_audio(seg_path, cleaned_path)
-            
-            # 3. Transcribe
-            upload_progress[upload_id]["stage"] = "Transcribing (Whisper)..."
-            upload_progress[upload_id]["progress"] = 50
-            print(f"Transcribing segment {i}: {cleaned_path}")
-            
-            transcription = transcribe_clip(cleaned_path)
-            text = transcription["text"]
-            
-            # 4. Analyze
-            upload_progress[upload_id]["stage"] = "Analyzing Style & Topic (Grok)..."
-            upload_progress[upload_id]["progress"] = 80
-            print(f"Analyzing segment {i}")
+        long_form = mode == "long" or (mode == "auto" and duration_sec > LONG_RECORDING_SEC)
+        cut_paths = {}
+        
+        try:
+            # 2. Split long recordings into 45-90 s clips, otherwise the upload is one clip
+            if not long_form:
+                print(f"Processing single clip: {file_path}")
+                segments = [(0.0, duration_sec)]
+            else:
+                cached_segments = await ingest_cache.get_stage(content_hash, "segments")
+                if cached_segments:
+                    segments = [(start, end) for start, end in cached_segments["ranges"]]
+                else:
+                    print(f"Splitting long recording ({duration_sec:.0f}s): {file_path}")
+                    await _set_progress(upload_id, "Splitting recording...", 15)
+                    segments = await run_cpu(find_segments, pcm["path"])
+                    await ingest_cache.put_stage(content_hash, "segments", {
+                        "duration_sec": duration_sec,
+                        "ranges": [[start, end] for start, end in segments]
+                    })
             
-            analysis = analyze_topic_style(text)
+            # Cut all clips out of the upload in one ffmpeg pass (stream copy, the source
+            # is read once); each clip is then enhanced on its own without seeking
+            if long_form:
+                cut_paths = await _cut_segments(upload_id, content_hash, file_path, segments)
             
-            clip_doc = {
-                "upload_id": upload_id,
-                "segment_nr": i,
-                "start_sec": start,
-                "end_sec": end,
-                "duration_sec": end - start,
-                "text": text,
-                "raw_topic": analysis.get("topic", "Unbekannt"),
-                "category": analysis.get("category", "Allgemein"),
-                "importance": analysis.get("importance", "mittel"),
-                "one_sentence_summary": analysis.get("one_sentence_summary", ""),
-                "mark_nörgel": analysis.get("mark_nörgel", ""),
-                "style": analysis.get("style", {}),
-                "clip_path": cleaned_path,
-                "file_name": os.path.basename(cleaned_path),
-                "created_at": datetime.utcnow()
-            }
+            # 3. Cleanup, transcription and analysis for all clips concurrently
+            # (bounded by the CPU worker pool and the Grok concurrency limit)
+            total = len(segments)
+            done = 0
+            await _set_progress(upload_id, "Processing clips (FFmpeg/Whisper/Grok)...", 20,
+                          segments_total=total, segments_done=0)
             
-            await db.clips.insert_one(clip_doc)
-            clips_data.append(clip_doc)
-            all_topics.append(analysis.get("topic", "Unbekannt"))
-            style_samples.append(analysis.get("style", {}))
+            async def run_segment(i, start, end):
+                nonlocal done
+                clip_doc = await process_segment(upload_id, content_hash, file_path, pcm["path"], i, start, end, long_form,
+                                                 profile, cut_paths.get(i))
+                done += 1
+                await _set_progress(upload_id, f"Processed clip {done}/{total}", 20 + int(70 * done / total), segments_done=done)
+                return clip_doc
             
-            # Cleanup temp segment file if needed (but we are using original upload as segment now)
-            # if os.path.exists(seg_path): os.remove(seg_path)
-
-        # 5. Merge Topics & Stats
-        upload_progress[upload_id]["stage"] = "Finalizing..."
-        upload_progress[upload_id]["progress"] = 90
+            # TaskGroup: if one clip fails, the others are cancelled and awaited before the
+            # shared PCM buffer is removed (no orphaned tasks reading a deleted file)
+            try:
+                async with asyncio.TaskGroup() as group:
+                    tasks = [group.create_task(run_segment(i, start, end))
+                             for i, (start, end) in enumerate(segments)]
+            except ExceptionGroup as e:
+                raise e.exceptions[0]
+            clips_data = [task.result() for task in tasks]
+        finally:
+            remove_pcm(pcm["path"])
+            for path in cut_paths.values():
+                if os.path.exists(path):
+                    os.remove(path)
         
-        print("Merging topics...")
-        topic_mapping = merge_topics(all_topics)
+        style_samples = [clip["style"] for clip in clips_data]
         
-        # Update clips with final topics
-        for clip in clips_data:
-            raw = clip["raw_topic"]
-            final = topic_mapping.get(raw, raw)
-            await db.clips.update_one(
-                {"_id": clip["_id"]},
-                 {"$set": {"final_topic": final, "topic": final}}
-            )
-
-        # Update theme counts
-        final_topics = [topic_mapping.get(t, t) for t in all_topics]
-        from collections import Counter
-        theme_counts = Counter(final_topics)
+        # 3. Merge Topics & Stats
+        await _set_progress(upload_id, "Finalizing...", 90)
         
-        for theme, count in theme_counts.items():
-            await db.merged_themes.update_one(
-                {"name": theme},
-                {"$inc": {"count": count}},
-                upsert=True
-            )
+        # Confident classifier themes stay, only the rest is merged via Grok by the
+        # theme refiner: the upload is done without waiting for Grok
+        refine = [
+            clip for clip in clips_data
+            if not (clip["predicted_theme"] and topic_classifier.is_confident(clip["theme_confidence"]))
+        ]
+        for clip in refine:
+            if not clip["predicted_theme"]:
+                # No local guess: raw topic until Grok has merged it
+                await assign_theme(clip["_id"], clip["raw_topic"], theme_source="raw")
+        await theme_refiner.mark_pending([clip["_id"] for clip in refine])
         
         # Save style profile
         await db.style_cache.insert_one({"upload_id": upload_id, "samples": style_samples})
+        await ingest_cache.put_stage(content_hash, "done", {"upload_id": upload_id, "clips": total})
         
-        print(f"Processing complete for {upload_id}")
+        print(f"Processing complete for {upload_id} ({total} clips)")
         
         # Done
-        upload_progress[upload_id]["stage"] = "Done"
-        upload_progress[upload_id]["progress"] = 100
+        await _set_progress(upload_id, "Done", 100)
         # Remove after a delay? For now keep it so UI sees it.
         
     except Exception as e:
         print(f"Error processing upload {upload_id}: {e}")
-        upload_progress[upload_id]["stage"] = f"Error: {str(e)}"
-        upload_progress[upload_id]["progress"] = 0
+        await _set_progress(upload_id, f"Error: {str(e)}", 0)
+        raise
+
+# Upload limits
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "4096")) * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+PROBE_BYTES = 64
+
+async def stream_to_disk(chunks, file_path: str) -> Dict:
+    """
+    Writes an async stream of byte chunks straight to file_path.
+    Hashes while writing and rejects non-audio / oversize files early.
+    Returns {"sha256", "size", "format"}.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    head = b""
+    audio_format = None
+    
+    try:
+        async with aiofiles.open(file_path, "wb") as out:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                
+                # Probe container from the first bytes before anything hits the disk
+                if audio_format is None:
+                    head += chunk
+                    if len(head) < PROBE_BYTES:
+                        continue
+                    audio_format = detect_audio_format(head)
+                    if not audio_format:
+                        raise HTTPException(status_code=415, detail="Keine unterstützte Audiodatei")
+                    chunk, head = head, b""
+                
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="Datei zu groß")
+                
+                sha256.update(chunk)
+                await out.write(chunk)
+            
+            # Tiny file, shorter than the probe window
+            if audio_format is None:
+                audio_format = detect_audio_format(head)
+                if not audio_format:
+                    raise HTTPException(status_code=415, detail="Keine unterstützte Audiodatei")
+                size = len(head)
+                sha256.update(head)
+                await out.write(head)
+    except BaseException:
+        # Do not leave partial files behind (rejection, client disconnect, ...)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    
+    return {"sha256": sha256.hexdigest(), "size": size, "format": audio_format}
+
+async def _upload_file_chunks(file: UploadFile):
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+def _check_content_length(request: Request):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Datei zu groß")
+
+def _check_mode(mode: str):
+    # single: one clip per upload, long: split into 45-90 s clips, auto: by duration
+    if mode not in ("auto", "single", "long"):
+        raise HTTPException(status_code=400, detail="mode muss auto, single oder long sein")
+
+def _check_profile(profile: str):
+    # Transcription profile for uploads (see core.transcriber.PROFILES)
+    if profile not in ("archive", "fast"):
+        raise HTTPException(status_code=400, detail="profile muss archive oder fast sein")
+
+async def _check_admission():
+    # Bulk admission control: reject before the file is stored (for /upload/stream
+    # before the body is read; /upload has already received the multipart body)
+    if await ingest_queue.is_full():
+        raise HTTPException(status_code=503, detail="Zu viele Uploads in der Warteschlange, bitte später erneut versuchen",
+                            headers={"Retry-After": "60"})
+
+async def _queue_upload(upload_id: str, filename: str, file_path: str, stored: Dict, mode: str,
+                        profile: str = "archive"):
+    # Same content already ingested: nothing to do
+    existing = await ingest_cache.find_clip(stored["sha256"])
+    if existing:
+        os.remove(file_path)
+        return {
+            "message": "Duplicate upload, existing clip reused",
+            "upload_id": existing.get("upload_id"),
+            "duplicate": True,
+            "file_name": existing.get("file_name"),
+            "sha256": stored["sha256"]
+        }
+    
+    # Queue for processing (persisted, picked up by the ingest workers); the initial
+    # progress is part of the job document, a worker may claim it immediately
+    await ingest_queue.enqueue(upload_id, file_path, progress={"stage": "Queued", "progress": 0, "filename": filename},
+                               content_hash=stored["sha256"], mode=mode, profile=profile)
+    
+    return {
+        "message": "Upload received, processing queued",
+        "upload_id": upload_id,
+        "sha256": stored["sha256"],
+        "size": stored["size"],
+        "format": stored["format"]
+    }
 
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...), background_tasks: BackgroundTasks = None):
+async def upload_file(request: Request, file: UploadFile = File(...), mode: str = "auto", profile: str = "archive"):
+    """
+    Multipart upload, a thin wrapper for simple clients: FastAPI spools the whole
+    body before this runs. The frontend uses /upload/stream instead.
+    """
+    _check_content_length(request)
+    _check_mode(mode)
+    _check_profile(profile)
+    await _check_admission()
     upload_id = str(uuid.uuid4())
-    file_path = os.path.join(UPLOAD_DIR, f"{upload_id}_{file.filename}")
+    filename = os.path.basename(file.filename or "upload.mp3")
+    file_path = os.path.join(UPLOAD_DIR, f"{upload_id}_{filename}")
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    # Trigger processing
-    background_tasks.add_task(process_upload, file_path, upload_id)
+    stored = await stream_to_disk(_upload_file_chunks(file), file_path)
+    return await _queue_upload(upload_id, filename, file_path, stored, mode, profile)
+
+@router.post("/upload/stream")
+async def upload_stream(request: Request, filename: str, mode: str = "auto", profile: str = "archive"):
+    """
+    Raw-body upload: the request body is written straight to uploads/
+    without going through a multipart temp spool.
+    """
+    _check_content_length(request)
+    _check_mode(mode)
+    _check_profile(profile)
+    await _check_admission()
+    upload_id = str(uuid.uuid4())
+    filename = os.path.basename(filename) or "upload.mp3"
+    file_path = os.path.join(UPLOAD_DIR, f"{upload_id}_{filename}")
     
-    return {"message": "Upload received, processing started", "upload_id": upload_id}
+    stored = await stream_to_disk(request.stream(), file_path)
+    return await _queue_upload(upload_id, filename, file_path, stored, mode, profile)
 
 @router.get("/segments/all")
 async def get_all_segments():
@@ -166,11 +449,28 @@ async def get_all_segments():
         if "one_sentence_summary" not in clip: clip["one_sentence_summary"] = clip.get("text", "")[:100] + "..."
         if "mark_nörgel" not in clip: clip["mark_nörgel"] = "Mark hat dazu nichts gesagt."
         if "source" not in clip: clip["source"] = "User"  # Default to User for uploaded clips
+        # Versioned URL (cacheable forever) once the content hash is known
+        clip_path = os.path.join(CLIPS_DIR, clip["file_name"])
+        version = content_version(clip_path, compute=False) if os.path.exists(clip_path) else None
+        clip["audio_url"] = f"/clips/{quote(clip['file_name'])}" + (f"?v={version}" if version else "")
         
     return clips
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 @router.get("/uploads/status")
 async def get_upload_status():
-    # Return active uploads (filter out 'Done' after some time ideally, but for now return all)
-    # Convert dict to list
-    return list(upload_progress.values())
+    # Active uploads plus the most recently finished ones (finished jobs expire)
+    return await progress_tracker.recent()
+
+@router.get("/uploads/events")
+async def upload_events(request: Request):
+    """Server-Sent Events with progress updates of all uploads"""
+    return StreamingResponse(progress_tracker.subscribe(request), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/uploads/{upload_id}/events")
+async def upload_events_single(upload_id: str, request: Request):
+    """Server-Sent Events for one upload, ends when it is done or failed"""
+    if not await progress_tracker.get(upload_id):
+        raise HTTPException(status_code=404, detail="Upload nicht gefunden")
+    return StreamingResponse(progress_tracker.subscribe(request, upload_id), media_type="text/event-stream", headers=SSE_HEADERS)
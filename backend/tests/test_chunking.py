@@ -0,0 +1,71 @@
+from core.chunking import plan_windows, stitch
+
+def test_short_audio_is_one_window():
+    assert plan_windows(90, 120, 10) == [(0.0, 90)]
+
+def test_windows_cover_audio_with_overlap():
+    windows = plan_windows(1000, 120, 10)
+    assert windows[0][0] == 0.0
+    assert windows[-1][1] == 1000
+    for (_, end), (next_start, _) in zip(windows, windows[1:]):
+        assert end - next_start == 10
+    # All but the last window have the chunk length, the last one absorbs the tail
+    assert all(end - start == 120 for start, end in windows[:-1])
+    assert windows[-1][1] - windows[-1][0] <= 120 + max(10, 120 / 4)
+
+def test_no_tiny_tail_window():
+    windows = plan_windows(235, 120, 10)
+    assert windows == [(0.0, 120.0), (110.0, 235)]
+
+def _segment(start, end, text, words=None):
+    segment = {"start": start, "end": end, "text": text}
+    if words:
+        segment["words"] = words
+    return segment
+
+def test_stitch_segments_without_words_drops_overlap_duplicates():
+    windows = [(0.0, 120.0), (110.0, 250.0)]
+    results = [
+        {"segments": [_segment(0, 60, "a"), _segment(60, 108, "b"), _segment(108, 120, "c")]},
+        # Window 2 hears the end of "c" again, then continues
+        {"segments": [_segment(0, 9, "c"), _segment(9, 70, "d"), _segment(70, 140, "e")]},
+    ]
+    result = stitch(results, windows)
+    assert result["text"] == "abcde"
+    assert [s["id"] for s in result["segments"]] == [0, 1, 2, 3, 4]
+    assert result["segments"][3]["start"] == 119
+
+def test_stitch_keeps_segment_reaching_past_previous_window():
+    windows = [(0.0, 120.0), (110.0, 250.0)]
+    results = [
+        {"segments": [_segment(0, 112, "a"), _segment(112, 120, "b")]},
+        # Starts before the cut (115) but is mostly audio window 1 never heard
+        {"segments": [_segment(4, 20, "B"), _segment(20, 60, "c")]},
+    ]
+    assert stitch(results, windows)["text"] == "abBc"
+
+def test_stitch_cuts_words_at_overlap_midpoint():
+    windows = [(0.0, 20.0), (10.0, 30.0)]
+    first = [{"word": f" w{t}", "start": t, "end": t + 0.5} for t in range(0, 20, 2)]
+    second = [{"word": f" w{t + 10}", "start": t, "end": t + 0.5} for t in range(0, 20, 2)]
+    results = [
+        {"segments": [_segment(0, 19.5, "".join(w["word"] for w in first), first)], "language": "de"},
+        {"segments": [_segment(0, 19.5, "".join(w["word"] for w in second), second)], "language": "de"},
+    ]
+    result = stitch(results, windows)
+    assert result["text"] == "".join(f" w{t}" for t in range(0, 30, 2))
+    assert result["language"] == "de"
+
+def test_stitch_counts_skipped_silence_in_overlap_once():
+    windows = [(0.0, 120.0), (110.0, 250.0)]
+    results = [
+        {"segments": [], "vad_skipped": [[100.0, 120.0]], "vad_skipped_sec": 20.0},
+        {"segments": [], "vad_skipped": [[0.0, 10.0]], "vad_skipped_sec": 10.0},
+    ]
+    assert stitch(results, windows)["vad_skipped_sec"] == 20.0
+
+def test_stitch_skipped_silence_without_ranges_is_proportional():
+    windows = [(0.0, 100.0), (80.0, 180.0)]
+    results = [{"segments": [], "vad_skipped_sec": 10.0}, {"segments": [], "vad_skipped_sec": 10.0}]
+    # Window 1 keeps [0, 90), window 2 keeps [90, 180): 9 s + 9 s
+    assert stitch(results, windows)["vad_skipped_sec"] == 18.0
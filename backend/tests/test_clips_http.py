@@ -0,0 +1,35 @@
+import pytest
+from fastapi import HTTPException
+from routers.clips import _parse_range, _etag_matches
+
+SIZE = 1000
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=500-", (500, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    ("bytes= 10-20", (10, 20)),
+])
+def test_single_range(header, expected):
+    assert _parse_range(header, SIZE) == expected
+
+@pytest.mark.parametrize("header", [None, "", "items=0-10", "bytes=0-10,20-30", "bytes=a-b"])
+def test_ignored_ranges_send_whole_file(header):
+    assert _parse_range(header, SIZE) is None
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1500-1600", "bytes=50-10"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(HTTPException) as e:
+        _parse_range(header, SIZE)
+    assert e.value.status_code == 416
+    assert e.value.headers["Content-Range"] == f"bytes */{SIZE}"
+
+def test_if_none_match():
+    assert _etag_matches('"abc"', '"abc"')
+    assert _etag_matches('"x", "abc"', '"abc"')
+    assert _etag_matches('W/"abc"', '"abc"')
+    assert _etag_matches("*", '"abc"')
+    assert not _etag_matches('"abcd"', '"abc"')
+    assert not _etag_matches(None, '"abc"')
@@ -0,0 +1,35 @@
+import pytest
+from core import delivery
+from core.delivery import negotiate
+
+@pytest.fixture(autouse=True)
+def all_variants(monkeypatch):
+    monkeypatch.setattr(delivery, "CLIP_VARIANTS", ["opus", "aac"])
+
+def test_explicit_format_wins():
+    assert negotiate("audio/ogg", "aac") == "aac"
+    assert negotiate(None, "mp3") == "mp3"
+
+def test_unknown_format_falls_back_to_accept():
+    assert negotiate("audio/ogg", "flac") == "opus"
+
+@pytest.mark.parametrize("accept", [None, "", "*/*", "audio/*", "text/html", "audio/*;q=0.8, */*"])
+def test_wildcards_get_original(accept):
+    assert negotiate(accept) == "mp3"
+
+def test_named_media_type():
+    assert negotiate("audio/mp4") == "aac"
+    assert negotiate("audio/ogg; codecs=opus") == "opus"
+
+def test_quality_values():
+    assert negotiate("audio/ogg;q=0.5, audio/mp4;q=0.9") == "aac"
+    assert negotiate("audio/ogg;q=0, audio/mpeg") == "mp3"
+    assert negotiate("audio/ogg;q=abc, audio/mp4;q=0.1") == "aac"
+
+def test_equal_quality_prefers_smallest():
+    assert negotiate("audio/mpeg, audio/mp4, audio/ogg") == "opus"
+
+def test_disabled_variant_is_not_served(monkeypatch):
+    monkeypatch.setattr(delivery, "CLIP_VARIANTS", ["aac"])
+    assert negotiate("audio/ogg") == "mp3"
+    assert negotiate("audio/ogg, audio/mp4;q=0.5") == "aac"
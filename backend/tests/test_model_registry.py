@@ -0,0 +1,62 @@
+import sys
+import types
+import pytest
+from core import transcriber
+from core.transcriber import ModelRegistry
+
+class FakeModel:
+    def parameters(self):
+        return []
+
+@pytest.fixture
+def loads(monkeypatch):
+    """
+    Fake whisper module: loading the archive model fails while `broken` is set.
+    Returns .calls (attempted loads) and .broken.
+    """
+    fake = types.SimpleNamespace(calls=[], broken=True)
+
+    def load_model(name):
+        fake.calls.append(name)
+        if name == "big" and fake.broken:
+            raise MemoryError("not enough RAM")
+        return FakeModel()
+
+    monkeypatch.setitem(sys.modules, "whisper", types.SimpleNamespace(load_model=load_model))
+    monkeypatch.setattr(transcriber, "WHISPER_FALLBACK_MODEL", "base")
+    return fake
+
+def test_fallback_during_cooldown(loads):
+    registry = ModelRegistry()
+    registry.get("big")
+    registry.get("big")
+    assert loads.calls == ["big", "base"]
+    assert registry.model_name("big") == "base"
+
+def test_fallback_unloaded_during_cooldown_is_reloaded_not_original(loads):
+    registry = ModelRegistry()
+    registry.get("big")
+    registry.models.clear()
+    registry.sizes.clear()
+    registry.get("big")
+    assert loads.calls == ["big", "base", "base"]
+
+def test_original_is_tried_again_after_cooldown(loads, monkeypatch):
+    registry = ModelRegistry()
+    registry.get("big")
+    loads.broken = False
+    # Cooldown is over, the fallback is still loaded
+    monkeypatch.setattr(transcriber, "FALLBACK_COOLDOWN_SEC", 0)
+    registry.get("big")
+    assert loads.calls == ["big", "base", "big"]
+    assert registry.model_name("big") == "big"
+    assert registry.failed == {}
+
+def test_failing_again_after_cooldown_restarts_it(loads, monkeypatch):
+    registry = ModelRegistry()
+    registry.get("big")
+    monkeypatch.setattr(transcriber, "FALLBACK_COOLDOWN_SEC", 0)
+    registry.get("big")
+    assert loads.calls == ["big", "base", "big"]
+    assert registry.model_name("big") == "base"
+    assert "big" in registry.failed
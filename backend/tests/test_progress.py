@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta
+from core import progress
+from core.progress import ProgressTracker
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+def _tracker(monkeypatch, pending):
+    """Tracker whose MongoDB query returns (and drains) `pending`; counts the polls."""
+    monkeypatch.setattr(progress, "POLL_INTERVAL", 0.02)
+    tracker = ProgressTracker()
+    tracker.polls = 0
+
+    async def changes(since, seen):
+        if since > datetime.utcnow() - timedelta(minutes=5):
+            tracker.polls += 1
+        changed = list(pending)
+        pending.clear()
+        return changed
+    tracker._changes = changes
+    return tracker
+
+async def _read(stream, count):
+    events = []
+    async for event in stream:
+        if event.startswith("event:"):
+            events.append(event)
+            if len(events) == count:
+                break
+    return events
+
+def test_one_poller_fans_out_to_all_subscribers(monkeypatch):
+    pending = []
+    tracker = _tracker(monkeypatch, pending)
+
+    async def scenario():
+        requests = [FakeRequest() for _ in range(5)]
+        readers = [asyncio.create_task(_read(tracker.subscribe(request), 1)) for request in requests]
+        await asyncio.sleep(0.2)
+        pending.append({"job_id": "a", "status": "running", "progress_seq": 2, "progress": {"stage": "Whisper"}})
+        tracker.notify()
+        events = await asyncio.wait_for(asyncio.gather(*readers), timeout=2)
+        return events
+
+    events = asyncio.run(scenario())
+    assert all(len(e) == 1 and '"upload_id": "a"' in e[0] for e in events)
+    # ~10 rounds in 0.2 s for all five streams together, not ten per stream
+    assert tracker.polls <= 20
+    assert not tracker.subscribers
+
+def test_single_upload_stream_filters_and_ends_when_done(monkeypatch):
+    pending = []
+    tracker = _tracker(monkeypatch, pending)
+
+    async def fake_db():
+        class Jobs:
+            async def find_one(self, query):
+                return {"job_id": "a", "status": "running", "progress_seq": 1}
+        return type("DB", (), {"ingest_jobs": Jobs()})()
+    monkeypatch.setattr(progress, "get_database", fake_db)
+
+    async def scenario():
+        stream = tracker.subscribe(FakeRequest(), "a")
+        reader = asyncio.create_task(_read(stream, 3))
+        await asyncio.sleep(0.05)
+        pending.extend([
+            {"job_id": "b", "status": "running", "progress_seq": 5},
+            {"job_id": "a", "status": "running", "progress_seq": 1},
+            {"job_id": "a", "status": "done", "progress_seq": 2},
+        ])
+        tracker.notify()
+        return await asyncio.wait_for(reader, timeout=2)
+
+    events = asyncio.run(scenario())
+    # Initial state and "done"; job b and the repeated state are skipped, the stream then ends
+    assert len(events) == 2
+    assert '"status": "done"' in events[1]
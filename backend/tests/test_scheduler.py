@@ -0,0 +1,18 @@
+import pytest
+from core.workers import CPUScheduler
+
+@pytest.mark.parametrize("slots, reserved, expected", [
+    (1, 1, 0),
+    (2, 1, 0),
+    (3, 1, 1),
+    (4, 2, 2),
+    (3, 5, 2),
+])
+def test_reservation_leaves_bulk_enough_slots(slots, reserved, expected):
+    scheduler = CPUScheduler(slots, reserved)
+    assert scheduler.reserved_interactive == expected
+
+def test_two_workers_run_two_bulk_tasks():
+    scheduler = CPUScheduler(2, 1)
+    scheduler.running["bulk"] = 1
+    assert scheduler._can_start("bulk")
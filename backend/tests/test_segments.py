@@ -0,0 +1,47 @@
+import random
+import pytest
+from core.audio import group_ranges
+
+MIN_LEN, MAX_LEN = 45000, 90000
+
+def synthetic_ranges(seed: int):
+    """
+    Speech ranges (ms) with short pauses, the occasional long silence and long monologues.
+    """
+    rng = random.Random(seed)
+    duration = rng.randint(60_000, 3_600_000)
+    ranges, pos = [], rng.randint(0, 5000)
+    while pos < duration:
+        talk = rng.choice([rng.randint(500, 15_000), rng.randint(500, 15_000), rng.randint(60_000, 200_000)])
+        end = min(pos + talk, duration)
+        ranges.append([pos, end])
+        pos = end + rng.choice([rng.randint(1200, 4000), rng.randint(1200, 4000), rng.randint(20_000, 600_000)])
+    return ranges, duration
+
+def _check(chunks, duration):
+    assert chunks
+    for (start, end), (next_start, _) in zip(chunks, chunks[1:]):
+        assert end <= next_start
+    assert chunks[0][0] >= 0 and chunks[-1][1] <= duration
+    for start, end in chunks:
+        assert MIN_LEN <= end - start <= MAX_LEN, (start, end)
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_recordings_give_clips_within_bounds(seed):
+    ranges, duration = synthetic_ranges(seed)
+    _check(group_ranges(ranges, duration, MIN_LEN, MAX_LEN), duration)
+
+def test_short_chunk_between_full_ones():
+    # 85 s, 13.5 s, 85 s of speech with 2 s pauses: the short one cannot join either side as is
+    ranges = [[0, 85_000], [87_000, 100_500], [102_500, 187_500]]
+    _check(group_ranges(ranges, 190_000, MIN_LEN, MAX_LEN), 190_000)
+
+def test_short_tail_is_merged():
+    ranges = [[0, 60_000], [61_500, 100_000], [101_500, 140_000]]
+    _check(group_ranges(ranges, 140_000, MIN_LEN, MAX_LEN), 140_000)
+
+def test_no_speech_detected():
+    _check(group_ranges([], 200_000, MIN_LEN, MAX_LEN), 200_000)
+
+def test_recording_shorter_than_min_len_is_one_clip():
+    assert group_ranges([[1000, 20_000]], 30_000, MIN_LEN, MAX_LEN) == [(0, 30_000)]
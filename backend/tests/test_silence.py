@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from core.silence import detect_nonsilent, detect_nonsilent_chunks
+
+SAMPLE_RATE = 16000
+
+def synthetic_audio(seconds: float, seed: int = 7) -> np.ndarray:
+    """
+    Noise bursts ("speech") separated by pauses over a quiet noise floor, as int16.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * SAMPLE_RATE)
+    samples = rng.normal(0, 0.002, total)
+    pos = 0
+    while pos < total:
+        end = min(pos + int(rng.uniform(1, 8) * SAMPLE_RATE), total)
+        samples[pos:end] += rng.normal(0, 0.2, end - pos)
+        pos = end + int(rng.uniform(0.2, 3) * SAMPLE_RATE)
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+
+PARAMS = {"min_silence_len": 1200, "silence_thresh": -40}
+
+def test_matches_pydub():
+    pydub = pytest.importorskip("pydub")
+    from pydub import silence as pydub_silence
+    pcm16 = synthetic_audio(60)
+    audio = pydub.AudioSegment(data=pcm16.tobytes(), sample_width=2, frame_rate=SAMPLE_RATE, channels=1)
+    expected = pydub_silence.detect_nonsilent(audio, **PARAMS)
+    assert expected
+    assert detect_nonsilent(pcm16, SAMPLE_RATE, max_amplitude=32768, **PARAMS) == expected
+
+@pytest.mark.parametrize("chunk_sec", [0.37, 1, 30])
+def test_chunked_equals_whole(chunk_sec):
+    pcm16 = synthetic_audio(45)
+    chunk = int(chunk_sec * SAMPLE_RATE)
+    streamed = detect_nonsilent_chunks(
+        (pcm16[i:i + chunk] for i in range(0, len(pcm16), chunk)),
+        SAMPLE_RATE, max_amplitude=32768, **PARAMS
+    )
+    assert streamed == detect_nonsilent(pcm16, SAMPLE_RATE, max_amplitude=32768, **PARAMS)
+
+def test_all_silent():
+    assert detect_nonsilent(np.zeros(SAMPLE_RATE * 5, dtype=np.int16), SAMPLE_RATE, max_amplitude=32768, **PARAMS) == []
@@ -0,0 +1,38 @@
+import os
+import shutil
+import subprocess
+import pytest
+
+pytest.importorskip("ffmpeg")
+if not shutil.which("ffmpeg"):
+    pytest.skip("ffmpeg not installed", allow_module_level=True)
+
+from core.splitter import cut_clips, MissingPiecesError
+
+@pytest.fixture
+def source(tmp_path):
+    """10 s sine tone as WAV."""
+    path = str(tmp_path / "src.wav")
+    subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=10", path],
+        check=True
+    )
+    return path
+
+def _leftovers(directory):
+    return [name for name in os.listdir(directory) if name.startswith(".cut-")]
+
+def test_cuts_all_clips_and_removes_gap_pieces(source, tmp_path):
+    outputs = [str(tmp_path / f"clip_{i}.wav") for i in range(3)]
+    assert cut_clips(source, [(1.0, 3.0), (4.0, 6.0), (7.0, 9.0)], outputs) == outputs
+    assert all(os.path.getsize(path) > 0 for path in outputs)
+    assert not _leftovers(tmp_path)
+
+def test_clip_past_the_end_is_reported(source, tmp_path):
+    outputs = [str(tmp_path / "inside.wav"), str(tmp_path / "outside.wav")]
+    with pytest.raises(MissingPiecesError) as exc:
+        cut_clips(source, [(1.0, 3.0), (12.0, 14.0)], outputs)
+    assert exc.value.missing == ["outside.wav"]
+    assert os.path.exists(outputs[0])
+    assert not os.path.exists(outputs[1])
+    assert not _leftovers(tmp_path)
@@ -0,0 +1,64 @@
+import os
+import time
+import pytest
+from core import storage
+from core.storage import StorageManager
+from core.peaks import peaks_path
+from core.pcm import PCM_DIR
+
+OLD = time.time() - 7 * 86400
+
+def _touch(path: str, mtime: float = OLD, size: int = 10) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return os.path.normpath(path)
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    # All storage paths are relative to the working directory ("uploads/...")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "RAW_UPLOAD_RETENTION_DAYS", 5)
+    os.makedirs("uploads/clips")
+    return tmp_path
+
+def _plan(clip_names=(), sources=(), active=()):
+    plan = StorageManager()._plan(set(clip_names), set(sources), set(active))
+    return {path: reason for path, reason, _ in plan}
+
+def test_referenced_clip_and_its_peaks_are_kept(uploads):
+    clip = _touch("uploads/clips/a_clean.mp3")
+    peaks = _touch(peaks_path(clip))
+    assert _plan(clip_names={"a_clean.mp3"}) == {}
+    assert _plan() == {clip: "orphan_clips", peaks: "orphan_derived"}
+
+def test_recent_files_are_in_grace_period(uploads):
+    _touch("uploads/clips/new_clean.mp3", mtime=time.time())
+    _touch("uploads/new_upload.mp3", mtime=time.time())
+    assert _plan() == {}
+
+def test_clips_of_active_job_are_protected(uploads):
+    # A long ingest writes clips hours before their documents exist
+    running = _touch("uploads/clips/job1_talk_000_clean.mp3")
+    cut = _touch("uploads/clips/job1_talk_001.cutting.mp3")
+    raw = _touch("uploads/job1_talk.mp3")
+    pcm = _touch(os.path.join(PCM_DIR, "job1.f32"))
+    orphan = _touch("uploads/clips/job2_talk_000_clean.mp3")
+    orphan_pcm = _touch(os.path.join(PCM_DIR, "job2.f32"))
+    plan = _plan(active={"job1", raw})
+    assert running not in plan and cut not in plan and raw not in plan and pcm not in plan
+    assert plan[orphan] == "orphan_clips"
+    assert plan[orphan_pcm] == "orphan_pcm"
+
+def test_raw_upload_retention(uploads):
+    expired = _touch("uploads/old.mp3")
+    kept = _touch("uploads/young.mp3", mtime=time.time() - 86400)
+    orphan = _touch("uploads/abandoned.mp3")
+    plan = _plan(sources={expired, kept})
+    assert plan == {expired: "expired_raw", orphan: "orphan_raw"}
+
+def test_retention_disabled(uploads, monkeypatch):
+    monkeypatch.setattr(storage, "RAW_UPLOAD_RETENTION_DAYS", 0)
+    source = _touch("uploads/old.mp3")
+    assert _plan(sources={source}) == {}
@@ -2,24 +2,37 @@ import { NextResponse } from 'next/server';
 
 const BACKEND_URL = process.env.BACKEND_URL || 'http://backend:8000';
 
+// Passed through in both directions so Range requests, ETag revalidation
+// and format negotiation reach the backend
+const REQUEST_HEADERS = ['range', 'if-range', 'if-none-match', 'accept'];
+const RESPONSE_HEADERS = ['content-type', 'content-length', 'content-range', 'accept-ranges', 'etag', 'cache-control', 'vary'];
+
 export async function GET(request, { params }) {
     const filename = params.filename;
 
     try {
-        const response = await fetch(`${BACKEND_URL}/clips/${filename}`);
+        const headers = {};
+        for (const name of REQUEST_HEADERS) {
+            const value = request.headers.get(name);
+            if (value) headers[name] = value;
+        }
+        const { search } = new URL(request.url);
+        const response = await fetch(`${BACKEND_URL}/clips/${filename}${search}`, { headers, cache: 'no-store' });
 
-        if (!response.ok) {
+        if (!response.ok && response.status !== 304 && response.status !== 416) {
             throw new Error(`Clips API returned ${response.status}`);
         }
 
-        // Stream the audio response
-        const audioBlob = await response.blob();
+        const responseHeaders = {};
+        for (const name of RESPONSE_HEADERS) {
+            const value = response.headers.get(name);
+            if (value) responseHeaders[name] = value;
+        }
 
-        return new NextResponse(audioBlob, {
-            headers: {
-                'Content-Type': 'audio/mpeg',
-                'Content-Length': audioBlob.size.toString(),
-            },
+        // Stream the audio response (no buffering of the whole file)
+        return new NextResponse(response.status === 304 ? null : response.body, {
+            status: response.status,
+            headers: responseHeaders,
         });
     } catch (error) {
         console.error('Clips Error:', error);
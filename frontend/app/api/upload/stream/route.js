@@ -0,0 +1,41 @@
+import { NextResponse } from 'next/server';
+
+const BACKEND_URL = process.env.BACKEND_URL || 'http://backend:8000';
+
+export const dynamic = 'force-dynamic';
+
+// Raw-body upload proxy: the file is piped to /upload/stream chunk by chunk
+// instead of being parsed with formData() (which holds the whole file in memory)
+export async function POST(request) {
+    const { search } = new URL(request.url);
+
+    try {
+        const headers = {
+            'content-type': request.headers.get('content-type') || 'application/octet-stream',
+        };
+        // Lets the backend reject oversize files before reading the body
+        const contentLength = request.headers.get('content-length');
+        if (contentLength) headers['content-length'] = contentLength;
+
+        const response = await fetch(`${BACKEND_URL}/upload/stream${search}`, {
+            method: 'POST',
+            headers,
+            body: request.body,
+            duplex: 'half',
+        });
+
+        const responseContentType = response.headers.get('content-type') || '';
+        if (responseContentType.includes('application/json')) {
+            const data = await response.json();
+            return NextResponse.json(data, { status: response.status });
+        }
+        const text = await response.text();
+        return new NextResponse(text, { status: response.status });
+    } catch (error) {
+        console.error('Upload Proxy Error:', error);
+        return NextResponse.json(
+            { error: 'Failed to upload to backend' },
+            { status: 500 }
+        );
+    }
+}
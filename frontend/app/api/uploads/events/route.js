@@ -0,0 +1,37 @@
+const BACKEND_URL = process.env.BACKEND_URL || 'http://backend:8000';
+
+// Never cached or pre-rendered, every request opens its own stream
+export const dynamic = 'force-dynamic';
+
+// Server-Sent Events proxy: the catch-all route parses the body as JSON, which
+// never finishes for an event stream, so the response is passed through as-is
+export async function GET(request) {
+    try {
+        const response = await fetch(`${BACKEND_URL}/uploads/events`, {
+            headers: { accept: 'text/event-stream' },
+            cache: 'no-store',
+            // Closing the browser connection also closes the backend stream
+            signal: request.signal,
+        });
+
+        if (!response.ok) {
+            throw new Error(`Events API returned ${response.status}`);
+        }
+
+        return new Response(response.body, {
+            status: 200,
+            headers: {
+                'Content-Type': 'text/event-stream',
+                'Cache-Control': 'no-cache, no-transform',
+                'Connection': 'keep-alive',
+                'X-Accel-Buffering': 'no',
+            },
+        });
+    } catch (error) {
+        console.error('Upload Events Error:', error);
+        return new Response(JSON.stringify({ error: 'Failed to connect to upload events' }), {
+            status: 502,
+            headers: { 'Content-Type': 'application/json' },
+        });
+    }
+}
@@ -43,6 +43,12 @@ export default function Home() {
 
     const router = useRouter();
 
+    // Clip audio URL for one playback format (keeps the versioned ?v= of audio_url)
+    const clipSource = (clip, format) => {
+        const url = `/api${clip.audio_url || `/clips/${clip.file_name}`}`;
+        return `${url}${url.includes('?') ? '&' : '?'}format=${format}`;
+    };
+
     // Toast helper
     const showToast = (message, type = 'info') => {
         const id = Date.now();
@@ -71,14 +77,29 @@ export default function Home() {
                 .catch(err => console.error("Failed to fetch stats:", err));
         };
 
-        // Poll for processing uploads
-        const pollStatus = () => {
+        // Upload progress: current list once, then live updates via Server-Sent Events
+        const fetchStatus = () => {
             fetch(`${API_URL}/uploads/status`)
                 .then(res => res.json())
-                .then(setProcessingUploads)
+                .then(data => {
+                    if (Array.isArray(data)) {
+                        setProcessingUploads(data);
+                    }
+                })
                 .catch(err => console.error("Failed to fetch status:", err));
         };
 
+        const uploadEvents = new EventSource(`${API_URL}/uploads/events`);
+        uploadEvents.addEventListener('progress', (event) => {
+            const update = JSON.parse(event.data);
+            setProcessingUploads(prev => {
+                const others = prev.filter(upload => upload.upload_id !== update.upload_id);
+                return [update, ...others];
+            });
+        });
+        // EventSource reconnects by itself; the list is reloaded so nothing missed in between is lost
+        uploadEvents.onopen = fetchStatus;
+
         // Poll for clips from all processing uploads
         const pollClips = () => {
             fetch(`${API_URL}/segments/all`)
@@ -92,15 +113,13 @@ export default function Home() {
         };
 
         fetchStats();
-        pollStatus();
         pollClips();
 
-        const statusInterval = setInterval(pollStatus, 2000);
         const clipsInterval = setInterval(pollClips, 3000);
         const statsInterval = setInterval(fetchStats, 5000);
 
         return () => {
-            clearInterval(statusInterval);
+            uploadEvents.close();
             clearInterval(clipsInterval);
             clearInterval(statsInterval);
         };
@@ -1061,8 +1080,11 @@ export default function Home() {
                                 </div>
 
                                 <div className="mb-6">
-                                    <audio controls className="w-full h-10" autoPlay>
-                                        <source src={`/api/clips/${selectedClip.file_name}`} type="audio/mpeg" />
+                                    {/* Smallest format the browser can play first, the original MP3 as fallback */}
+                                    <audio key={selectedClip.file_name} controls className="w-full h-10" autoPlay>
+                                        <source src={clipSource(selectedClip, 'opus')} type="audio/ogg; codecs=opus" />
+                                        <source src={clipSource(selectedClip, 'aac')} type="audio/mp4" />
+                                        <source src={clipSource(selectedClip, 'mp3')} type="audio/mpeg" />
                                         Your browser does not support the audio element.
                                     </audio>
                                 </div>
@@ -64,11 +64,10 @@ export function UploadProvider({ children }: { children: ReactNode }) {
 
     const uploadFile = (file: File, uploadIndex: number): Promise<void> => {
         return new Promise((resolve) => {
-            const formData = new FormData();
-            formData.append('file', file);
-
+            // Raw body upload, streamed through the proxy to the backend (no multipart buffering)
             const xhr = new XMLHttpRequest();
-            xhr.open('POST', `/api/upload`);
+            xhr.open('POST', `/api/upload/stream?filename=${encodeURIComponent(file.name)}`);
+            xhr.setRequestHeader('Content-Type', file.type || 'application/octet-stream');
 
             xhr.upload.onprogress = (event) => {
                 if (event.lengthComputable) {
@@ -97,7 +96,7 @@ export function UploadProvider({ children }: { children: ReactNode }) {
                 resolve();
             };
 
-            xhr.send(formData);
+            xhr.send(file);
         });
     };
 